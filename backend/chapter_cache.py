@@ -0,0 +1,169 @@
+"""
+Chapter Cache - Bounded LRU of parsed chapters with file-change invalidation
+=============================================================================
+Parsed chapters are kept in memory under a byte budget (least recently used
+entries are evicted first). `ChapterWatcher` polls file mtimes off the event
+loop and drops exactly the entries whose source changed:
+
+    ("formatted", slug, id)           Chapters/*.vn.txt, invalidated per changed file
+    ("published", slug, id, etag)     Published archive/chapters.json, keyed by content
+                                      hash so a changed chapter can never be served stale
+
+After each publish the newest chapters are pre-warmed so new-chapter traffic
+is served from memory. Each book has its own watcher over its own chapter
+directory; they share one cache and budget.
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Optional
+
+from chapter_archive import encode_chapter
+from chapter_parser import invalidate_index
+from chapter_state import chapter_ids_from_name
+
+
+def formatted_key(slug: str, chapter_id: int) -> tuple:
+    return ("formatted", slug, chapter_id)
+
+
+def published_key(slug: str, chapter_id: int, etag: str) -> tuple:
+    return ("published", slug, chapter_id, etag)
+
+
+class ChapterCache:
+    """Thread-safe LRU cache with a size budget in bytes and hit/miss counters."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: Hashable, chapter: dict) -> None:
+        size = len(encode_chapter(chapter))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (chapter, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches; returns the number dropped."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self.bytes -= self._entries.pop(key)[1]
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class ChapterWatcher:
+    """Polls chapter sources for changes and keeps the cache consistent with them."""
+
+    def __init__(self, cache: ChapterCache, store, chapters_dir: Path, slug: str, prewarm_count: int):
+        self.cache = cache
+        self.store = store
+        self.chapters_dir = Path(chapters_dir)
+        self.slug = slug
+        self.prewarm_count = prewarm_count
+        self._files: Optional[Dict[str, tuple]] = None
+        self._published_signature = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> Dict[str, tuple]:
+        files = {}
+        for path in self.chapters_dir.glob("*.vn.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files[path.name] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def poll(self) -> dict:
+        """
+        Check sources once (blocking, run in a thread).
+
+        Returns:
+            {"formatted": entries dropped, "published": entries dropped, "prewarmed": chapters loaded}
+        """
+        with self._lock:
+            result = {"formatted": 0, "published": 0, "prewarmed": 0}
+
+            files = self._scan()
+            if self._files is not None:
+                changed = {
+                    name for name in files.keys() | self._files.keys()
+                    if files.get(name) != self._files.get(name)
+                }
+                if changed:
+                    invalidate_index(self.chapters_dir)  # new/removed files show up on the next read
+                ids = {chapter_id for name in changed for chapter_id in chapter_ids_from_name(name)}
+                if ids:
+                    result["formatted"] = self.cache.invalidate(
+                        lambda key: key[0] == "formatted" and key[1] == self.slug and key[2] in ids
+                    )
+            self._files = files
+
+            snapshot = self.store.get(self.slug)
+            if snapshot is not None and snapshot.signature != self._published_signature:
+                etags = snapshot.etags
+                result["published"] = self.cache.invalidate(
+                    lambda key: key[0] == "published" and key[1] == self.slug
+                    and etags.get(key[2]) != key[3]
+                )
+                result["prewarmed"] = self.prewarm(snapshot)
+                self._published_signature = snapshot.signature
+
+            return result
+
+    def prewarm(self, snapshot) -> int:
+        """Load the newest chapters of a snapshot into the cache."""
+        loaded = 0
+        for chapter_id in snapshot.ids[-self.prewarm_count:] if self.prewarm_count else []:
+            key = published_key(snapshot.slug, chapter_id, snapshot.etags[chapter_id])
+            if key in self.cache:
+                continue
+            chapter = snapshot.read(chapter_id)
+            if chapter is not None:
+                self.cache.put(key, chapter)
+                loaded += 1
+        return loaded
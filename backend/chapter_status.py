@@ -0,0 +1,77 @@
+"""
+Chapter Status - Cached per-stage chapter counts for the admin dashboard
+========================================================================
+/api/chapters/status used to query the state store on every admin page load
+and after every job. The report (counts, id ranges, gaps, stale and pending
+chapters per stage) is now computed once and served from memory until the
+state store changes.
+
+Every pipeline stage records its results in the state store (SQLite, WAL
+mode), so a change shows up as a new mtime/size of the database or its WAL
+file: checking costs two stat() calls, whatever the number of chapters.
+Finished jobs also invalidate the snapshot explicitly. Each book has its own
+state store (see scripts/book_registry.py) and therefore its own cache.
+"""
+
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from book_registry import Book
+
+
+class ChapterStatusCache:
+    """State store report of one book, recomputed only when the store has changed."""
+
+    def __init__(self, book: Book):
+        self.book = book
+        self.db_path = Path(book.state_db)
+        self._snapshot: Optional[dict] = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _current_signature(self) -> tuple:
+        signature = []
+        for path in (self.db_path, Path(f"{self.db_path}-wal")):
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def invalidate(self):
+        """Force a recompute on the next request (e.g. after a job finished)."""
+        self._signature = None
+
+    def current(self) -> Optional[dict]:
+        """The cached snapshot if the state store has not changed since, else None (cheap)."""
+        snapshot = self._snapshot
+        if snapshot is not None and self._signature == self._current_signature():
+            return snapshot
+        return None
+
+    def refresh(self) -> dict:
+        """Recompute the snapshot (blocking, run in a thread)."""
+        with self._lock:
+            if self._snapshot is not None and self._signature == self._current_signature():
+                return self._snapshot  # another request refreshed it meanwhile
+            state = self.book.open_state()  # rebuilds from disk on first use
+            # Taken before reading: a write during the report changes it, so it is picked up next time
+            signature = self._current_signature()
+            stages = state.report()
+            self._snapshot = {
+                "untranslated": stages["scraped"]["count"],
+                "translated": stages["translated"]["count"],
+                "formatted": stages["formatted"]["count"],
+                "published": stages["published"]["count"],
+                "stale": {stage: info["stale"] for stage, info in stages.items()},
+                "stages": stages,
+                "updatedAt": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._signature = signature
+            return self._snapshot
+
+    def get(self) -> dict:
+        return self.current() or self.refresh()
@@ -0,0 +1,170 @@
+"""
+Chapter Store - In-process index of published chapters for the public API
+==========================================================================
+Serves chapter lists and single chapters from the binary chapter archive
+(scripts/chapter_archive.py): the index and chapter summaries stay in memory,
+chapter bodies are read from the memory-mapped pack on demand. If the archive
+is missing or older than chapters.json, the JSON is loaded into memory instead.
+
+A snapshot is rebuilt only when the underlying files change (checked with a
+stat per lookup), never per request. The archive of a replaced snapshot is
+closed (see chapter_archive.open_archive); a request still reading from the
+old snapshot reads from the current one instead.
+"""
+
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import chapter_archive
+from book_registry import Book, book_config_path, book_exists
+
+# Fields returned in chapter lists (no content / paragraph offsets)
+SUMMARY_FIELDS = ("id", "volume", "title", "wordCount", "readingMinutes", "paragraphCount")
+
+
+@dataclass
+class BookSnapshot:
+    """Immutable view of one book's published chapters."""
+    slug: str
+    meta: dict
+    ids: List[int]
+    summaries: Dict[int, dict]
+    etags: Dict[int, str]
+    last_modified: float
+    signature: tuple
+    reader: Callable[[int], Optional[dict]] = field(repr=False)
+
+    def id_range(self, from_id: Optional[int] = None, to_id: Optional[int] = None) -> List[int]:
+        """Chapter ids within [from_id, to_id] (inclusive, both optional)."""
+        start = bisect_left(self.ids, from_id) if from_id is not None else 0
+        end = bisect_right(self.ids, to_id) if to_id is not None else len(self.ids)
+        return self.ids[start:end]
+
+    def neighbours(self, chapter_id: int) -> tuple:
+        """(previous id, next id) around a chapter, None at either end."""
+        index = bisect_left(self.ids, chapter_id)
+        prev_id = self.ids[index - 1] if index > 0 else None
+        next_id = self.ids[index + 1] if index + 1 < len(self.ids) else None
+        return prev_id, next_id
+
+    def read(self, chapter_id: int) -> Optional[dict]:
+        """Full chapter (content included), None if not published."""
+        if chapter_id not in self.summaries:
+            return None
+        return self.reader(chapter_id)
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _summary(chapter: dict) -> dict:
+    return {key: chapter[key] for key in SUMMARY_FIELDS if key in chapter}
+
+
+class ChapterStore:
+    """Per-book snapshots, refreshed when the archive or chapters.json changes."""
+
+    def __init__(self):
+        self._snapshots: Dict[str, BookSnapshot] = {}
+        self._paths: Dict[str, tuple] = {}  # slug → (config mtime, sources)
+        self._lock = threading.Lock()
+
+    def book_exists(self, slug: str) -> bool:
+        return book_exists(slug)
+
+    def _sources(self, slug: str) -> dict:
+        """
+        Published files of a book: its chapters.json and the archive next to it
+        (see book_registry.py). Re-read only when the book's config changes.
+        """
+        config_path = book_config_path(slug)
+        config_mtime = _mtime(config_path)
+        if config_mtime is None or not book_exists(slug):
+            return {}
+        cached = self._paths.get(slug)
+        if cached is not None and cached[0] == config_mtime:
+            return cached[1]
+        with open(config_path, "r", encoding="utf-8") as f:
+            json_path = Book(slug, json.load(f), config_path).chapters_json
+        pack_path, index_path = chapter_archive.archive_paths(json_path)
+        sources = {"json": json_path, "pack": pack_path, "index": index_path}
+        self._paths[slug] = (config_mtime, sources)
+        return sources
+
+    def get(self, slug: str) -> Optional[BookSnapshot]:
+        """Current snapshot of a book (None if the book has no published data)."""
+        sources = self._sources(slug)
+        if not sources:
+            return None
+        signature = (_mtime(sources["index"]), _mtime(sources["pack"]), _mtime(sources["json"]))
+
+        snapshot = self._snapshots.get(slug)
+        if snapshot is not None and snapshot.signature == signature:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshots.get(slug)
+            if snapshot is None or snapshot.signature != signature:
+                snapshot = self._load(slug, sources, signature)
+                if snapshot is not None:
+                    self._snapshots[slug] = snapshot
+        return snapshot
+
+    def _archive_reader(self, slug: str, archive: chapter_archive.ChapterArchive) -> Callable[[int], Optional[dict]]:
+        def read(chapter_id: int) -> Optional[dict]:
+            try:
+                return archive.read_chapter(chapter_id)
+            except chapter_archive.ArchiveClosedError:
+                # Snapshot replaced while this request was running
+                snapshot = self.get(slug)
+                return snapshot.read(chapter_id) if snapshot is not None else None
+        return read
+
+    def _load(self, slug: str, sources: dict, signature: tuple) -> Optional[BookSnapshot]:
+        index_mtime, _, json_mtime = signature
+
+        if chapter_archive.is_archive_current(sources["json"], sources["index"]):
+            try:
+                archive = chapter_archive.open_archive(sources["pack"], sources["index"])
+            except chapter_archive.ArchiveError as e:
+                print(f"⚠️ Chapter archive unreadable, falling back to chapters.json: {e}")
+                archive = None
+            if archive is not None:
+                summaries = {chapter["id"]: _summary(chapter) for chapter in archive.iter_chapters()}
+                return BookSnapshot(
+                    slug=slug,
+                    meta=archive.meta,
+                    ids=archive.ids(),
+                    summaries=summaries,
+                    etags={chapter_id: entry.payload_hash for chapter_id, entry in archive.entries.items()},
+                    last_modified=index_mtime / 1e9,
+                    signature=signature,
+                    reader=self._archive_reader(slug, archive),
+                )
+
+        if json_mtime is None:
+            return None
+        with open(sources["json"], "r", encoding="utf-8") as f:
+            data = json.load(f)
+        chapters = {chapter["id"]: chapter for chapter in data.get("chapters", [])}
+        return BookSnapshot(
+            slug=slug,
+            meta={key: value for key, value in data.items() if key != "chapters"},
+            ids=sorted(chapters),
+            summaries={chapter_id: _summary(chapter) for chapter_id, chapter in chapters.items()},
+            etags={chapter_id: chapter_archive.chapter_hash(chapter) for chapter_id, chapter in chapters.items()},
+            last_modified=json_mtime / 1e9,
+            signature=signature,
+            reader=chapters.get,
+        )
+
+
+chapter_store = ChapterStore()
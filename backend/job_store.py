@@ -0,0 +1,225 @@
+"""
+Job Store - Persistent job history and timings (SQLite)
+=======================================================
+Every job is saved to `backend/jobs.db` when it is queued, started and
+finished: type, arguments, timestamps, duration, exit code, chapters processed,
+throughput and a pointer to its log file. Each stage (script run) of a job is
+saved with its own duration, so runs of the same type can be compared to spot
+regressions (Ko-fi pages loading slower, a slower translation model...).
+
+Jobs still queued or running when the backend stops are marked "interrupted"
+on the next start.
+"""
+
+import json
+import re
+import sqlite3
+from pathlib import Path
+from statistics import mean
+from typing import Callable, Dict, List, Optional
+
+from chapter_state import STAGE_FORMATTED, STAGE_PUBLISHED, STAGE_SCRAPED, STAGE_TRANSLATED, ChapterState
+
+JOB_INTERRUPTED = "interrupted"
+
+# Chapter stage whose records count as "chapters processed" for each job type
+KIND_STAGES = {
+    "scrape": STAGE_SCRAPED,
+    "translate": STAGE_TRANSLATED,
+    "format": STAGE_FORMATTED,
+    "update": STAGE_PUBLISHED,
+    "pipeline": STAGE_PUBLISHED,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    args        TEXT,
+    status      TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    started_at  TEXT,
+    finished_at TEXT,
+    duration    REAL,
+    exit_code   INTEGER,
+    chapters    INTEGER,
+    throughput  REAL,
+    log_file    TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_kind_created ON jobs (kind, created_at);
+CREATE TABLE IF NOT EXISTS job_stages (
+    job_id     TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    script     TEXT NOT NULL,
+    label      TEXT,
+    started_at TEXT NOT NULL,
+    duration   REAL NOT NULL,
+    exit_code  INTEGER,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+
+def camel_case(row: sqlite3.Row) -> dict:
+    """Row as a dict with camelCase keys, like the other API responses."""
+    return {re.sub(r'_([a-z])', lambda m: m.group(1).upper(), key): row[key] for key in row.keys()}
+
+
+def stage_summary(stages: List[dict]) -> Dict[str, dict]:
+    """Per-script run count and duration stats of a job's stages."""
+    durations: Dict[str, List[float]] = {}
+    for stage in stages:
+        durations.setdefault(stage["script"], []).append(stage["duration"])
+    return {
+        script: {
+            "runs": len(values),
+            "total": round(sum(values), 3),
+            "mean": round(mean(values), 3),
+            "max": round(max(values), 3),
+        }
+        for script, values in durations.items()
+    }
+
+
+def percent_change(value: Optional[float], base: Optional[float]) -> Optional[float]:
+    if value is None or not base:
+        return None
+    return round((value - base) / base * 100, 1)
+
+
+class JobStore:
+    """Saves jobs and their stage timings; lists and compares past runs."""
+
+    def __init__(self, db_path: Path, chapter_states: Optional[Callable[[str], Optional[ChapterState]]] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.chapter_states = chapter_states  # book slug → that book's state store
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            conn.execute(
+                "UPDATE jobs SET status = ? WHERE status IN ('queued', 'running')", (JOB_INTERRUPTED,)
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def chapters_processed(self, job) -> Optional[int]:
+        """Chapters of the job's book whose record for the job type's stage was written while the job ran."""
+        stage = KIND_STAGES.get(job.kind)
+        book = job.args.get("book")
+        if stage is None or book is None or self.chapter_states is None or not (job.started_at and job.finished_at):
+            return None
+        state = self.chapter_states(book)
+        return state.count_updated(stage, job.started_at, job.finished_at) if state is not None else None
+
+    def save(self, job):
+        """Insert or update a job (and, once finished, its stages)."""
+        duration = throughput = None
+        chapters = job.chapters
+        if job.started_at and job.finished_at:
+            duration = (job.finished_at - job.started_at).total_seconds()
+            if chapters and duration:
+                throughput = round(chapters / duration * 60, 3)  # chapters per minute
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, kind, name, args, status, created_at, started_at, "
+                "finished_at, duration, exit_code, chapters, throughput, log_file) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id, job.kind, job.name, json.dumps(job.args, ensure_ascii=False), job.status,
+                    job.created_at.isoformat(),
+                    job.started_at.isoformat() if job.started_at else None,
+                    job.finished_at.isoformat() if job.finished_at else None,
+                    duration, job.exit_code, chapters, throughput, job.log_path,
+                ),
+            )
+            if job.finished_at:
+                conn.execute("DELETE FROM job_stages WHERE job_id = ?", (job.id,))
+                conn.executemany(
+                    "INSERT INTO job_stages (job_id, seq, script, label, started_at, duration, exit_code) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (job.id, seq, stage["script"], stage["label"], stage["startedAt"],
+                         stage["duration"], stage["exitCode"])
+                        for seq, stage in enumerate(job.stages)
+                    ],
+                )
+
+    @staticmethod
+    def _job_row(row: sqlite3.Row) -> dict:
+        job = camel_case(row)
+        job["args"] = json.loads(job["args"]) if job["args"] else {}
+        return job
+
+    def list_jobs(self, kind: Optional[str] = None, status: Optional[str] = None,
+                  offset: int = 0, limit: int = 50) -> List[dict]:
+        """Past jobs, newest first."""
+        where, params = [], []
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        sql = "SELECT * FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        with self._connect() as conn:
+            rows = conn.execute(sql, (*params, limit, offset)).fetchall()
+        return [self._job_row(row) for row in rows]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """One job with its stages."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            stages = conn.execute(
+                "SELECT script, label, started_at, duration, exit_code FROM job_stages "
+                "WHERE job_id = ? ORDER BY seq", (job_id,)
+            ).fetchall()
+        job = self._job_row(row)
+        job["stages"] = [camel_case(stage) for stage in stages]
+        job["stageSummary"] = stage_summary(job["stages"])
+        return job
+
+    def compare(self, job_ids: List[str]) -> dict:
+        """
+        Compare runs side by side; the first job is the baseline.
+
+        Returns:
+            {"jobs": [...], "stages": {script: [stats per job, with "change" in % vs baseline]},
+             "missing": [unknown ids]}
+        """
+        jobs, missing = [], []
+        for job_id in job_ids:
+            job = self.get(job_id)
+            if job is None:
+                missing.append(job_id)
+            else:
+                jobs.append(job)
+
+        scripts = []
+        for job in jobs:
+            scripts.extend(script for script in job["stageSummary"] if script not in scripts)
+        stages = {}
+        for script in scripts:
+            base = jobs[0]["stageSummary"].get(script, {}).get("mean")
+            row = []
+            for job in jobs:
+                stats = job["stageSummary"].get(script)
+                row.append({**stats, "change": percent_change(stats["mean"], base)} if stats else None)
+            stages[script] = row
+
+        base_job = jobs[0] if jobs else {}
+        for job in jobs:
+            job["change"] = {
+                "duration": percent_change(job["duration"], base_job.get("duration")),
+                "throughput": percent_change(job["throughput"], base_job.get("throughput")),
+            }
+        return {"jobs": jobs, "stages": stages, "missing": missing}
@@ -0,0 +1,355 @@
+"""
+Jobs - Concurrent job scheduler with per-resource locks
+=======================================================
+Each admin action is submitted as a job (id, status, own log). Jobs declare
+the resources they use; jobs sharing a resource never run at the same time,
+independent jobs run in parallel up to MAX_PARALLEL_JOBS. Jobs start in FIFO
+order: a queued job is never overtaken by a later job that needs one of its
+resources, so a busy resource cannot starve it.
+
+Log lines are kept per job and on an aggregate bus (all jobs, tagged with the
+job name) that backs /api/logs and /api/logs/stream.
+
+Jobs can be cancelled (queued: removed from the queue, running: the job's
+task is cancelled and its stages are stopped) and have an optional wall-clock
+timeout. Either way the resources are released once the job's stages have
+actually exited (subprocesses are killed after a grace period, in-process
+stages stop at their next output), so a hung job never blocks the other
+actions and a stopped job never overlaps the next one on its resources.
+
+With a JobStore, every job is also saved (queued, started, finished) with its
+stage timings, so history survives restarts.
+"""
+
+import asyncio
+import sqlite3
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from job_store import JobStore
+from task_logs import TaskLogStore
+
+# Resources a job may lock. All but the scraper are per book (see book_resource):
+# every book has its own work directories, so jobs of different books run in parallel.
+RESOURCE_SCRAPER = "scraper"        # Browser session of the scraper (one Chrome, shared by all books)
+RESOURCE_TRANSLATOR = "translator"  # Translation run of a book (Chapters_Translated/)
+RESOURCE_CHAPTERS = "chapters"      # Writes to the book's Chapters/
+RESOURCE_PUBLISH = "publish"        # The book's chapters.json + archive, chapters.js, static pages
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISH_MESSAGES = {
+    JOB_SUCCEEDED: "✅ Completed",
+    JOB_FAILED: "❌ Failed",
+    JOB_CANCELLED: "🛑 Cancelled",
+}
+
+
+def book_resource(resource: str, book: str) -> str:
+    """Lock name of a per-book resource, e.g. "chapters:max-level-priest"."""
+    return f"{resource}:{book}"
+
+
+class LogBus:
+    """
+    Ring buffer of log lines with sequence ids and push notification.
+
+    Ids keep increasing, so a client cursor ("last id I have seen") stays valid
+    while old lines rotate out. Subscribers wait on `changed`, an event that is
+    swapped and set on every change instead of polling.
+    """
+
+    def __init__(self, capacity: int):
+        self.lines: deque = deque(maxlen=capacity)
+        self.next_id = 1
+        self.session_first_id = 1  # first line returned when no cursor is given
+        self._changed = asyncio.Event()
+
+    def append(self, line: str):
+        self.lines.append(line)
+        self.next_id += 1
+        self.notify()
+
+    def notify(self):
+        """Wake every subscriber waiting for changes."""
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def start_session(self):
+        """Lines appended from now on are what a client without cursor receives."""
+        self.session_first_id = self.next_id
+
+    @property
+    def changed(self) -> asyncio.Event:
+        """Event set on the next line or state change."""
+        return self._changed
+
+    @property
+    def last_id(self) -> int:
+        return self.next_id - 1
+
+    @property
+    def session_count(self) -> int:
+        return self.next_id - self.session_first_id
+
+    def since(self, cursor: Optional[int] = None) -> list:
+        """
+        (id, line) pairs after a cursor; the current session if no cursor.
+        Lines already rotated out of the buffer are skipped (see log history).
+        """
+        first_buffered = self.next_id - len(self.lines)
+        start_id = self.session_first_id if cursor is None else cursor + 1
+        start = max(0, start_id - first_buffered)
+        return [(first_buffered + index, line)
+                for index, line in enumerate(islice(self.lines, start, None), start)]
+
+
+JobFunc = Callable[["Job"], Awaitable[bool]]
+
+
+class Job:
+    """One submitted action: state, resources and its own log (memory + file)."""
+
+    def __init__(self, job_id: str, name: str, resources: Iterable[str], func: JobFunc,
+                 log_file, buffer_lines: int, on_log: Callable[["Job", str, str], None],
+                 timeout: Optional[float] = None, kind: Optional[str] = None, args: Optional[dict] = None):
+        self.id = job_id
+        self.name = name
+        self.kind = kind or name
+        self.args = args or {}
+        self.resources = frozenset(resources)
+        self.func = func
+        self.timeout = timeout or None  # wall-clock limit in seconds, None = no limit
+        self.status = JOB_QUEUED
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.logs = LogBus(buffer_lines)
+        self.stages: List[dict] = []
+        self.exit_code: Optional[int] = None  # first failing stage's code, 0 on success
+        self.chapters: Optional[int] = None   # chapters processed, counted by the job store when finished
+        self.log_path = getattr(log_file, "name", None)
+        self._log_file = log_file
+        self._on_log = on_log
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (JOB_QUEUED, JOB_RUNNING)
+
+    def add_log(self, message: str):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        line = f"[{timestamp}] {message}"
+        self.logs.append(line)
+        if self._log_file is not None:
+            self._log_file.write(line + "\n")
+        self._on_log(self, timestamp, message)
+
+    def record_stage(self, script: str, label: str, started_at: datetime, duration: float, exit_code: int):
+        """Timing of one stage (script run) of this job."""
+        self.stages.append({
+            "script": script,
+            "label": label,
+            "startedAt": started_at.isoformat(),
+            "duration": round(duration, 3),
+            "exitCode": exit_code,
+        })
+        if exit_code != 0 and self.exit_code is None:
+            self.exit_code = exit_code
+
+    def start(self):
+        self.status = JOB_RUNNING
+        self.started_at = datetime.now()
+        self.add_log(f"🚀 Starting: {self.name}")
+
+    def finish(self, status: str):
+        duration = (datetime.now() - self.started_at).total_seconds() if self.started_at else 0
+        self.add_log(f"{FINISH_MESSAGES[status]} in {duration:.1f}s")
+        self.status = status
+        self.finished_at = datetime.now()
+        if status == JOB_SUCCEEDED and self.exit_code is None:
+            self.exit_code = 0
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        self.logs.notify()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "kind": self.kind,
+            "status": self.status,
+            "resources": sorted(self.resources),
+            "timeout": self.timeout,
+            "createdAt": self.created_at.isoformat(),
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+            "logCount": self.logs.session_count,
+            "lastLogId": self.logs.last_id,
+        }
+
+
+class JobScheduler:
+    """FIFO job queue with per-resource locks and bounded parallelism."""
+
+    def __init__(self, max_parallel: int, log_store: TaskLogStore, buffer_lines: int, history: int = 100,
+                 default_timeout: Optional[float] = None, store: Optional[JobStore] = None):
+        self.max_parallel = max(1, max_parallel)
+        self.store = store
+        self.default_timeout = default_timeout
+        self.log_store = log_store
+        self.buffer_lines = buffer_lines
+        self.history = history
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.queue: deque = deque()
+        self.running: Dict[str, Job] = {}
+        self.locked: set = set()
+        self.logs = LogBus(buffer_lines)
+        self.on_finish: List[Callable[[Job], None]] = []  # called with every finished job
+        self._tasks: Dict[str, asyncio.Task] = {}  # running job id → task
+
+    @property
+    def is_running(self) -> bool:
+        """True while any job is running or queued."""
+        return bool(self.running or self.queue)
+
+    def submit(self, name: str, resources: Iterable[str], func: JobFunc, timeout: Optional[float] = None,
+               kind: Optional[str] = None, args: Optional[dict] = None) -> Job:
+        """
+        Queue a job; it starts as soon as its resources and a slot are free.
+        `kind` (action type) and `args` (request arguments) are saved in the job history.
+        """
+        if not self.is_running:
+            self.logs.start_session()
+        job_id, log_file = self.log_store.open(name, [job_id for job_id, job in self.jobs.items() if job.is_active])
+        job = Job(job_id, name, resources, func, log_file, self.buffer_lines, self._aggregate_log,
+                  timeout if timeout is not None else self.default_timeout, kind, args)
+        self.jobs[job.id] = job
+        self.queue.append(job)
+        self._save(job)
+        self._dispatch()
+        if job.status == JOB_QUEUED:
+            job.add_log(f"⏳ Queued: waiting for {', '.join(sorted(job.resources)) or 'a free slot'}")
+        return job
+
+    def _save(self, job: Job):
+        if self.store is None:
+            return
+        try:
+            if job.finished_at and job.chapters is None:
+                job.chapters = self.store.chapters_processed(job)
+            self.store.save(job)
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not save job {job.id}: {e}")
+
+    def _finished(self, job: Job):
+        self._save(job)
+        for callback in self.on_finish:
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"⚠️ on_finish callback failed for job {job.id}: {e}")
+
+    def _aggregate_log(self, job: Job, timestamp: str, message: str):
+        self.logs.append(f"[{timestamp}] [{job.name}] {message}")
+
+    def _dispatch(self):
+        """Start queued jobs in order whose resources are free (no overtaking on shared resources)."""
+        blocked = set()
+        for job in list(self.queue):
+            if len(self.running) >= self.max_parallel:
+                break
+            if job.resources & (self.locked | blocked):
+                blocked |= job.resources
+                continue
+            self.queue.remove(job)
+            self.running[job.id] = job
+            self.locked |= job.resources
+            job.start()
+            self._save(job)
+            self._tasks[job.id] = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: Job):
+        try:
+            if job.timeout:
+                success = await asyncio.wait_for(job.func(job), job.timeout)
+            else:
+                success = await job.func(job)
+            status = JOB_SUCCEEDED if success else JOB_FAILED
+        except asyncio.TimeoutError:
+            job.add_log(f"⏱️ Timed out after {job.timeout:.0f}s, stopped")
+            status = JOB_FAILED
+        except asyncio.CancelledError:
+            status = JOB_CANCELLED
+        except Exception as e:
+            job.add_log(f"❌ Error: {e}")
+            status = JOB_FAILED
+        job.finish(status)
+        self._finished(job)
+
+        del self.running[job.id]
+        del self._tasks[job.id]
+        self.locked -= job.resources
+        self._prune()
+        self._dispatch()
+        self.logs.notify()
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job.
+
+        A queued job is removed from the queue. A running job's task is
+        cancelled: its stages are stopped (see run_script) and it finishes as
+        cancelled, keeping whatever its stages already saved. Its resources
+        stay locked until the stages have exited.
+
+        Returns:
+            The job, or None if it is unknown
+        """
+        job = self.jobs.get(job_id)
+        if job is None or not job.is_active:
+            return job
+        if job.status == JOB_QUEUED:
+            self.queue.remove(job)
+            job.add_log("🛑 Cancel requested, removed from queue")
+            job.finish(JOB_CANCELLED)
+            self._finished(job)
+            self._prune()
+            self._dispatch()  # later jobs may have been waiting behind it
+            self.logs.notify()
+        else:
+            job.add_log("🛑 Cancel requested, stopping...")
+            self._tasks[job.id].cancel()
+        return job
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond `history` (their log files remain)."""
+        finished = [job_id for job_id, job in self.jobs.items() if not job.is_active]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[dict]:
+        """Known jobs, newest first."""
+        return [job.to_dict() for job in reversed(self.jobs.values())]
+
+    def get_status(self) -> dict:
+        running = list(self.running.values())
+        return {
+            "isRunning": self.is_running,
+            "currentTask": ", ".join(job.name for job in running) or None,
+            "running": [job.to_dict() for job in running],
+            "queued": [job.to_dict() for job in self.queue],
+            "maxParallel": self.max_parallel,
+            "logCount": self.logs.session_count,
+            "lastLogId": self.logs.last_id,
+        }
@@ -10,27 +10,58 @@ Endpoints:
     POST /api/translate  - Run translation
     POST /api/format     - Format chapters for website
     POST /api/update     - Update chapters.json
-    GET  /api/status     - Get current task status
-    GET  /api/logs       - SSE stream for real-time logs
+    POST /api/render     - Pre-render static chapter pages
+    POST /api/pipeline   - Scrape → translate → format → publish, chapter by chapter
+    GET  /api/books      - Registered books (scripts/books/<slug>.json)
+    GET  /api/status     - Running and queued jobs
+    GET  /api/jobs       - Recent jobs; /api/jobs/{id}, /api/jobs/{id}/logs(/stream) per job
+    POST /api/jobs/{id}/cancel - Cancel a queued or running job
+    GET  /api/jobs/history - Past jobs from the job store (survives restarts); /api/jobs/history/{id} with stages
+    GET  /api/jobs/history/compare?ids=a,b - Compare runs (duration, throughput, per-stage timings)
+    GET  /api/logs       - Log lines after a cursor (?since=<last seen id>)
+    GET  /api/logs/stream - SSE push stream of log lines (resumes from Last-Event-ID)
+    GET  /api/logs/history - Past task logs; /api/logs/history/{task_id} pages one log file
+    GET  /api/chapters/status - Chapters per stage (?book=)
+    GET  /api/chapters/{id} - Read one chapter (formatted, or ?source=published from the archive; ?book=)
+    GET  /api/cache/stats   - Chapter cache hit/miss counters
+    GET  /api/requests/slow - Recent requests slower than SLOW_REQUEST_MS, with their phase breakdown
+    GET  /metrics           - Prometheus text format: request latency, job/stage durations,
+                              chapters processed, translation tokens/retries, page loads, cache, queue
+
+Public read API (ETag / Last-Modified, 304 on revalidation):
+    GET  /api/books/{slug}/chapters       - Chapter list (?offset=&limit=&from_id=&to_id=)
+    GET  /api/books/{slug}/chapters/{id}  - One chapter with content
+
+The fast local stages (format, update, sync, render) run in-process by default
+(script modules stay imported and warm between jobs, see stage_runner.py); set
+STAGE_EXECUTION=subprocess to start a new interpreter for them too. The scraper
+and the translator always run as a subprocess, so cancel and timeouts can kill them.
+
+Every action takes a `book` (slug, default: max-level-priest) and runs on that
+book's directories (see scripts/book_registry.py). Jobs lock per-book
+resources, so jobs of different books run side by side; only the scraper
+(one Chrome session) is shared.
 
 Run with:
     uvicorn main:app --reload --port 8000
 """
 
 import asyncio
+import signal
 import sys
 import os
+import time
 import secrets
 import hashlib
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Dict, Optional
 from contextlib import asynccontextmanager
-import queue
 
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Depends, Header
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
@@ -43,11 +74,71 @@ ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "dat4512")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "Dat4512@")
 SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_hex(32))
 TOKEN_EXPIRE_HOURS = 24
+TOKEN_SWEEP_INTERVAL = 300  # seconds between sweeps of expired tokens
+MAX_ACTIVE_TOKENS = 100     # oldest sessions are dropped beyond this
+
+# Public chapter API: how long clients/CDN may use a response before revalidating
+CHAPTER_CACHE_MAX_AGE = int(os.getenv("CHAPTER_CACHE_MAX_AGE", "300"))
+CHAPTER_PAGE_LIMIT = 200
+
+# In-memory chapter cache: byte budget, source polling interval, chapters pre-warmed after publish
+CHAPTER_CACHE_MAX_BYTES = int(os.getenv("CHAPTER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CHAPTER_WATCH_INTERVAL = float(os.getenv("CHAPTER_WATCH_INTERVAL", "2"))
+CHAPTER_PREWARM_COUNT = int(os.getenv("CHAPTER_PREWARM_COUNT", "20"))
+
+# Task logs: recent lines kept in memory, full logs of the newest tasks kept on disk
+LOG_BUFFER_LINES = int(os.getenv("LOG_BUFFER_LINES", "2000"))
+LOG_KEEP_FILES = int(os.getenv("LOG_KEEP_FILES", "50"))
+LOG_PAGE_LIMIT = 1000
+JOB_HISTORY_PAGE_LIMIT = 500
+
+# /metrics: if set, scrapers must send "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Requests slower than this are logged with their phase breakdown (0 = off)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+# Jobs that do not share a resource run concurrently, up to this many at once
+MAX_PARALLEL_JOBS = int(os.getenv("MAX_PARALLEL_JOBS", "2"))
+
+# Pipeline job: chapters translated at once, how often the scraper's progress is checked
+PIPELINE_TRANSLATE_CONCURRENCY = int(os.getenv("PIPELINE_TRANSLATE_CONCURRENCY", "3"))
+PIPELINE_POLL_INTERVAL = float(os.getenv("PIPELINE_POLL_INTERVAL", "2"))
+
+# How local stages run: "inprocess" (imported once, warm between jobs) or "subprocess" (new interpreter
+# per stage). Network stages (scrape, translate) always run as a killable subprocess.
+STAGE_EXECUTION = os.getenv("STAGE_EXECUTION", "inprocess")
+
+# Timeouts (seconds, 0 = none): whole job, stage without any output, grace between SIGTERM and SIGKILL
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", str(6 * 3600)))
+STAGE_IDLE_TIMEOUT = float(os.getenv("STAGE_IDLE_TIMEOUT", "900"))
+STAGE_STOP_GRACE = float(os.getenv("STAGE_STOP_GRACE", "10"))
 
 # Paths
 BACKEND_DIR = Path(__file__).parent
 PROJECT_DIR = BACKEND_DIR.parent
 SCRIPTS_DIR = PROJECT_DIR / "scripts"
+LOG_DIR = BACKEND_DIR / "logs"
+JOBS_DB = BACKEND_DIR / "jobs.db"
+
+# Pipeline scripts are importable as modules (shared state store, parsers...)
+sys.path.insert(0, str(SCRIPTS_DIR))
+from book_registry import DEFAULT_BOOK, Book, BookNotFoundError, list_books, load_book
+from chapter_state import ChapterState, parse_chapter_ids
+from chapter_parser import read_chapter
+from chapter_archive import payload_hash
+from chapter_store import chapter_store
+from chapter_status import ChapterStatusCache
+from chapter_cache import ChapterCache, ChapterWatcher, formatted_key, published_key
+from task_logs import TaskLogStore
+from pipeline import ChapterPipeline
+from stage_runner import CANCELLED_EXIT_CODE, can_run_in_process, run_in_process, stop_uninterrupted
+from job_store import JobStore
+from metrics import PAGE_LOAD_BUCKETS, REQUEST_BUCKETS, STAGE_BUCKETS, MetricsRegistry
+import pipeline_metrics
+from request_timing import SlowRequestLog, phase, start_request
+from jobs import (Job, JobScheduler, LogBus, JOB_RUNNING, RESOURCE_CHAPTERS, RESOURCE_PUBLISH,
+                  RESOURCE_SCRAPER, RESOURCE_TRANSLATOR, book_resource)
 
 # Token storage (in-memory, simple approach)
 active_tokens = {}
@@ -80,57 +171,140 @@ def verify_token(token: str) -> bool:
     return True
 
 
+def sweep_expired_tokens() -> int:
+    """Drop every expired token (verify_token only drops the ones presented again)."""
+    now = datetime.now()
+    expired = [token for token, expires in active_tokens.items() if expires <= now]
+    for token in expired:
+        active_tokens.pop(token, None)
+    return len(expired)
+
+
+async def sweep_tokens():
+    while True:
+        await asyncio.sleep(TOKEN_SWEEP_INTERVAL)
+        removed = sweep_expired_tokens()
+        if removed:
+            print(f"🧹 Removed {removed} expired tokens ({len(active_tokens)} active)")
+
+
 async def require_auth(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Dependency to require authentication."""
-    if not credentials:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    
-    token = credentials.credentials
-    if not verify_token(token):
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    with phase("auth"):
+        if not credentials:
+            raise HTTPException(status_code=401, detail="Authentication required")
+        
+        token = credentials.credentials
+        if not verify_token(token):
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
     
     return token
 
 
 # ============================================
-# Task Manager
+# Job Scheduler
 # ============================================
-class TaskManager:
-    def __init__(self):
-        self.current_task: Optional[str] = None
-        self.is_running: bool = False
-        self.logs: list = []
-        self.log_queue = queue.Queue()
-        self.start_time: Optional[datetime] = None
-        
-    def start_task(self, name: str):
-        self.current_task = name
-        self.is_running = True
-        self.logs = []
-        self.start_time = datetime.now()
-        self.add_log(f"🚀 Starting: {name}")
-        
-    def end_task(self, success: bool = True):
-        duration = (datetime.now() - self.start_time).total_seconds() if self.start_time else 0
-        status = "✅ Completed" if success else "❌ Failed"
-        self.add_log(f"{status} in {duration:.1f}s")
-        self.is_running = False
-        self.current_task = None
-        
-    def add_log(self, message: str):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}"
-        self.logs.append(log_entry)
-        self.log_queue.put(log_entry)
-        
-    def get_status(self):
-        return {
-            "isRunning": self.is_running,
-            "currentTask": self.current_task,
-            "logCount": len(self.logs)
-        }
+# Per-book state, created on first use: state store (job history), status report, cache watcher
+chapter_states: Dict[str, ChapterState] = {}
+chapter_status: Dict[str, ChapterStatusCache] = {}
+chapter_watchers: Dict[str, ChapterWatcher] = {}
+
+chapter_cache = ChapterCache(CHAPTER_CACHE_MAX_BYTES)
 
-task_manager = TaskManager()
+
+def book_state(slug: str) -> Optional[ChapterState]:
+    """State store of a book (counts "chapters processed" in the job history)."""
+    if slug not in chapter_states:
+        try:
+            chapter_states[slug] = ChapterState(load_book(slug).state_db)
+        except BookNotFoundError:
+            return None
+    return chapter_states[slug]
+
+
+def book_status(book: Book) -> ChapterStatusCache:
+    return chapter_status.setdefault(book.slug, ChapterStatusCache(book))
+
+
+def book_watcher(book: Book) -> ChapterWatcher:
+    return chapter_watchers.setdefault(
+        book.slug, ChapterWatcher(chapter_cache, chapter_store, book.chapters_dir, book.slug, CHAPTER_PREWARM_COUNT)
+    )
+
+
+def invalidate_status(job: Job):
+    status = chapter_status.get(job.args.get("book"))
+    if status is not None:
+        status.invalidate()
+
+
+job_store = JobStore(JOBS_DB, book_state)
+scheduler = JobScheduler(MAX_PARALLEL_JOBS, TaskLogStore(LOG_DIR, LOG_KEEP_FILES), LOG_BUFFER_LINES,
+                         default_timeout=JOB_TIMEOUT, store=job_store)
+scheduler.on_finish.append(invalidate_status)
+
+
+# ============================================
+# Metrics
+# ============================================
+metrics = MetricsRegistry("bookreading_")
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "API request latency by route", ["method", "route", "status"], REQUEST_BUCKETS)
+job_duration = metrics.histogram(
+    "job_duration_seconds", "Job run time by type and final status", ["kind", "status"], STAGE_BUCKETS)
+stage_duration = metrics.histogram(
+    "stage_duration_seconds", "Run time of one pipeline script", ["script", "result"], STAGE_BUCKETS)
+
+# Sent by the pipeline scripts through scripts/pipeline_metrics.py
+metrics.counter("chapters_processed_total", "Chapter records written per pipeline stage", ["stage"])
+metrics.counter("translation_tokens_total", "Tokens used by the translation API", ["type"])
+metrics.counter("translation_retries_total", "Translation API / segment retries by reason", ["reason"])
+metrics.histogram("scraper_page_load_seconds", "Ko-fi page load time in the scraper", ["loaded"], PAGE_LOAD_BUCKETS)
+
+metrics.gauge("jobs", "Jobs running and waiting in the queue",
+              lambda: {("running",): len(scheduler.running), ("queued",): len(scheduler.queue)}, ["state"])
+for stat, metric_name, metric_type, help_text in [
+    ("hits", "chapter_cache_hits_total", "counter", "Chapter cache hits"),
+    ("misses", "chapter_cache_misses_total", "counter", "Chapter cache misses"),
+    ("evictions", "chapter_cache_evictions_total", "counter", "Chapter cache evictions"),
+    ("bytes", "chapter_cache_bytes", "gauge", "Chapter cache size in bytes"),
+    ("hitRate", "chapter_cache_hit_ratio", "gauge", "Chapter cache hits / lookups"),
+]:
+    metrics.gauge(metric_name, help_text, lambda stat=stat: {(): chapter_cache.stats()[stat]},
+                  metric_type=metric_type)
+
+# In-process stages report directly; subprocess stages print metric lines (see emit_output)
+pipeline_metrics.set_recorder(metrics.record)
+
+
+def observe_job(job: Job):
+    if job.started_at and job.finished_at:
+        job_duration.observe((job.finished_at - job.started_at).total_seconds(), kind=job.kind, status=job.status)
+
+
+scheduler.on_finish.append(observe_job)
+
+
+def poll_chapter_sources() -> dict:
+    """Poll the sources of every registered book once (blocking, run in a thread)."""
+    result = {"formatted": 0, "published": 0, "prewarmed": 0}
+    for book in list_books():
+        for key, count in book_watcher(book).poll().items():
+            result[key] += count
+    return result
+
+
+async def watch_chapters():
+    """Poll chapter sources off the event loop; drops changed cache entries and pre-warms after publish."""
+    while True:
+        try:
+            result = await asyncio.to_thread(poll_chapter_sources)
+            if any(result.values()):
+                print(f"🔄 Chapter cache: dropped {result['formatted']} formatted / "
+                      f"{result['published']} published, pre-warmed {result['prewarmed']}")
+        except Exception as e:
+            print(f"⚠️ Chapter watcher error: {e}")
+        await asyncio.sleep(CHAPTER_WATCH_INTERVAL)
 
 
 # ============================================
@@ -140,7 +314,11 @@ task_manager = TaskManager()
 async def lifespan(app: FastAPI):
     print("🚀 Backend server started")
     print(f"🔐 Admin user: {ADMIN_USERNAME}")
+    watcher = asyncio.create_task(watch_chapters())
+    sweeper = asyncio.create_task(sweep_tokens())
     yield
+    watcher.cancel()
+    sweeper.cancel()
     print("👋 Backend server stopped")
 
 app = FastAPI(
@@ -149,6 +327,28 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+slow_requests = SlowRequestLog(SLOW_REQUEST_MS)
+
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """
+    Request latency per route template (not per raw path, to keep the series count bounded),
+    Server-Timing header with the phase breakdown, and the slow-request log.
+    """
+    started = time.perf_counter()
+    phases = start_request()
+    response = await call_next(request)
+    total = time.perf_counter() - started
+
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    http_request_duration.observe(total, method=request.method, route=route, status=response.status_code)
+    slow_requests.record(request.method, route, request.url.path, response.status_code, total, phases)
+    response.headers["Server-Timing"] = ", ".join(
+        [f"{name};dur={seconds * 1000:.1f}" for name, seconds in phases.items()] + [f"total;dur={total * 1000:.1f}"]
+    )
+    return response
+
 # CORS for frontend
 app.add_middleware(
     CORSMiddleware,
@@ -166,67 +366,207 @@ class LoginRequest(BaseModel):
     username: str
     password: str
 
-class ScrapeRequest(BaseModel):
+class BookRequest(BaseModel):
+    book: str = DEFAULT_BOOK          # Slug of scripts/books/<slug>.json
+
+class ScrapeRequest(BookRequest):
     start_url: Optional[str] = None
     count: Optional[int] = 10
 
-class TranslateRequest(BaseModel):
+class TranslateRequest(BookRequest):
     force: bool = False
 
-class FormatRequest(BaseModel):
+class FormatRequest(BookRequest):
     pass
 
-class UpdateRequest(BaseModel):
+class UpdateRequest(BookRequest):
     force: bool = False
 
+class PipelineRequest(BookRequest):
+    start_url: Optional[str] = None   # Scrape from here and process what gets scraped
+    count: Optional[int] = 10
+    chapters: Optional[str] = None    # And/or process these chapters, e.g. "278,280-282"
+
 
 # ============================================
 # Helper Functions
 # ============================================
-async def run_script(script_name: str, args: list = None):
-    """Run a Python script and stream output to logs."""
-    script_path = SCRIPTS_DIR / script_name
-    
-    if not script_path.exists():
-        task_manager.add_log(f"❌ Script not found: {script_name}")
-        return False
-    
-    cmd = [sys.executable, str(script_path)]
-    if args:
-        cmd.extend(args)
-    
-    task_manager.add_log(f"📂 Running: {script_name}")
+def signal_process_group(process, sig: int):
+    """Send a signal to the process and everything it started (Chrome, workers...)."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, sig)
+        else:
+            process.send_signal(sig)
+    except ProcessLookupError:
+        pass
+
+
+def emit_output(job: Job, prefix: str, line: str):
+    """Log one line of stage output; metric lines (scripts/pipeline_metrics.py) are recorded instead."""
+    metric = pipeline_metrics.parse_metric_line(line)
+    if metric is not None:
+        metrics.record(*metric)
+    else:
+        job.add_log(f"{prefix}{line}")
+
+
+async def stop_process(job: Job, process, prefix: str):
+    """SIGTERM the process group, SIGKILL it if it is still alive after STAGE_STOP_GRACE."""
+    if process.returncode is not None:
+        return
+    signal_process_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), STAGE_STOP_GRACE)
+    except asyncio.TimeoutError:
+        job.add_log(f"{prefix}⚠️ Still running after {STAGE_STOP_GRACE:.0f}s, killing")
+        signal_process_group(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+        await process.wait()
+
+
+async def run_subprocess(job: Job, cmd: list, prefix: str) -> int:
+    """
+    Run a command in a new interpreter, streaming stdout/stderr to the job's log.
+    The process gets its own process group so it can be stopped with its children
+    (on cancel, job timeout, or no output for STAGE_IDLE_TIMEOUT).
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        cwd=str(SCRIPTS_DIR),
+        env={**os.environ, pipeline_metrics.METRICS_ENV: "1"},
+        start_new_session=True
+    )
     
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-            cwd=str(SCRIPTS_DIR)
-        )
-        
         while True:
-            line = await process.stdout.readline()
+            try:
+                line = await asyncio.wait_for(process.stdout.readline(), STAGE_IDLE_TIMEOUT or None)
+            except asyncio.TimeoutError:
+                job.add_log(f"{prefix}⏱️ No output for {STAGE_IDLE_TIMEOUT:.0f}s, stopping")
+                await stop_uninterrupted(stop_process(job, process, prefix))
+                return CANCELLED_EXIT_CODE
             if not line:
                 break
             decoded = line.decode('utf-8', errors='replace').rstrip()
             if decoded:
-                task_manager.add_log(decoded)
+                emit_output(job, prefix, decoded)
         
-        await process.wait()
+        return await process.wait()
+    except asyncio.CancelledError:
+        await stop_uninterrupted(stop_process(job, process, prefix))
+        raise
+
+
+async def run_script(job: Job, script_name: str, args: list = None, prefix: str = ""):
+    """
+    Run a pipeline script and stream its output to the job's log (each line prefixed with `prefix`).
+    In-process (warm modules, worker thread) when STAGE_EXECUTION=inprocess and the script is a local
+    stage (see stage_runner.IN_PROCESS_STAGES), otherwise in a subprocess.
+    """
+    script_path = SCRIPTS_DIR / script_name
+    
+    if not script_path.exists():
+        job.add_log(f"{prefix}❌ Script not found: {script_name}")
+        return False
+    
+    job.add_log(f"{prefix}📂 Running: {script_name}")
+    started_at = datetime.now()
+    
+    try:
+        if STAGE_EXECUTION == "inprocess" and await asyncio.to_thread(can_run_in_process, script_name):
+            returncode = await run_in_process(script_name, args, lambda line: job.add_log(f"{prefix}{line}"),
+                                              idle_timeout=STAGE_IDLE_TIMEOUT, grace=STAGE_STOP_GRACE)
+        else:
+            returncode = await run_subprocess(job, [sys.executable, str(script_path), *(args or [])], prefix)
+        duration = (datetime.now() - started_at).total_seconds()
+        job.record_stage(script_name, prefix.strip(), started_at, duration, returncode)
+        stage_duration.observe(duration, script=script_name, result="ok" if returncode == 0 else "failed")
         
-        if process.returncode == 0:
-            task_manager.add_log(f"✅ {script_name} completed successfully")
+        if returncode == 0:
+            job.add_log(f"{prefix}✅ {script_name} completed successfully")
             return True
         else:
-            task_manager.add_log(f"❌ {script_name} failed with code {process.returncode}")
+            job.add_log(f"{prefix}❌ {script_name} failed with code {returncode}")
             return False
             
     except Exception as e:
-        task_manager.add_log(f"❌ Error running {script_name}: {str(e)}")
+        job.add_log(f"{prefix}❌ Error running {script_name}: {str(e)}")
         return False
 
 
+def get_book_or_404(slug: str) -> Book:
+    try:
+        return load_book(slug)
+    except BookNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Book '{slug}' not found")
+
+
+def job_response(label: str, job: Job) -> dict:
+    """Response of a job submission: running right away, or queued behind a busy resource."""
+    state = "started" if job.status == JOB_RUNNING else "queued"
+    return {"message": f"{label} {state}", "status": job.status, "jobId": job.id}
+
+
+def authorize_stream(authorization: Optional[str], token: Optional[str]):
+    """Auth for SSE endpoints: Authorization header, or ?token= (EventSource cannot send headers)."""
+    with phase("auth"):
+        if authorization:
+            token = authorization.replace("Bearer ", "")
+        if not token:
+            raise HTTPException(status_code=401, detail="Authentication required")
+        if not verify_token(token):
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+
+def stream_log_bus(request: Request, bus: LogBus, is_active: Callable[[], bool],
+                   since: Optional[int]) -> EventSourceResponse:
+    """
+    SSE push stream of a log bus. Each line carries its id, so a reconnecting
+    EventSource resumes after Last-Event-ID and only receives new lines.
+    Ends with a `done` event once nothing is active anymore.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def event_generator():
+        cursor = since
+        last_status = None
+        while True:
+            # Grab the wake-up event before reading so no line can slip in between
+            changed = bus.changed
+            for log_id, line in bus.since(cursor):
+                yield {"event": "log", "id": str(log_id), "data": line}
+                cursor = log_id
+
+            status = is_active()
+            if status != last_status:
+                yield {"event": "status", "data": str(status)}
+                last_status = status
+            if not status:
+                yield {"event": "done", "data": "Task completed"}
+                break
+
+            try:
+                await asyncio.wait_for(changed.wait(), 15)
+            except asyncio.TimeoutError:
+                pass
+
+    return EventSourceResponse(event_generator())
+
+
+def log_page(bus: LogBus, since: Optional[int], is_active: bool) -> dict:
+    """Lines of a log bus after a cursor plus the cursor for the next call."""
+    entries = bus.since(since)
+    return {
+        "logs": [line for _, line in entries],
+        "cursor": entries[-1][0] if entries else (since if since is not None else bus.last_id),
+        "isRunning": is_active
+    }
+
+
 # ============================================
 # Authentication Endpoints
 # ============================================
@@ -240,6 +580,8 @@ async def login(request: LoginRequest):
     token = create_token()
     expires = datetime.now() + timedelta(hours=TOKEN_EXPIRE_HOURS)
     active_tokens[token] = expires
+    while len(active_tokens) > MAX_ACTIVE_TOKENS:
+        del active_tokens[min(active_tokens, key=active_tokens.get)]
     
     return {
         "token": token,
@@ -267,147 +609,450 @@ async def verify(token: str = Depends(require_auth)):
 # ============================================
 @app.get("/api/status")
 async def get_status(token: str = Depends(require_auth)):
-    """Get current task status."""
-    return task_manager.get_status()
+    """Aggregate status: running and queued jobs."""
+    return scheduler.get_status()
 
 
 @app.get("/api/logs")
-async def get_logs(token: str = Depends(require_auth)):
-    """Get all logs."""
-    return {"logs": task_manager.logs}
+async def get_logs(since: Optional[int] = Query(None, ge=0), token: str = Depends(require_auth)):
+    """
+    Log lines of all jobs after a cursor (the last id the client has seen).
+    Without `since`, all lines since the scheduler was last idle. Pass back `cursor` on the next call.
+    """
+    return log_page(scheduler.logs, since, scheduler.is_running)
+
+
+@app.get("/api/logs/history")
+async def list_log_history(token: str = Depends(require_auth)):
+    """Job log files kept on disk, newest first."""
+    return {"tasks": await asyncio.to_thread(scheduler.log_store.list_tasks)}
+
+
+@app.get("/api/logs/history/{task_id}")
+async def get_log_history(
+    task_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(200, ge=1, le=LOG_PAGE_LIMIT),
+    token: str = Depends(require_auth),
+):
+    """One page of a job's full log (including lines no longer held in memory)."""
+    page = await asyncio.to_thread(scheduler.log_store.read, task_id, offset, limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail=f"Task log '{task_id}' not found")
+    return page
 
 
 @app.get("/api/logs/stream")
-async def stream_logs(authorization: str = Header(None)):
-    """SSE endpoint for real-time log streaming."""
-    # Manual auth check for SSE (can't use Depends easily)
-    if authorization:
-        token = authorization.replace("Bearer ", "")
-        if not verify_token(token):
-            raise HTTPException(status_code=401, detail="Invalid token")
-    else:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    
-    async def event_generator():
-        last_index = 0
-        while True:
-            current_logs = task_manager.logs
-            if len(current_logs) > last_index:
-                for log in current_logs[last_index:]:
-                    yield {"event": "log", "data": log}
-                last_index = len(current_logs)
-            
-            yield {"event": "status", "data": str(task_manager.is_running)}
-            
-            if not task_manager.is_running and last_index > 0:
-                yield {"event": "done", "data": "Task completed"}
-                break
-                
-            await asyncio.sleep(0.5)
-    
-    return EventSourceResponse(event_generator())
+async def stream_logs(
+    request: Request,
+    authorization: str = Header(None),
+    token: Optional[str] = None,
+    since: Optional[int] = Query(None, ge=0),
+):
+    """SSE push stream of all jobs' log lines (resumes from Last-Event-ID)."""
+    authorize_stream(authorization, token)
+    return stream_log_bus(request, scheduler.logs, lambda: scheduler.is_running, since)
+
+
+def get_job_or_404(job_id: str) -> Job:
+    job = scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+
+@app.get("/api/jobs")
+async def list_jobs(token: str = Depends(require_auth)):
+    """Recent jobs (running, queued and finished), newest first."""
+    return {"jobs": scheduler.list_jobs()}
+
+
+# History routes are declared before /api/jobs/{job_id} so "history" is not taken for a job id
+@app.get("/api/jobs/history")
+async def list_job_history(
+    kind: Optional[str] = None,
+    status: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=JOB_HISTORY_PAGE_LIMIT),
+    token: str = Depends(require_auth),
+):
+    """Past jobs (newest first), optionally filtered by type and status."""
+    with phase("db"):
+        jobs = await asyncio.to_thread(job_store.list_jobs, kind, status, offset, limit)
+    return {"jobs": jobs, "offset": offset, "limit": limit}
+
+
+@app.get("/api/jobs/history/compare")
+async def compare_job_history(ids: str, token: str = Depends(require_auth)):
+    """Compare runs side by side; the first id is the baseline for the % changes."""
+    job_ids = [job_id.strip() for job_id in ids.split(",") if job_id.strip()]
+    if len(job_ids) < 2:
+        raise HTTPException(status_code=400, detail="At least two job ids are required")
+    with phase("db"):
+        return await asyncio.to_thread(job_store.compare, job_ids)
+
+
+@app.get("/api/jobs/history/{job_id}")
+async def get_job_history(job_id: str, token: str = Depends(require_auth)):
+    """One past job with its stage timings."""
+    with phase("db"):
+        job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, token: str = Depends(require_auth)):
+    """Status of one job."""
+    return get_job_or_404(job_id).to_dict()
+
+
+@app.get("/api/jobs/{job_id}/logs")
+async def get_job_logs(job_id: str, since: Optional[int] = Query(None, ge=0), token: str = Depends(require_auth)):
+    """Log lines of one job after a cursor."""
+    job = get_job_or_404(job_id)
+    return log_page(job.logs, since, job.is_active)
+
+
+@app.get("/api/jobs/{job_id}/logs/stream")
+async def stream_job_logs(
+    job_id: str,
+    request: Request,
+    authorization: str = Header(None),
+    token: Optional[str] = None,
+    since: Optional[int] = Query(None, ge=0),
+):
+    """SSE push stream of one job's log lines."""
+    authorize_stream(authorization, token)
+    job = get_job_or_404(job_id)
+    return stream_log_bus(request, job.logs, lambda: job.is_active, since)
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, token: str = Depends(require_auth)):
+    """
+    Cancel a queued or running job. Running stages are stopped (SIGTERM, then
+    SIGKILL after a grace period); chapters they already saved are kept.
+    """
+    job = get_job_or_404(job_id)
+    if not job.is_active:
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' already {job.status}")
+    scheduler.cancel(job_id)
+    return {"message": f"{job.name} cancelling", "status": job.status, "jobId": job.id}
 
 
 @app.post("/api/scrape")
-async def run_scrape(request: ScrapeRequest, background_tasks: BackgroundTasks, token: str = Depends(require_auth)):
+async def run_scrape(request: ScrapeRequest, token: str = Depends(require_auth)):
     """Run chapter scraper."""
-    if task_manager.is_running:
-        raise HTTPException(status_code=409, detail="Another task is already running")
-    
-    async def scrape_task():
-        task_manager.start_task("Chapter Scraping")
-        args = []
+    book = get_book_or_404(request.book)
+
+    async def scrape_task(job: Job):
+        args = ["--book", book.slug]
         if request.start_url:
             args.extend(["--url", request.start_url])
         if request.count:
             args.extend(["--count", str(request.count)])
         
-        success = await run_script("auto_scrape.py", args if args else None)
-        task_manager.end_task(success)
+        return await run_script(job, "auto_scrape.py", args)
     
-    background_tasks.add_task(scrape_task)
-    return {"message": "Scraping started", "status": "running"}
+    # One Chrome session for all books: scrapes of different books still run one at a time
+    job = scheduler.submit(f"Chapter Scraping ({book.slug})", [RESOURCE_SCRAPER], scrape_task, kind="scrape",
+                           args={"book": book.slug, "start_url": request.start_url, "count": request.count})
+    return job_response("Scraping", job)
 
 
 @app.post("/api/translate")
-async def run_translate(request: TranslateRequest, background_tasks: BackgroundTasks, token: str = Depends(require_auth)):
+async def run_translate(request: TranslateRequest, token: str = Depends(require_auth)):
     """Run translation script."""
-    if task_manager.is_running:
-        raise HTTPException(status_code=409, detail="Another task is already running")
-    
-    async def translate_task():
-        task_manager.start_task("Chapter Translation")
+    book = get_book_or_404(request.book)
+
+    async def translate_task(job: Job):
         args = ["--translate"] if not request.force else ["--translate", "--force"]
-        success = await run_script("translate_chapters.py", args)
-        task_manager.end_task(success)
+        return await run_script(job, "translate_chapters.py", [*args, "--book", book.slug])
     
-    background_tasks.add_task(translate_task)
-    return {"message": "Translation started", "status": "running"}
+    job = scheduler.submit(f"Chapter Translation ({book.slug})", [book_resource(RESOURCE_TRANSLATOR, book.slug)],
+                           translate_task, kind="translate", args={"book": book.slug, "force": request.force})
+    return job_response("Translation", job)
 
 
 @app.post("/api/format")
-async def run_format(background_tasks: BackgroundTasks, token: str = Depends(require_auth)):
+async def run_format(request: FormatRequest = FormatRequest(), token: str = Depends(require_auth)):
     """Run format script."""
-    if task_manager.is_running:
-        raise HTTPException(status_code=409, detail="Another task is already running")
-    
-    async def format_task():
-        task_manager.start_task("Format Chapters")
-        success = await run_script("format_for_website.py")
-        task_manager.end_task(success)
+    book = get_book_or_404(request.book)
+
+    async def format_task(job: Job):
+        return await run_script(job, "format_for_website.py", ["--book", book.slug])
     
-    background_tasks.add_task(format_task)
-    return {"message": "Formatting started", "status": "running"}
+    job = scheduler.submit(f"Format Chapters ({book.slug})", [book_resource(RESOURCE_CHAPTERS, book.slug)],
+                           format_task, kind="format", args={"book": book.slug})
+    return job_response("Formatting", job)
 
 
 @app.post("/api/update")
-async def run_update(request: UpdateRequest, background_tasks: BackgroundTasks, token: str = Depends(require_auth)):
+async def run_update(request: UpdateRequest, token: str = Depends(require_auth)):
     """Run update chapters.json script."""
-    if task_manager.is_running:
-        raise HTTPException(status_code=409, detail="Another task is already running")
-    
-    async def update_task():
-        task_manager.start_task("Update Website Data")
+    book = get_book_or_404(request.book)
+
+    async def update_task(job: Job):
         args = ["--force"] if request.force else []
-        success = await run_script("update_chapters_json.py", args if args else None)
-        task_manager.end_task(success)
+        success = await run_script(job, "update_chapters_json.py", [*args, "--book", book.slug])
+        if success:
+            # Serve the new chapters from memory right away instead of on the next poll
+            result = await asyncio.to_thread(book_watcher(book).poll)
+            job.add_log(f"🔥 Pre-warmed {result['prewarmed']} chapters")
+        return success
     
-    background_tasks.add_task(update_task)
-    return {"message": "Update started", "status": "running"}
+    # Reads Chapters/ (no format may rewrite it meanwhile) and writes the published data
+    resources = [book_resource(RESOURCE_CHAPTERS, book.slug), book_resource(RESOURCE_PUBLISH, book.slug)]
+    job = scheduler.submit(f"Update Website Data ({book.slug})", resources, update_task,
+                           kind="update", args={"book": book.slug, "force": request.force})
+    return job_response("Update", job)
 
 
 @app.post("/api/sync_js")
-async def run_sync_js(background_tasks: BackgroundTasks, token: str = Depends(require_auth)):
+async def run_sync_js(request: BookRequest = BookRequest(), token: str = Depends(require_auth)):
     """Sync chapters.json to chapters.js."""
-    if task_manager.is_running:
-        raise HTTPException(status_code=409, detail="Another task is already running")
+    book = get_book_or_404(request.book)
+
+    async def sync_js_task(job: Job):
+        return await run_script(job, "sync_chapters_js.py", ["--book", book.slug])
     
-    async def sync_js_task():
-        task_manager.start_task("Sync chapters.js")
-        success = await run_script("sync_chapters_js.py")
-        task_manager.end_task(success)
+    job = scheduler.submit(f"Sync chapters.js ({book.slug})", [book_resource(RESOURCE_PUBLISH, book.slug)],
+                           sync_js_task, kind="sync_js", args={"book": book.slug})
+    return job_response("Sync", job)
+
+
+@app.post("/api/render")
+async def run_render(request: BookRequest = BookRequest(), token: str = Depends(require_auth)):
+    """Pre-render one static HTML page per chapter."""
+    book = get_book_or_404(request.book)
+
+    async def render_task(job: Job):
+        return await run_script(job, "render_static.py", ["--book", book.slug])
     
-    background_tasks.add_task(sync_js_task)
-    return {"message": "Sync started", "status": "running"}
+    job = scheduler.submit(f"Render Static Pages ({book.slug})", [book_resource(RESOURCE_PUBLISH, book.slug)],
+                           render_task, kind="render", args={"book": book.slug})
+    return job_response("Render", job)
+
+
+@app.post("/api/pipeline")
+async def run_pipeline(request: PipelineRequest, token: str = Depends(require_auth)):
+    """
+    Scrape → translate → format → update → sync → render as one job. Each chapter
+    advances as soon as it is ready; publishing is serialized and batched.
+    """
+    book = get_book_or_404(request.book)
+    try:
+        chapter_ids = parse_chapter_ids(request.chapters) if request.chapters else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid chapters: {e}")
+    if not request.start_url and not chapter_ids:
+        raise HTTPException(status_code=400, detail="start_url or chapters is required")
+
+    scrape_args = None
+    if request.start_url:
+        scrape_args = ["--url", request.start_url, "--yes"]
+        if request.count:
+            scrape_args.extend(["--count", str(request.count)])
+
+    async def prewarm():
+        await asyncio.to_thread(book_watcher(book).poll)
+
+    async def pipeline_task(job: Job):
+        pipeline = ChapterPipeline(job, run_script, book, PIPELINE_TRANSLATE_CONCURRENCY,
+                                   PIPELINE_POLL_INTERVAL, on_publish=prewarm)
+        return await pipeline.run(chapter_ids, scrape_args)
+
+    resources = [book_resource(resource, book.slug)
+                 for resource in (RESOURCE_TRANSLATOR, RESOURCE_CHAPTERS, RESOURCE_PUBLISH)]
+    if scrape_args:
+        resources.append(RESOURCE_SCRAPER)
+    job = scheduler.submit(f"Pipeline ({book.slug})", resources, pipeline_task, kind="pipeline",
+                           args={"book": book.slug, "start_url": request.start_url, "count": request.count,
+                                 "chapters": request.chapters})
+    return job_response("Pipeline", job)
+
+
+@app.get("/api/books")
+async def get_books(token: str = Depends(require_auth)):
+    """Registered books, for the admin book selector."""
+    books = await asyncio.to_thread(list_books)
+    return {"books": [book.to_dict() for book in books], "default": DEFAULT_BOOK}
 
 
 @app.get("/api/chapters/status")
-async def get_chapters_status(token: str = Depends(require_auth)):
-    """Get status of chapters in each stage."""
-    untranslated_dir = SCRIPTS_DIR / "Chapters_Untranslated"
-    translated_dir = SCRIPTS_DIR / "Chapters_Translated"
-    chapters_dir = PROJECT_DIR / "Chapters"
-    
-    def count_files(dir_path: Path) -> int:
-        if dir_path.exists():
-            return len(list(dir_path.glob("*.txt")))
-        return 0
-    
-    return {
-        "untranslated": count_files(untranslated_dir),
-        "translated": count_files(translated_dir),
-        "formatted": count_files(chapters_dir)
+async def get_chapters_status(book: str = DEFAULT_BOOK, token: str = Depends(require_auth)):
+    """
+    Chapters of a book in each stage, with id ranges, gaps, stale and pending chapters.
+    Served from memory until the book's state store changes (see chapter_status.py).
+    """
+    cache = book_status(get_book_or_404(book))
+    status = cache.current()
+    if status is None:
+        with phase("db"):
+            status = await asyncio.to_thread(cache.refresh)
+    return status
+
+
+async def read_cached(key: tuple, reader, chapter_id: int) -> Optional[dict]:
+    """Chapter from the in-memory cache; on a miss read it in a thread and cache it."""
+    with phase("cache"):
+        chapter = chapter_cache.get(key)
+    if chapter is None:
+        with phase("read"):
+            chapter = await asyncio.to_thread(reader, chapter_id)
+        if chapter is not None:
+            with phase("cache"):
+                chapter_cache.put(key, chapter)
+    return chapter
+
+
+async def read_published_chapter(slug: str, chapter_id: int) -> Optional[dict]:
+    """Read a published chapter of a book (archive or chapters.json, cached)."""
+    with phase("snapshot"):
+        snapshot = await asyncio.to_thread(chapter_store.get, slug)
+    if snapshot is None or chapter_id not in snapshot.etags:
+        return None
+    return await read_cached(published_key(slug, chapter_id, snapshot.etags[chapter_id]),
+                             snapshot.read, chapter_id)
+
+
+@app.get("/api/chapters/{chapter_id}")
+async def get_chapter(chapter_id: int, source: str = "formatted", book: str = DEFAULT_BOOK,
+                      token: str = Depends(require_auth)):
+    """
+    Read a single chapter of a book.
+    source=formatted: from the book's Chapters/ (memory-mapped, only that chapter is decoded)
+    source=published: from the book's published chapter archive
+    """
+    if source not in ("formatted", "published"):
+        raise HTTPException(status_code=400, detail="source must be 'formatted' or 'published'")
+    book = get_book_or_404(book)
+    if source == "published":
+        chapter = await read_published_chapter(book.slug, chapter_id)
+    else:
+        chapter = await read_cached(formatted_key(book.slug, chapter_id),
+                                    lambda chapter_id: read_chapter(chapter_id, book.chapters_dir), chapter_id)
+    if chapter is None:
+        raise HTTPException(status_code=404, detail=f"Chapter {chapter_id} not found")
+    return chapter
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats(token: str = Depends(require_auth)):
+    """In-memory chapter cache size and hit/miss counters."""
+    return chapter_cache.stats()
+
+
+@app.get("/api/requests/slow")
+async def get_slow_requests(token: str = Depends(require_auth)):
+    """Recent requests slower than SLOW_REQUEST_MS (newest first) with their phase breakdown."""
+    return {"thresholdMs": slow_requests.threshold_ms, "requests": slow_requests.recent()}
+
+
+# ============================================
+# Public Chapter API
+# ============================================
+def is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """Check If-None-Match (preferred) or If-Modified-Since against the current version."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+
+def cached_json(request: Request, content: dict, etag_value: str, last_modified: float) -> Response:
+    """JSON response with validators, or an empty 304 if the client copy is current."""
+    etag = f'"{etag_value}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={CHAPTER_CACHE_MAX_AGE}",
     }
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    with phase("serialize"):
+        return JSONResponse(content=content, headers=headers)
+
+
+async def get_book_snapshot(slug: str):
+    """Current in-memory snapshot of a book, 404 if unknown or unpublished."""
+    if not chapter_store.book_exists(slug):
+        raise HTTPException(status_code=404, detail=f"Book '{slug}' not found")
+    with phase("snapshot"):
+        snapshot = await asyncio.to_thread(chapter_store.get, slug)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"Book '{slug}' has no published chapters")
+    return snapshot
+
+
+@app.get("/api/books/{slug}/chapters")
+async def list_book_chapters(
+    slug: str,
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=CHAPTER_PAGE_LIMIT),
+    from_id: Optional[int] = None,
+    to_id: Optional[int] = None,
+):
+    """Paginated chapter list (summaries without content), optionally limited to an id range."""
+    snapshot = await get_book_snapshot(slug)
+    ids = snapshot.id_range(from_id, to_id)
+    page = ids[offset:offset + limit]
+
+    # The page changes only if one of its chapters or the filtered total changes
+    version = "|".join(snapshot.etags[chapter_id] for chapter_id in page)
+    etag_value = payload_hash(f"{len(ids)}|{offset}|{limit}|{version}".encode("utf-8"))
+
+    return cached_json(request, {
+        "book": slug,
+        "bookTitle": snapshot.meta.get("bookTitle"),
+        "bookTitleVi": snapshot.meta.get("bookTitleVi"),
+        "total": len(ids),
+        "offset": offset,
+        "limit": limit,
+        "chapters": [snapshot.summaries[chapter_id] for chapter_id in page],
+    }, etag_value, snapshot.last_modified)
+
+
+@app.get("/api/books/{slug}/chapters/{chapter_id}")
+async def get_book_chapter(slug: str, chapter_id: int, request: Request):
+    """One published chapter with content; revalidates with 304 when unchanged."""
+    snapshot = await get_book_snapshot(slug)
+    if chapter_id not in snapshot.etags:
+        raise HTTPException(status_code=404, detail=f"Chapter {chapter_id} not found")
+
+    # The body carries prev/next too: publishing a new chapter must change the former last chapter's ETag.
+    # Last-Modified is the snapshot's, which also moves on every publish.
+    payload_etag = snapshot.etags[chapter_id]
+    prev_id, next_id = snapshot.neighbours(chapter_id)
+    etag_value = payload_hash(f"{payload_etag}|{prev_id}|{next_id}".encode("utf-8"))
+    if is_not_modified(request, f'"{etag_value}"', snapshot.last_modified):
+        return cached_json(request, {}, etag_value, snapshot.last_modified)
+
+    chapter = await read_cached(published_key(slug, chapter_id, payload_etag), snapshot.read, chapter_id)
+    if chapter is None:
+        raise HTTPException(status_code=404, detail=f"Chapter {chapter_id} not found")
+    return cached_json(request, {**chapter, "prev": prev_id, "next": next_id},
+                       etag_value, snapshot.last_modified)
+
+
+@app.get("/metrics")
+async def get_metrics(authorization: str = Header(None)):
+    """Prometheus scrape endpoint (text exposition format)."""
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # Health check (public)
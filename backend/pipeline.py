@@ -0,0 +1,172 @@
+"""
+Pipeline - scrape → translate → format → publish as one job, chapter by chapter
+==============================================================================
+Runs the pipeline as a DAG over the chapters it is given or that the scraper
+saves while it runs (detected through the chapter state store). Each chapter
+moves to the next stage as soon as its previous stage is done:
+
+    scrape ──► ch278: translate ──► format ──┐
+           ──► ch279: translate ──► format ──┼──► publish (update + sync_js + render)
+           ──► ch280: translate ──► format ──┘
+
+Translations run up to `translate_concurrency` chapters at once. Publishing is
+serialized and coalesced: chapters that finish formatting while a publish is
+running are published together in the next round, so chapter 278 can be live
+while 279 is still translating.
+
+Cancelling the run (job cancelled or timed out) cancels every chapter flow,
+the scraper and the publisher; chapters already published stay live.
+
+A run belongs to one book: every script gets `--book <slug>`, so runs of
+different books use separate directories and can run side by side.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from book_registry import Book
+from chapter_state import STAGE_SCRAPED, ChapterState
+
+# Scripts of one publish round, in order
+PUBLISH_SCRIPTS = ["update_chapters_json.py", "sync_chapters_js.py", "render_static.py"]
+
+RunScript = Callable[..., Awaitable[bool]]
+
+
+def scraped_hashes(state: ChapterState) -> Dict[int, str]:
+    """Content hash of every scraped chapter in a book's state store (blocking, run in a thread)."""
+    return {chapter_id: entry["content_hash"] for chapter_id, entry in state.chapters(STAGE_SCRAPED).items()}
+
+
+def format_ids(chapter_ids: Iterable[int]) -> str:
+    return ",".join(str(chapter_id) for chapter_id in sorted(chapter_ids))
+
+
+class ChapterPipeline:
+    """One pipeline run inside a job (logs go to the job)."""
+
+    def __init__(self, job, run_script: RunScript, book: Book, translate_concurrency: int, poll_interval: float,
+                 on_publish: Optional[Callable[[], Awaitable[None]]] = None):
+        self.job = job
+        self.run_script = run_script
+        self.book = book
+        self.translate_slots = asyncio.Semaphore(max(1, translate_concurrency))
+        self.poll_interval = poll_interval
+        self.on_publish = on_publish
+        self.publish_queue: asyncio.Queue = asyncio.Queue()
+        self.chapter_tasks: Dict[int, asyncio.Task] = {}
+        self.published: List[int] = []
+        self.scrape_task: Optional[asyncio.Task] = None
+
+    def book_args(self, args: Optional[List[str]] = None) -> List[str]:
+        return [*(args or []), "--book", self.book.slug]
+
+    def feed(self, chapter_ids: Iterable[int]):
+        """Start the per-chapter flow for chapters not seen yet in this run."""
+        for chapter_id in sorted(chapter_ids):
+            if chapter_id not in self.chapter_tasks:
+                self.job.add_log(f"📥 ch{chapter_id}: queued for translation")
+                self.chapter_tasks[chapter_id] = asyncio.create_task(self.process_chapter(chapter_id))
+
+    async def process_chapter(self, chapter_id: int) -> bool:
+        """translate → format one chapter, then hand it to the publisher."""
+        prefix = f"[ch{chapter_id}] "
+        args = self.book_args(["--chapters", str(chapter_id)])
+        async with self.translate_slots:
+            if not await self.run_script(self.job, "translate_chapters.py", args, prefix=prefix):
+                self.job.add_log(f"❌ ch{chapter_id}: translation failed, not published")
+                return False
+        if not await self.run_script(self.job, "format_for_website.py", args, prefix=prefix):
+            self.job.add_log(f"❌ ch{chapter_id}: format failed, not published")
+            return False
+        await self.publish_queue.put(chapter_id)
+        return True
+
+    async def publisher(self) -> bool:
+        """Publish formatted chapters one round at a time, batching whatever is ready."""
+        success = True
+        finished = False
+        while not finished:
+            batch = [await self.publish_queue.get()]
+            while not self.publish_queue.empty():
+                batch.append(self.publish_queue.get_nowait())
+            if None in batch:
+                finished = True
+                batch = [chapter_id for chapter_id in batch if chapter_id is not None]
+            if not batch:
+                continue
+
+            ids = format_ids(batch)
+            self.job.add_log(f"📤 Publishing chapters {ids}")
+            ok = True
+            for script in PUBLISH_SCRIPTS:
+                args = self.book_args(["--chapters", ids] if script == "update_chapters_json.py" else None)
+                if not await self.run_script(self.job, script, args, prefix="[publish] "):
+                    ok = False
+                    break
+            if ok:
+                self.published.extend(batch)
+                self.job.add_log(f"🌐 Live: chapters {ids}")
+                if self.on_publish:
+                    await self.on_publish()
+            success = success and ok
+        return success
+
+    async def scrape(self, scrape_args: List[str]) -> bool:
+        """Run the scraper, feeding chapters into the pipeline as soon as they are saved."""
+        # Opened once per run: every poll is then a single query, not a new connection + schema check
+        state = await asyncio.to_thread(self.book.open_state)
+        baseline = await asyncio.to_thread(scraped_hashes, state)
+        self.scrape_task = asyncio.create_task(
+            self.run_script(self.job, "auto_scrape.py", self.book_args(scrape_args), prefix="[scrape] ")
+        )
+        while True:
+            await asyncio.wait({self.scrape_task}, timeout=self.poll_interval)
+            current = await asyncio.to_thread(scraped_hashes, state)
+            self.feed(chapter_id for chapter_id, content_hash in current.items()
+                      if baseline.get(chapter_id) != content_hash)
+            if self.scrape_task.done():
+                return self.scrape_task.result()
+
+    async def run(self, chapter_ids: Optional[List[int]] = None, scrape_args: Optional[List[str]] = None) -> bool:
+        """
+        Run the pipeline.
+
+        Args:
+            chapter_ids: Chapters to push through translate → publish
+            scrape_args: auto_scrape.py arguments; newly scraped chapters are added as they arrive
+
+        Returns:
+            True if every stage of every chapter succeeded
+        """
+        publisher = asyncio.create_task(self.publisher())
+        try:
+            scraped_ok = True
+            if scrape_args is not None:
+                scraped_ok = await self.scrape(scrape_args)
+            if chapter_ids:
+                self.feed(chapter_ids)
+            if not self.chapter_tasks:
+                self.job.add_log("✨ No new chapters to process")
+
+            results = await asyncio.gather(*self.chapter_tasks.values())
+            await self.publish_queue.put(None)
+            published_ok = await publisher
+        except asyncio.CancelledError:
+            await self.cancel(publisher)
+            raise
+
+        failed = [chapter_id for chapter_id, ok in zip(self.chapter_tasks, results) if not ok]
+        self.job.add_log(f"📊 Pipeline: {len(self.published)} published"
+                         + (f", failed: {format_ids(failed)}" if failed else ""))
+        return scraped_ok and not failed and published_ok
+
+    async def cancel(self, publisher: asyncio.Task):
+        """Stop the scraper, every chapter flow and the publisher, and wait until their stages are stopped."""
+        tasks = [task for task in [self.scrape_task, publisher, *self.chapter_tasks.values()]
+                 if task is not None and not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.published:
+            self.job.add_log(f"🛑 Pipeline cancelled, already live: {format_ids(self.published)}")
@@ -0,0 +1,227 @@
+"""
+Stage Runner - Run pipeline scripts inside the backend process
+==============================================================
+Instead of starting a new interpreter per stage, the script modules of the
+fast local stages (format, update, sync, render) are imported once and their
+`main(argv)` is called in a worker thread. Imports, the memory-mapped chapter
+index and the chapter archive stay warm between jobs. Network stages (scraper,
+translator) are not registered here and always run as a subprocess: they can
+wait on a remote call for minutes, and only a process can be killed.
+
+Output is captured per job: sys.stdout/sys.stderr are replaced by a stream
+that routes writes to the sink stored in a context variable. The context is
+copied into asyncio tasks and `to_thread` calls made by the script, so every
+print of a stage ends up in its job's log, like subprocess stdout did, and
+concurrent stages never mix their output.
+
+A thread cannot be killed, so cancellation is cooperative: once a stage is
+cancelled (job cancelled, timed out, or silent for longer than the idle
+timeout) its next write to stdout/stderr raises StageCancelled. Stages print
+after every chapter, so they stop between chapters and keep what they saved.
+The stage is awaited until its thread has exited, so the job keeps its
+resource locks and no other job starts on the same files meanwhile.
+"""
+
+import asyncio
+import contextvars
+import importlib
+import io
+import sys
+import threading
+import time
+import traceback
+from typing import Awaitable, Callable, List, Optional
+
+# Scripts that can run in-process (file name → module): local stages that only read
+# and write files. The scraper (browser session, may prompt on stdin) and the
+# translator (API calls of up to READ_TIMEOUT) run as a subprocess, so cancel and
+# timeouts can terminate them; a thread only stops at its next output.
+IN_PROCESS_STAGES = {
+    "format_for_website.py": "format_for_website",
+    "update_chapters_json.py": "update_chapters_json",
+    "sync_chapters_js.py": "sync_chapters_js",
+    "render_static.py": "render_static",
+}
+
+# Arguments appended when a script runs in-process. The formatter would otherwise
+# fork a process pool from this multithreaded server (from a worker thread): the
+# children can deadlock on locks held by other threads and inherit the routed
+# sys.stdout. A spawn pool is no better here, it re-imports the server's __main__.
+IN_PROCESS_ARGS = {
+    "format_for_website.py": ["--workers", "1"],
+}
+
+_sink: contextvars.ContextVar = contextvars.ContextVar("stage_log_sink", default=None)
+_install_lock = threading.Lock()
+_unavailable: dict = {}  # script name → import error, checked once per process
+
+# Exit code of a stage stopped by cancellation or the idle timeout (like SIGTERM)
+CANCELLED_EXIT_CODE = -15
+
+
+class StageCancelled(BaseException):
+    """Raised inside a cancelled stage at its next output (BaseException: not swallowed by `except Exception`)."""
+
+
+class LineSink:
+    """Collects written text and emits complete lines (thread-safe)."""
+
+    def __init__(self, emit: Callable[[str], None]):
+        self.emit = emit
+        self.last_output = time.monotonic()
+        self.cancelled = False
+        self._buffer = ""
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def write(self, text: str):
+        if self.cancelled:
+            raise StageCancelled()
+        self.last_output = time.monotonic()
+        with self._lock:
+            self._buffer += text
+            *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            line = line.rstrip()
+            if line:
+                self.emit(line)
+
+    def close(self):
+        with self._lock:
+            rest, self._buffer = self._buffer.rstrip(), ""
+        if rest:
+            self.emit(rest)
+
+
+class RoutedStream(io.TextIOBase):
+    """sys.stdout/sys.stderr replacement: writes go to the current stage's sink, else to the original stream."""
+
+    def __init__(self, original):
+        self.original = original
+
+    def write(self, text: str) -> int:
+        sink = _sink.get()
+        if sink is None:
+            return self.original.write(text)
+        sink.write(text)
+        return len(text)
+
+    def flush(self):
+        if _sink.get() is None:
+            self.original.flush()
+
+    @property
+    def encoding(self):
+        return getattr(self.original, "encoding", "utf-8")
+
+    def isatty(self) -> bool:
+        return False
+
+
+def install():
+    """Route sys.stdout/sys.stderr through RoutedStream (idempotent)."""
+    with _install_lock:
+        if not isinstance(sys.stdout, RoutedStream):
+            sys.stdout = RoutedStream(sys.stdout)
+        if not isinstance(sys.stderr, RoutedStream):
+            sys.stderr = RoutedStream(sys.stderr)
+
+
+def can_run_in_process(script_name: str) -> bool:
+    """True if the script is registered and its module (and dependencies) can be imported."""
+    module_name = IN_PROCESS_STAGES.get(script_name)
+    if module_name is None or script_name in _unavailable:
+        return False
+    try:
+        importlib.import_module(module_name)
+    except ImportError as e:
+        _unavailable[script_name] = e
+        print(f"⚠️ {script_name} cannot run in-process ({e}), using a subprocess")
+        return False
+    return True
+
+
+def _call_main(module_name: str, argv: List[str], sink: LineSink) -> int:
+    _sink.set(sink)
+    try:
+        try:
+            module = importlib.import_module(module_name)
+            result = module.main(argv)
+            return result if isinstance(result, int) else 0
+        except SystemExit as e:  # argparse errors, explicit exit()
+            return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"❌ {e}")
+            return 1
+    except StageCancelled:
+        return CANCELLED_EXIT_CODE
+    finally:
+        sink.close()
+
+
+async def stop_uninterrupted(stop: Awaitable):
+    """
+    Run a stop sequence to the end even if the caller is cancelled again meanwhile
+    (second cancel request, job timeout). The cancellation is re-raised afterwards,
+    so a job only finishes, and releases its resources, once its stage has exited.
+    """
+    task = asyncio.ensure_future(stop)
+    cancelled = False
+    while not task.done():
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            cancelled = True
+    if cancelled:
+        raise asyncio.CancelledError()
+    return task.result()
+
+
+async def _stop(future: asyncio.Future, sink: LineSink, emit: Callable[[str], None], grace: float):
+    """Cancel a stage and wait until its thread has exited (reported if that takes longer than `grace`)."""
+    sink.cancel()
+    await asyncio.wait({future}, timeout=grace)
+    if not future.done():
+        emit(f"⚠️ Stage did not stop within {grace:.0f}s, waiting for its next output to stop it")
+        await asyncio.wait({future})
+
+
+async def run_in_process(script_name: str, argv: Optional[List[str]], emit: Callable[[str], None],
+                         idle_timeout: float = 0, grace: float = 10) -> int:
+    """
+    Run a registered script's main(argv) in a worker thread.
+
+    Args:
+        script_name: Script file name (see IN_PROCESS_STAGES)
+        argv: Command line arguments (IN_PROCESS_ARGS are appended)
+        emit: Called on the event loop with each output line
+        idle_timeout: Stop the stage after this many seconds without output (0 = no limit)
+        grace: Seconds after which a cancelled stage that has not stopped yet is reported
+
+    Returns:
+        Exit code (0 = success, CANCELLED_EXIT_CODE if stopped by the idle timeout)
+    """
+    install()
+    loop = asyncio.get_running_loop()
+    sink = LineSink(lambda line: loop.call_soon_threadsafe(emit, line))
+    # to_thread runs in a copy of the current context: the sink never leaks into the caller
+    future = asyncio.ensure_future(
+        asyncio.to_thread(_call_main, IN_PROCESS_STAGES[script_name],
+                          [*(argv or []), *IN_PROCESS_ARGS.get(script_name, [])], sink)
+    )
+    try:
+        while True:
+            remaining = idle_timeout - (time.monotonic() - sink.last_output) if idle_timeout else None
+            if remaining is not None and remaining <= 0:
+                emit(f"⏱️ No output for {idle_timeout:.0f}s, stopping")
+                await stop_uninterrupted(_stop(future, sink, emit, grace))
+                return CANCELLED_EXIT_CODE
+            done, _ = await asyncio.wait({future}, timeout=remaining)
+            if done:
+                return future.result()
+    except asyncio.CancelledError:
+        await stop_uninterrupted(_stop(future, sink, emit, grace))
+        raise
@@ -0,0 +1,84 @@
+"""
+Task Logs - Per-task log files with rotation
+============================================
+Every job writes its full log to `backend/logs/<task id>.log` (line buffered,
+so history is readable while the job runs). Only the newest LOG_KEEP_FILES
+logs of finished tasks are kept; logs of queued or running tasks are never
+rotated out. In-memory log buffers hold recent lines only; older lines are
+paged from these files.
+"""
+
+import re
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, List, Optional, TextIO, Tuple
+
+TASK_ID_PATTERN = re.compile(r'^\d{8}-\d{6}-\d{6}-[a-z0-9-]+$')
+
+
+def slugify(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or "task"
+
+
+class TaskLogStore:
+    """Writes one log file per task and pages through past ones."""
+
+    def __init__(self, log_dir: Path, keep_files: int):
+        self.log_dir = Path(log_dir)
+        self.keep_files = keep_files
+
+    def _path(self, task_id: str) -> Path:
+        return self.log_dir / f"{task_id}.log"
+
+    def open(self, name: str, active: Iterable[str] = ()) -> Tuple[str, TextIO]:
+        """
+        Create the log file of a new task; returns (task id, line-buffered file).
+        `active`: ids of tasks still queued or running, whose logs rotation must keep.
+        """
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        # Timestamp first so file names sort by start time (rotation relies on it)
+        task_id = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{slugify(name)}"
+        log_file = open(self._path(task_id), "w", encoding="utf-8", buffering=1)
+        self.rotate([task_id, *active])
+        return task_id, log_file
+
+    def rotate(self, active: Iterable[str] = ()):
+        """Delete the oldest logs of finished tasks beyond keep_files (logs of `active` tasks are kept)."""
+        active = set(active)
+        files = [path for path in sorted(self.log_dir.glob("*.log")) if path.stem not in active]
+        for path in files[:-self.keep_files] if self.keep_files > 0 else []:
+            path.unlink(missing_ok=True)
+
+    def list_tasks(self) -> List[dict]:
+        """Stored task logs, newest first."""
+        tasks = []
+        for path in sorted(self.log_dir.glob("*.log"), reverse=True):
+            stat = path.stat()
+            tasks.append({
+                "taskId": path.stem,
+                "size": stat.st_size,
+                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            })
+        return tasks
+
+    def read(self, task_id: str, offset: int = 0, limit: int = 200) -> Optional[dict]:
+        """
+        One page of a task log (streamed, memory stays bounded by `limit`).
+
+        Returns:
+            {"taskId", "offset", "lines", "hasMore"} or None if the task log does not exist
+        """
+        if not TASK_ID_PATTERN.match(task_id):
+            return None
+        path = self._path(task_id)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            page = [line.rstrip("\n") for line in islice(f, offset, offset + limit + 1)]
+        return {
+            "taskId": task_id,
+            "offset": offset,
+            "lines": page[:limit],
+            "hasMore": len(page) > limit,
+        }
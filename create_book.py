@@ -1,6 +1,8 @@
 """
 Book Template Generator for Doc Truyen Website
 This script creates the folder structure and files for a new book.
+It also registers the book for the pipeline (scripts/books/<slug>.json,
+see scripts/book_registry.py) so every script can run on it with --book.
 Run: python create_book.py <book-slug>
 """
 
@@ -9,7 +11,25 @@ import json
 import sys
 from datetime import datetime
 
-def create_book_structure(book_slug, book_title_en="New Book", book_title_vi="Truyện Mới", genre="Light Novel"):
+def register_book(base_path, book_slug, book_title_en, book_title_vi, source_url=None):
+    """Create the pipeline config of the book (kept as is if it already exists)."""
+    config_path = os.path.join(base_path, "scripts", "books", f"{book_slug}.json")
+    if os.path.exists(config_path):
+        print(f"✓ Kept existing: {config_path}")
+        return config_path
+    config = {"slug": book_slug, "title": book_title_en, "titleVi": book_title_vi}
+    if source_url:
+        config["sourceUrl"] = source_url
+    config["volumes"] = []
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"✓ Created: {config_path}")
+    return config_path
+
+
+def create_book_structure(book_slug, book_title_en="New Book", book_title_vi="Truyện Mới", genre="Light Novel",
+                          source_url=None):
     """Create the folder structure for a new book."""
     
     base_path = os.path.dirname(os.path.abspath(__file__))
@@ -443,6 +463,7 @@ const ChapterListManager = {{
                    data-chapter-id="${{chapter.id}}">
                     <div class="chapter-card-number">Chương ${{chapter.id}}</div>
                     <div class="chapter-card-title">${{chapter.title}}</div>
+                    ${{this.formatMeta(chapter)}}
                 </a>
             `;
         }});
@@ -450,6 +471,12 @@ const ChapterListManager = {{
         container.innerHTML = html;
     }},
 
+    formatMeta(chapter) {{
+        // wordCount/readingMinutes are precomputed by update_chapters_json.py
+        if (!chapter.wordCount) return '';
+        return `<div class="chapter-card-meta">${{chapter.wordCount.toLocaleString('vi-VN')}} từ · ${{chapter.readingMinutes}} phút đọc</div>`;
+    }},
+
     filterChapters(query) {{
         const cards = document.querySelectorAll('.chapter-card');
         const normalizedQuery = query.toLowerCase().trim();
@@ -682,6 +709,7 @@ const TOCPanel = {{
                    class="toc-item ${{isActive ? 'active' : ''}}">
                     <div class="toc-item-number">Chương ${{chapter.id}}</div>
                     <div class="toc-item-title">${{chapter.title}}</div>
+                    ${{this.formatMeta(chapter)}}
                 </a>
             `;
         }});
@@ -693,6 +721,12 @@ const TOCPanel = {{
         }}, 100);
     }},
 
+    formatMeta(chapter) {{
+        // wordCount/readingMinutes are precomputed by update_chapters_json.py
+        if (!chapter.wordCount) return '';
+        return `<div class="toc-item-meta">${{chapter.wordCount.toLocaleString('vi-VN')}} từ · ${{chapter.readingMinutes}} phút đọc</div>`;
+    }},
+
     filterTOC(query) {{
         const items = document.querySelectorAll('.toc-item');
         const normalizedQuery = query.toLowerCase().trim();
@@ -755,15 +789,18 @@ const ChapterReader = {{
 
     init() {{
         const chapterId = this.getCurrentChapterId();
+        this.prerendered = parseInt(document.body.dataset.prerendered) || null;
         if (chapterId) {{
-            this.loadChapter(chapterId);
+            this.loadChapter(chapterId, true);
         }}
+        this.loadParagraphOffsets();
         this.bindEvents();
     }},
 
     getCurrentChapterId() {{
         const params = new URLSearchParams(window.location.search);
-        return parseInt(params.get('chapter')) || null;
+        // Pre-rendered pages (chapters/<id>.html) carry the id on <body>
+        return parseInt(params.get('chapter')) || parseInt(document.body.dataset.prerendered) || null;
     }},
 
     getChapterById(id) {{
@@ -776,7 +813,98 @@ const ChapterReader = {{
         return chaptersData.chapters.findIndex(ch => ch.id === id);
     }},
 
-    loadChapter(chapterId) {{
+    loadParagraphOffsets() {{
+        // Paragraph offsets are precomputed by update_chapters_json.py but not shipped in
+        // chapters.js: sync_chapters_js.py writes them to their own file, loaded once in the background
+        if (!this.offsetsLoaded) {{
+            this.offsetsLoaded = new Promise(resolve => {{
+                const script = document.createElement('script');
+                script.src = 'js/paragraph-offsets.js';
+                script.onload = () => {{
+                    if (typeof paragraphOffsetsData !== 'undefined') {{
+                        chaptersData.chapters.forEach(ch => {{
+                            ch.paragraphOffsets = paragraphOffsetsData[ch.id];
+                        }});
+                    }}
+                    resolve();
+                }};
+                script.onerror = () => resolve();
+                document.head.appendChild(script);
+            }});
+        }}
+        return this.offsetsLoaded;
+    }},
+
+    getParagraphs(chapter) {{
+        // Slice by the paragraph offsets once loaded, otherwise split the lines
+        const offsets = chapter.paragraphOffsets;
+        if (!offsets) {{
+            return chapter.content.split('\\n').filter(p => p.trim());
+        }}
+        return offsets.map((start, i) => {{
+            const end = i + 1 < offsets.length ? offsets[i + 1] : chapter.content.length;
+            return chapter.content.slice(start, end).trim();
+        }});
+    }},
+
+    paragraphAtOffset(offset) {{
+        // Last paragraph starting at or before `offset` (binary search over the offsets)
+        const offsets = this.currentChapter?.paragraphOffsets || [];
+        let low = 0, high = offsets.length - 1, found = 0;
+        while (low <= high) {{
+            const mid = (low + high) >> 1;
+            if (offsets[mid] <= offset) {{
+                found = mid;
+                low = mid + 1;
+            }} else {{
+                high = mid - 1;
+            }}
+        }}
+        return found;
+    }},
+
+    getVisibleParagraph() {{
+        // First paragraph whose bottom edge is below the top of the viewport
+        const paragraphs = document.getElementById('chapterText').children;
+        let low = 0, high = paragraphs.length - 1, found = 0;
+        while (low <= high) {{
+            const mid = (low + high) >> 1;
+            if (paragraphs[mid].getBoundingClientRect().bottom > 0) {{
+                found = mid;
+                high = mid - 1;
+            }} else {{
+                low = mid + 1;
+            }}
+        }}
+        return found;
+    }},
+
+    getSavedParagraph(chapterId) {{
+        try {{
+            const saved = JSON.parse(localStorage.getItem(`${{BOOK_ID}}_progress`)) || {{}};
+            if (saved.lastChapter !== chapterId) return null;
+            // Prefer the text offset: it still points at the same passage if paragraphs change
+            if (saved.paragraphOffset !== undefined && this.currentChapter.paragraphOffsets) {{
+                return this.paragraphAtOffset(saved.paragraphOffset);
+            }}
+            return saved.paragraph || null;
+        }} catch {{
+            return null;
+        }}
+    }},
+
+    restoreParagraph(chapterId) {{
+        if (this.currentChapter?.id !== chapterId) return;  // another chapter was opened meanwhile
+        const paragraph = this.getSavedParagraph(chapterId);
+        this.saveProgress(chapterId, paragraph || 0);
+        if (paragraph) {{
+            document.getElementById('chapterText').children[paragraph]?.scrollIntoView();
+        }} else {{
+            window.scrollTo(0, 0);
+        }}
+    }},
+
+    loadChapter(chapterId, restorePosition = false) {{
         const chapter = this.getChapterById(chapterId);
         if (!chapter) {{
             document.getElementById('chapterText').innerHTML = `
@@ -796,17 +924,25 @@ const ChapterReader = {{
         document.getElementById('volumeTag').textContent = `Volume ${{chapter.volume}}`;
         document.getElementById('chapterHeading').textContent = `Chương ${{chapter.id}}: ${{chapter.title}}`;
 
-        const contentHtml = chapter.content
-            .split('\\n')
-            .filter(p => p.trim())
-            .map(p => `<p>${{p}}</p>`)
-            .join('');
+        if (chapterId === this.prerendered) {{
+            this.prerendered = null;
+        }} else {{
+            const contentHtml = this.getParagraphs(chapter)
+                .map(p => `<p>${{p}}</p>`)
+                .join('');
 
-        document.getElementById('chapterText').innerHTML = contentHtml;
+            document.getElementById('chapterText').innerHTML = contentHtml;
+        }}
 
         this.updateNavigation(chapterId);
-        this.saveProgress(chapterId);
-        window.scrollTo(0, 0);
+        // Restore the saved paragraph when reopening the last chapter (once the paragraph
+        // offsets are loaded, the text is already shown meanwhile), otherwise start at the top
+        if (restorePosition) {{
+            this.loadParagraphOffsets().then(() => this.restoreParagraph(chapterId));
+        }} else {{
+            this.saveProgress(chapterId, 0);
+            window.scrollTo(0, 0);
+        }}
         TOCPanel.renderTOC();
     }},
 
@@ -815,9 +951,13 @@ const ChapterReader = {{
         const prevBtn = document.getElementById('prevChapter');
         const nextBtn = document.getElementById('nextChapter');
 
+        // On pre-rendered pages these are real links; stay in the single-page reader instead
         if (index > 0) {{
             prevBtn.disabled = false;
-            prevBtn.onclick = () => this.navigateToChapter(chaptersData.chapters[index - 1].id);
+            prevBtn.onclick = (e) => {{
+                e.preventDefault();
+                this.navigateToChapter(chaptersData.chapters[index - 1].id);
+            }};
         }} else {{
             prevBtn.disabled = true;
             prevBtn.onclick = null;
@@ -825,7 +965,10 @@ const ChapterReader = {{
 
         if (index < chaptersData.chapters.length - 1) {{
             nextBtn.disabled = false;
-            nextBtn.onclick = () => this.navigateToChapter(chaptersData.chapters[index + 1].id);
+            nextBtn.onclick = (e) => {{
+                e.preventDefault();
+                this.navigateToChapter(chaptersData.chapters[index + 1].id);
+            }};
         }} else {{
             nextBtn.disabled = true;
             nextBtn.onclick = null;
@@ -837,12 +980,14 @@ const ChapterReader = {{
         this.loadChapter(chapterId);
     }},
 
-    saveProgress(chapterId) {{
+    saveProgress(chapterId, paragraph = 0) {{
         try {{
             const progress = {{
                 lastChapter: chapterId,
                 lastRead: Date.now(),
-                scrollPercent: 0
+                scrollPercent: 0,
+                paragraph: paragraph,
+                paragraphOffset: this.currentChapter?.paragraphOffsets?.[paragraph]
             }};
             localStorage.setItem(`${{BOOK_ID}}_progress`, JSON.stringify(progress));
         }} catch (e) {{
@@ -879,7 +1024,10 @@ const ChapterReader = {{
                 if (this.currentChapter) {{
                     try {{
                         const saved = JSON.parse(localStorage.getItem(`${{BOOK_ID}}_progress`)) || {{}};
+                        const paragraph = this.getVisibleParagraph();
                         saved.scrollPercent = progress;
+                        saved.paragraph = paragraph;
+                        saved.paragraphOffset = this.currentChapter.paragraphOffsets?.[paragraph];
                         localStorage.setItem(`${{BOOK_ID}}_progress`, JSON.stringify(saved));
                     }} catch (e) {{ }}
                 }}
@@ -926,23 +1074,29 @@ const chaptersData = {{
     with open(os.path.join(js_path, "chapters.js"), "w", encoding="utf-8") as f:
         f.write(chapters_js)
     print(f"✓ Created: js/chapters.js")
+
+    config_path = register_book(base_path, book_slug, book_title_en, book_title_vi, source_url)
     
     print(f"\n✅ Book '{book_title_en}' created successfully!")
     print(f"📁 Location: {book_path}")
     print(f"\n📝 Next steps:")
-    print(f"   1. Add chapter data to: {os.path.join(js_path, 'chapters.js')}")
-    print(f"   2. Visit: books/{book_slug}/index.html")
+    print(f"   1. Set sourceUrl and volumes in: {config_path}")
+    print(f"   2. Run the pipeline: cd scripts && python auto_scrape.py --book {book_slug}")
+    print(f"      (or pick the book in the admin panel); work files go to work/{book_slug}/")
+    print(f"   3. Visit: books/{book_slug}/index.html")
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python create_book.py <book-slug> [title-en] [title-vi] [genre]")
-        print("Example: python create_book.py my-new-book 'My New Book' 'Truyện Mới' 'Light Novel'")
+        print("Usage: python create_book.py <book-slug> [title-en] [title-vi] [genre] [source-url]")
+        print("Example: python create_book.py my-new-book 'My New Book' 'Truyện Mới' 'Light Novel' "
+              "'https://ko-fi.com/post/...'")
         sys.exit(1)
     
     slug = sys.argv[1]
     title_en = sys.argv[2] if len(sys.argv) > 2 else "New Book"
     title_vi = sys.argv[3] if len(sys.argv) > 3 else "Truyện Mới"
     genre = sys.argv[4] if len(sys.argv) > 4 else "Light Novel"
+    source_url = sys.argv[5] if len(sys.argv) > 5 else None
     
-    create_book_structure(slug, title_en, title_vi, genre)
+    create_book_structure(slug, title_en, title_vi, genre, source_url)
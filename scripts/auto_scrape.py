@@ -18,6 +18,9 @@ Cách sử dụng:
     
     # Xem trạng thái
     python auto_scrape.py --status
+    
+    # Scrape cho sách khác (thư mục, bảng volume, state store riêng - xem book_registry.py)
+    python auto_scrape.py --book my-book --count 5 --url "..."
 """
 
 import os
@@ -28,19 +31,31 @@ from pathlib import Path
 
 # Import từ kofi_scraper_fast
 try:
+    import kofi_scraper_fast
     from kofi_scraper_fast import FastKofiScraper, parse_chapters_from_content, format_to_xml
+    from book_registry import Book, add_book_argument
+    from chapter_state import STAGE_SCRAPED, ChapterState, hash_text
     import asyncio
 except ImportError:
     print("❌ Không thể import kofi_scraper_fast. Đảm bảo file nằm cùng thư mục.")
     sys.exit(1)
 
 
-# Cấu hình
-CHAPTERS_DIR = Path(__file__).parent / "Chapters_Untranslated"
+# Cấu hình (thư mục của sách mặc định, đổi bằng --book)
+CHAPTERS_DIR = kofi_scraper_fast.BOOK.untranslated_dir
+STATE_DB = kofi_scraper_fast.BOOK.state_db
 # Base URL pattern cho Ko-fi posts (cần điền đúng author)
 KOFI_AUTHOR = "your_kofi_author"  # Thay đổi nếu cần
 
 
+def use_book(book: Book):
+    """Chọn sách cho process này (scraper luôn chạy trong process riêng)."""
+    global CHAPTERS_DIR, STATE_DB
+    kofi_scraper_fast.use_book(book)
+    CHAPTERS_DIR = book.untranslated_dir
+    STATE_DB = book.state_db
+
+
 def save_chapters_separately(chapters: list, output_dir: Path = None) -> list:
     """
     Lưu từng chapter vào file riêng biệt.
@@ -63,6 +78,7 @@ def save_chapters_separately(chapters: list, output_dir: Path = None) -> list:
     output_dir.mkdir(parents=True, exist_ok=True)
     
     saved_files = []
+    state = ChapterState(STATE_DB)
     
     for chapter in chapters:
         ch_id = chapter['id']
@@ -72,6 +88,7 @@ def save_chapters_separately(chapters: list, output_dir: Path = None) -> list:
         # Format single chapter to XML
         xml_content = format_to_xml([chapter])
         output_path.write_text(xml_content, encoding='utf-8')
+        state.record([ch_id], STAGE_SCRAPED, hash_text(xml_content), path=output_path)
         
         saved_files.append(output_path)
         print(f"   💾 Đã lưu: {filename}")
@@ -143,9 +160,12 @@ def print_status():
     """In trạng thái hiện tại của chapters"""
     summary = get_chapter_summary()
     
+    book = kofi_scraper_fast.BOOK
     print("\n" + "=" * 60)
-    print("📚 TRẠNG THÁI CHAPTERS")
+    print(f"📚 TRẠNG THÁI CHAPTERS - {book.title}")
     print("=" * 60)
+    if book.source_url:
+        print(f"🔗 Nguồn: {book.source_url}")
     
     if not summary["files"]:
         print("   Chưa có chapter nào trong folder.")
@@ -175,13 +195,17 @@ async def scrape_new_chapters(start_url: str, count: int, delay_ms: int = 500):
         delay_ms=delay_ms
     )
     
-    chapters = await scraper.scrape_sequential_with_next(start_url, count)
-    
-    if chapters:
-        saved_files = save_chapters_separately(chapters, CHAPTERS_DIR)
-        return chapters, saved_files
+    # Lưu ngay sau mỗi bài để các bước sau (pipeline) xử lý được chapter mới sớm nhất
+    saved_files = []
+    try:
+        chapters = await scraper.scrape_sequential_with_next(
+            start_url, count,
+            on_chapters=lambda new: saved_files.extend(save_chapters_separately(new, CHAPTERS_DIR))
+        )
+    finally:
+        await scraper.close()
     
-    return [], []
+    return chapters, saved_files
 
 
 async def scrape_until_end(start_url: str, delay_ms: int = 500, max_posts: int = 50):
@@ -200,6 +224,7 @@ async def scrape_until_end(start_url: str, delay_ms: int = 500, max_posts: int =
     )
     
     all_chapters = []
+    saved_files = []
     current_url = start_url
     post_count = 0
     
@@ -236,6 +261,8 @@ async def scrape_until_end(start_url: str, delay_ms: int = 500, max_posts: int =
             
             for ch in chapters:
                 print(f"   ✅ Chapter {ch['id']}: {ch['title'][:40]}...")
+            # Lưu ngay, không đợi tới bài cuối
+            saved_files.extend(save_chapters_separately(chapters, CHAPTERS_DIR))
             
             # Tìm Next URL
             next_url = data.get('nextChapterUrl')
@@ -250,13 +277,9 @@ async def scrape_until_end(start_url: str, delay_ms: int = 500, max_posts: int =
     finally:
         if tab_id in scraper.sessions:
             await scraper.sessions[tab_id]['ws'].close()
+        await scraper.close()
     
-    # Lưu từng chapter vào file riêng
-    if all_chapters:
-        saved_files = save_chapters_separately(all_chapters, CHAPTERS_DIR)
-        return all_chapters, saved_files
-    
-    return [], []
+    return all_chapters, saved_files
 
 
 def main():
@@ -280,8 +303,10 @@ def main():
                         help='Bỏ qua xác nhận, bắt đầu scrape ngay')
     parser.add_argument('--status', '-s', action='store_true',
                         help='Chỉ hiện trạng thái, không scrape')
+    add_book_argument(parser)
     
     args = parser.parse_args()
+    use_book(args.book)
     
     # Hiển thị banner
     print("""
@@ -0,0 +1,176 @@
+"""
+Book Registry - Cấu hình và thư mục làm việc của từng sách
+==========================================================
+Mỗi sách là một file `books/<slug>.json`: tên, URL nguồn, ranh giới volume
+(xem volumes.py), glossary và đường dẫn. Mọi script nhận `--book <slug>` và
+lấy đường dẫn từ đây, nên các sách không dùng chung thư mục nào và pipeline
+của nhiều sách chạy song song được.
+
+Đường dẫn mặc định (tương đối với thư mục gốc project):
+
+    work/<slug>/Chapters_Untranslated     output của scraper
+    work/<slug>/Chapters_Translated       output của bước dịch
+    work/<slug>/Chapters                  output của bước format
+    work/<slug>/chapter_state.db          state store
+    website/books/<slug>/data/chapters.json   (+ chapters.pack/.idx cùng thư mục)
+    website/books/<slug>/js/chapters.js
+    scripts/books/<slug>.glossary.json    (không có thì dùng scripts/glossary.json)
+
+Khối "paths" trong file cấu hình ghi đè từng đường dẫn, VD sách có sẵn
+(max-level-priest) giữ nguyên các thư mục cũ:
+
+    "sourceUrl": "https://ko-fi.com/...",
+    "paths": {"untranslatedDir": "scripts/Chapters_Untranslated", "chaptersJson": "website/data/chapters.json"}
+
+Usage:
+    python book_registry.py                  # Liệt kê các sách
+    python book_registry.py --book my-book   # Xem đường dẫn của một sách
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Đường dẫn mặc định
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_DIR = SCRIPT_DIR.parent
+BOOKS_DIR = SCRIPT_DIR / "books"
+DEFAULT_BOOK = "max-level-priest"
+WORK_DIR = PROJECT_DIR / "work"
+WEBSITE_BOOKS_DIR = PROJECT_DIR / "website" / "books"
+DEFAULT_GLOSSARY = SCRIPT_DIR / "glossary.json"
+
+GLOSSARY_SUFFIX = ".glossary.json"
+
+
+class BookNotFoundError(ValueError):
+    """Không có file cấu hình cho slug này."""
+
+
+class Book:
+    """Cấu hình của một sách và các đường dẫn pipeline của nó."""
+
+    def __init__(self, slug: str, config: dict, config_path: Optional[Path] = None):
+        self.slug = slug
+        self.config_path = config_path
+        self.title: str = config.get("title", slug)
+        self.title_vi: str = config.get("titleVi", self.title)
+        self.source_url: Optional[str] = config.get("sourceUrl")
+
+        paths = config.get("paths", {})
+
+        def path(key: str, default: Path) -> Path:
+            return PROJECT_DIR / paths[key] if key in paths else default
+
+        work_dir = WORK_DIR / slug
+        self.website_dir = path("websiteDir", WEBSITE_BOOKS_DIR / slug)
+        self.untranslated_dir = path("untranslatedDir", work_dir / "Chapters_Untranslated")
+        self.translated_dir = path("translatedDir", work_dir / "Chapters_Translated")
+        self.chapters_dir = path("chaptersDir", work_dir / "Chapters")
+        self.state_db = path("stateDb", work_dir / "chapter_state.db")
+        self.chapters_json = path("chaptersJson", self.website_dir / "data" / "chapters.json")
+        self.chapters_js = path("chaptersJs", self.website_dir / "js" / "chapters.js")
+        own_glossary = BOOKS_DIR / f"{slug}{GLOSSARY_SUFFIX}"
+        self.glossary_file = path("glossary", own_glossary if own_glossary.exists() else DEFAULT_GLOSSARY)
+
+    def __repr__(self) -> str:
+        return f"Book({self.slug!r})"
+
+    def state_sources(self) -> Dict[str, Path]:
+        """Thư mục/file dùng để rebuild state store (tham số của `rebuild_from_disk`)."""
+        return {
+            "untranslated_dir": self.untranslated_dir,
+            "translated_dir": self.translated_dir,
+            "chapters_dir": self.chapters_dir,
+            "chapters_json": self.chapters_json,
+        }
+
+    def open_state(self):
+        """State store của sách (rebuild từ thư mục của sách nếu còn trống)."""
+        # Import tại đây để `book_registry` không phụ thuộc vào các module pipeline
+        from chapter_state import open_state
+        return open_state(self.state_db, self.state_sources())
+
+    def to_dict(self) -> dict:
+        """Thông tin công khai của sách (cho API admin)."""
+        return {"slug": self.slug, "title": self.title, "titleVi": self.title_vi, "sourceUrl": self.source_url}
+
+
+def book_config_path(slug: str = DEFAULT_BOOK) -> Path:
+    """File cấu hình của một sách."""
+    return BOOKS_DIR / f"{slug}.json"
+
+
+def book_exists(slug: str) -> bool:
+    # Slug chỉ là tên file, không cho phép đi ra ngoài books/
+    return "/" not in slug and "\\" not in slug and not slug.startswith(".") and book_config_path(slug).exists()
+
+
+def load_book(slug: str = DEFAULT_BOOK) -> Book:
+    """
+    Đọc cấu hình của một sách.
+
+    Raises:
+        BookNotFoundError: Không có `books/<slug>.json`
+    """
+    if not book_exists(slug):
+        raise BookNotFoundError(f"Không tìm thấy sách '{slug}' ({book_config_path(slug)})")
+    path = book_config_path(slug)
+    with open(path, "r", encoding="utf-8") as f:
+        return Book(slug, json.load(f), path)
+
+
+def list_books() -> List[Book]:
+    """Tất cả sách đã đăng ký, theo slug."""
+    return [
+        load_book(path.stem) for path in sorted(BOOKS_DIR.glob("*.json"))
+        if not path.name.endswith(GLOSSARY_SUFFIX)
+    ]
+
+
+def book_argument(slug: str) -> Book:
+    """Kiểu của tham số `--book` (argparse báo lỗi nếu sách không tồn tại)."""
+    try:
+        return load_book(slug)
+    except BookNotFoundError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_book_argument(parser: argparse.ArgumentParser) -> None:
+    """Thêm `--book <slug>` (mặc định: sách mặc định) vào parser của một script."""
+    parser.add_argument("--book", type=book_argument, default=DEFAULT_BOOK,
+                        help=f"Slug của sách (books/<slug>.json, mặc định: {DEFAULT_BOOK})")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Liệt kê các sách và đường dẫn pipeline của chúng")
+    parser.add_argument("--book", type=book_argument, help="Xem đường dẫn của một sách")
+    args = parser.parse_args(argv)
+
+    if args.book is None:
+        print("📚 Các sách đã đăng ký:")
+        for book in list_books():
+            default = " (mặc định)" if book.slug == DEFAULT_BOOK else ""
+            print(f"   • {book.slug}{default}: {book.title} / {book.title_vi}")
+        return 0
+
+    book = args.book
+    print(f"📖 {book.title} ({book.slug})")
+    print(f"   • Nguồn: {book.source_url or '-'}")
+    for label, path in [
+        ("Chưa dịch", book.untranslated_dir),
+        ("Đã dịch", book.translated_dir),
+        ("Đã format", book.chapters_dir),
+        ("State store", book.state_db),
+        ("chapters.json", book.chapters_json),
+        ("chapters.js", book.chapters_js),
+        ("Glossary", book.glossary_file),
+        ("Website", book.website_dir),
+    ]:
+        print(f"   • {label}: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
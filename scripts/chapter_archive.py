@@ -0,0 +1,449 @@
+"""
+Chapter Archive - Gói chapter nhị phân kèm chỉ mục offset
+=========================================================
+Thay vì phải tìm file `chA_B.vn.txt` chứa chapter N hoặc load toàn bộ
+chapters.json, bước publish đóng gói các chapter thành hai file:
+
+    chapters.pack   Dữ liệu: header + metadata của sách + payload JSON của từng
+                    chapter (mỗi payload có thể được nén zlib/zstd riêng)
+    chapters.idx    Chỉ mục: header + một record cố định 32 byte cho mỗi chapter
+
+Đọc chapter N chỉ là tra chỉ mục (dict) rồi đọc đúng một đoạn byte trong file
+pack, bất kể có bao nhiêu chapter.
+
+Định dạng (little-endian):
+    chapters.idx
+        Header  <4sHHIQQI8s magic "BRCX", version, flags, số record, kích thước pack,
+                            offset metadata, độ dài metadata, generation (8 byte)
+        Record  <IHBBQII8s  chapter id, volume, codec, flags,
+                            offset, độ dài (đã nén), độ dài gốc, hash payload (8 byte)
+    chapters.pack
+        Header  <4s8s       magic "BRCP", generation (8 byte)
+
+Generation là hash nội dung pack, ghi ở cả hai file: reader chỉ dùng cặp file có
+cùng generation, kể cả khi pack mới tình cờ có cùng kích thước với pack cũ.
+
+Usage:
+    python chapter_archive.py --build              # Đóng gói từ chapters.json
+    python chapter_archive.py --build --codec zstd # Nén bằng zstd (cần zstandard)
+    python chapter_archive.py --info               # Xem thông tin archive
+    python chapter_archive.py --read 255           # Đọc một chapter
+    python chapter_archive.py --book my-book --info
+
+Archive của mỗi sách nằm cạnh chapters.json của sách đó (xem book_registry.py).
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from book_registry import add_book_argument
+from file_utils import atomic_write_bytes
+
+# Đường dẫn mặc định
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_DIR = SCRIPT_DIR.parent
+DATA_DIR = PROJECT_DIR / "website" / "data"
+CHAPTERS_JSON = DATA_DIR / "chapters.json"
+PACK_FILE = DATA_DIR / "chapters.pack"
+INDEX_FILE = DATA_DIR / "chapters.idx"
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+DEFAULT_CODEC = os.getenv("CHAPTER_ARCHIVE_CODEC", "zlib")   # none | zlib | zstd
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+# ============================================================================
+
+MAGIC = b"BRCX"
+PACK_MAGIC = b"BRCP"
+VERSION = 2
+HEADER = struct.Struct("<4sHHIQQI8s")
+PACK_HEADER = struct.Struct("<4s8s")
+RECORD = struct.Struct("<IHBBQII8s")
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+CODEC_NAMES = {value: name for name, value in CODECS.items()}
+
+
+class ArchiveError(Exception):
+    """Archive không hợp lệ hoặc không đọc được."""
+
+
+class ArchiveClosedError(ArchiveError):
+    """Archive đã bị đóng (đã được thay bằng bản build mới, xem open_archive)."""
+
+
+class ArchiveEntry(NamedTuple):
+    """Một record trong chỉ mục."""
+    chapter_id: int
+    volume: int
+    codec: int
+    offset: int
+    length: int
+    raw_length: int
+    payload_hash: str   # 16 ký tự hex, dùng để so sánh nội dung (ETag, bỏ qua chapter không đổi)
+
+
+def encode_chapter(chapter: dict) -> bytes:
+    """Payload của một chapter: JSON UTF-8 (giữ nguyên thứ tự key)."""
+    return json.dumps(chapter, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def payload_hash(payload: bytes) -> str:
+    """Hash payload (sha256 rút gọn 16 ký tự hex)."""
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def chapter_hash(chapter: dict) -> str:
+    """Hash payload của một chapter, so sánh được với ArchiveEntry.payload_hash."""
+    return payload_hash(encode_chapter(chapter))
+
+
+def resolve_codec(name: str) -> int:
+    """Đổi tên codec sang mã, zstd tự lùi về zlib nếu chưa cài zstandard."""
+    if name not in CODECS:
+        raise ArchiveError(f"Codec không hỗ trợ: {name} (chọn: {', '.join(CODECS)})")
+    if name == "zstd" and zstandard is None:
+        print("⚠️ Chưa cài zstandard, dùng zlib thay thế.")
+        return CODEC_ZLIB
+    return CODECS[name]
+
+
+def compress(payload: bytes, codec: int) -> bytes:
+    """Nén payload theo codec."""
+    if codec == CODEC_ZLIB:
+        return zlib.compress(payload, ZLIB_LEVEL)
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    return payload
+
+
+def decompress(data: bytes, codec: int) -> bytes:
+    """Giải nén payload theo codec."""
+    if codec == CODEC_NONE:
+        return data
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ArchiveError("Archive dùng zstd nhưng chưa cài zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ArchiveError(f"Codec không hợp lệ: {codec}")
+
+
+# ============================================================================
+# Writer
+# ============================================================================
+def build_archive(
+    chapters: Iterable[dict],
+    meta: Optional[dict] = None,
+    pack_path: Path = PACK_FILE,
+    index_path: Path = INDEX_FILE,
+    codec: str = DEFAULT_CODEC,
+) -> dict:
+    """
+    Đóng gói các chapter thành file pack + index.
+
+    Mỗi payload chỉ được lưu dạng nén nếu bản nén thực sự nhỏ hơn.
+    File pack được ghi trước, index ghi sau (đều atomic); reader kiểm tra
+    kích thước và generation (hash pack) ghi trong index nên không bao giờ
+    dùng nhầm cặp file.
+
+    Args:
+        chapters: Các chapter dạng {"id", "volume", "title", "content", ...}
+        meta: Metadata của sách (bookTitle, ...), lưu đầu file pack
+        pack_path: File dữ liệu
+        index_path: File chỉ mục
+        codec: none | zlib | zstd
+
+    Returns:
+        Dict thống kê: chapters, raw_bytes, pack_bytes
+    """
+    codec_id = resolve_codec(codec)
+
+    pack = bytearray(PACK_HEADER.size)  # header điền sau khi đã có hash nội dung
+    meta_offset = len(pack)
+    meta_payload = json.dumps(meta or {}, ensure_ascii=False).encode("utf-8")
+    pack += meta_payload
+
+    records = []
+    raw_bytes = 0
+    for chapter in sorted(chapters, key=lambda c: c["id"]):
+        payload = encode_chapter(chapter)
+        data = compress(payload, codec_id)
+        entry_codec = codec_id
+        if len(data) >= len(payload):
+            data, entry_codec = payload, CODEC_NONE
+
+        records.append(RECORD.pack(
+            chapter["id"], chapter.get("volume", 1), entry_codec, 0,
+            len(pack), len(data), len(payload), bytes.fromhex(payload_hash(payload)),
+        ))
+        pack += data
+        raw_bytes += len(payload)
+
+    generation = hashlib.sha256(memoryview(pack)[PACK_HEADER.size:]).digest()[:8]
+    PACK_HEADER.pack_into(pack, 0, PACK_MAGIC, generation)
+    header = HEADER.pack(MAGIC, VERSION, 0, len(records), len(pack), meta_offset, len(meta_payload), generation)
+
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_bytes(pack_path, bytes(pack))
+    atomic_write_bytes(index_path, header + b"".join(records))
+
+    return {"chapters": len(records), "raw_bytes": raw_bytes, "pack_bytes": len(pack)}
+
+
+# ============================================================================
+# Reader
+# ============================================================================
+class ChapterArchive:
+    """
+    Đọc chapter từ archive: tra chỉ mục rồi đọc đúng một đoạn của file pack.
+
+    Đọc an toàn giữa các thread; đọc sau khi close() báo ArchiveClosedError.
+    """
+
+    def __init__(self, pack_path: Path = PACK_FILE, index_path: Path = INDEX_FILE):
+        self.pack_path = Path(pack_path)
+        self.index_path = Path(index_path)
+        self.signature = archive_signature(self.index_path)
+        self.closed = False
+        self._lock = threading.Lock()
+
+        index = self.index_path.read_bytes()
+        if len(index) < HEADER.size:
+            raise ArchiveError(f"File index quá ngắn: {self.index_path}")
+        magic, version, _, count, pack_size, meta_offset, meta_length, generation = HEADER.unpack_from(index)
+        if magic != MAGIC or version != VERSION:
+            raise ArchiveError(f"File index không đúng định dạng: {self.index_path}")
+        if len(index) != HEADER.size + count * RECORD.size:
+            raise ArchiveError(f"File index bị cắt: {self.index_path}")
+
+        self.entries: Dict[int, ArchiveEntry] = {}
+        for chapter_id, volume, codec, _, offset, length, raw_length, digest in RECORD.iter_unpack(
+            index[HEADER.size:]
+        ):
+            self.entries[chapter_id] = ArchiveEntry(
+                chapter_id, volume, codec, offset, length, raw_length, digest.hex()
+            )
+
+        self._file = open(self.pack_path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size != pack_size or size < PACK_HEADER.size:
+                raise ArchiveError("File pack và index không khớp (đang được ghi lại?)")
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if PACK_HEADER.unpack_from(self._buffer) != (PACK_MAGIC, generation):
+                self._buffer.close()
+                raise ArchiveError("File pack và index khác generation (đang được ghi lại?)")
+        except BaseException:
+            self._file.close()
+            raise
+        self.generation = generation.hex()
+
+        self.meta = json.loads(bytes(self._buffer[meta_offset:meta_offset + meta_length]) or b"{}")
+
+    def close(self):
+        """Giải phóng mmap và file (chờ các lần đọc đang chạy xong)."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._buffer.close()
+            self._file.close()
+
+    def __enter__(self) -> "ChapterArchive":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, chapter_id: int) -> bool:
+        return chapter_id in self.entries
+
+    def ids(self) -> List[int]:
+        """Danh sách chapter id theo thứ tự."""
+        return sorted(self.entries)
+
+    def entry(self, chapter_id: int) -> Optional[ArchiveEntry]:
+        """Record chỉ mục của một chapter (None nếu không có)."""
+        return self.entries.get(chapter_id)
+
+    def read_payload(self, chapter_id: int) -> Optional[bytes]:
+        """Payload JSON (đã giải nén) của một chapter."""
+        entry = self.entries.get(chapter_id)
+        if entry is None:
+            return None
+        with self._lock:
+            if self.closed:
+                raise ArchiveClosedError(f"Archive đã đóng: {self.index_path}")
+            data = self._buffer[entry.offset:entry.offset + entry.length]
+        return decompress(data, entry.codec)
+
+    def read_chapter(self, chapter_id: int) -> Optional[dict]:
+        """Đọc một chapter (None nếu không có)."""
+        payload = self.read_payload(chapter_id)
+        return json.loads(payload) if payload is not None else None
+
+    def iter_chapters(self) -> Iterator[dict]:
+        """Duyệt tất cả chapter theo thứ tự id."""
+        for chapter_id in self.ids():
+            yield self.read_chapter(chapter_id)
+
+
+def archive_signature(index_path: Path = INDEX_FILE) -> Optional[tuple]:
+    """(mtime, size) của file index, None nếu chưa có archive."""
+    try:
+        stat = Path(index_path).stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+_archives: Dict[Path, ChapterArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def open_archive(pack_path: Path = PACK_FILE, index_path: Path = INDEX_FILE) -> Optional[ChapterArchive]:
+    """
+    Archive dùng chung (mở lại khi file index thay đổi).
+
+    Archive cũ được đóng khi bị thay thế: người giữ nó sẽ nhận ArchiveClosedError
+    ở lần đọc tiếp theo và cần gọi lại open_archive.
+
+    Returns:
+        ChapterArchive, hoặc None nếu chưa có archive
+    """
+    index_path = Path(index_path)
+    signature = archive_signature(index_path)
+    with _archives_lock:
+        archive = _archives.get(index_path)
+        if archive is not None and archive.signature == signature:
+            return archive
+        if signature is None or not Path(pack_path).exists():
+            return None
+        replacement = ChapterArchive(pack_path, index_path)
+        _archives[index_path] = replacement
+        if archive is not None:
+            archive.close()
+        return replacement
+
+
+def is_archive_current(source: Path = CHAPTERS_JSON, index_path: Path = INDEX_FILE) -> bool:
+    """
+    Archive đã được build (đúng version định dạng hiện tại) sau lần sửa gần
+    nhất của `source` (chapters.json).
+    """
+    signature = archive_signature(index_path)
+    if signature is None:
+        return False
+    with open(index_path, "rb") as f:
+        head = f.read(6)
+    if len(head) < 6 or head[:4] != MAGIC or struct.unpack("<H", head[4:])[0] != VERSION:
+        return False
+    return not source.exists() or source.stat().st_mtime_ns <= signature[0]
+
+
+def archive_paths(json_path: Path = CHAPTERS_JSON) -> Tuple[Path, Path]:
+    """(pack, index) của archive đi kèm một chapters.json (cùng thư mục)."""
+    json_path = Path(json_path)
+    return json_path.with_name(PACK_FILE.name), json_path.with_name(INDEX_FILE.name)
+
+
+def read_book_data(source: Path = CHAPTERS_JSON) -> Optional[dict]:
+    """
+    Đọc dữ liệu sách ({metadata..., "chapters": [...]}) từ archive đi kèm `source`.
+
+    Returns:
+        Dữ liệu sách, hoặc None nếu chưa có archive / archive cũ hơn `source`
+        (khi đó đọc chapters.json)
+    """
+    pack_path, index_path = archive_paths(source)
+    if not is_archive_current(source, index_path) or not pack_path.exists():
+        return None
+    # Mở riêng (không dùng archive chung): đọc hết một lượt rồi đóng ngay
+    try:
+        with ChapterArchive(pack_path, index_path) as archive:
+            return {**archive.meta, "chapters": list(archive.iter_chapters())}
+    except (ArchiveError, FileNotFoundError) as e:
+        print(f"⚠️ Không đọc được archive, dùng {source.name}: {e}")
+        return None
+
+
+def build_from_json(json_path: Path = CHAPTERS_JSON, codec: str = DEFAULT_CODEC) -> dict:
+    """Đóng gói archive từ file chapters.json (ghi cạnh file JSON)."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    meta = {key: value for key, value in data.items() if key != "chapters"}
+    return build_archive(data.get("chapters", []), meta, *archive_paths(json_path), codec=codec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đóng gói và đọc archive chapter (chapters.pack/.idx)")
+    parser.add_argument("--build", action="store_true", help="Đóng gói lại archive từ chapters.json")
+    parser.add_argument("--codec", default=DEFAULT_CODEC, choices=list(CODECS), help="Codec nén payload")
+    parser.add_argument("--info", action="store_true", help="Xem thông tin archive")
+    parser.add_argument("--read", type=int, metavar="ID", help="Đọc một chapter theo id")
+    add_book_argument(parser)
+    args = parser.parse_args()
+    json_path = args.book.chapters_json
+    pack_path, index_path = archive_paths(json_path)
+
+    if args.build:
+        print(f"📦 Đóng gói {json_path} → {pack_path.name} + {index_path.name} ({args.codec})...")
+        stats = build_from_json(json_path, codec=args.codec)
+        print(f"✅ {stats['chapters']} chapters: {stats['raw_bytes']:,} → {stats['pack_bytes']:,} bytes")
+
+    if args.info or args.read is not None:
+        archive = open_archive(pack_path, index_path)
+        if archive is None:
+            print(f"❌ Chưa có archive, chạy: python chapter_archive.py --book {args.book.slug} --build")
+            return 1
+
+        if args.info:
+            codecs = {}
+            for entry in archive.entries.values():
+                name = CODEC_NAMES.get(entry.codec, "?")
+                codecs[name] = codecs.get(name, 0) + 1
+            ids = archive.ids()
+            print(f"📚 {archive.meta.get('bookTitle', '')}: {len(archive)} chapters"
+                  + (f" ({ids[0]}–{ids[-1]})" if ids else ""))
+            print(f"   • Codec: {', '.join(f'{name}={count}' for name, count in codecs.items())}")
+            print(f"   • Pack: {archive.pack_path.stat().st_size:,} bytes")
+
+        if args.read is not None:
+            chapter = archive.read_chapter(args.read)
+            if chapter is None:
+                print(f"❌ Không có chương {args.read} trong archive")
+                return 1
+            print(f"📖 Chương {chapter['id']} (Vol {chapter['volume']}) - {chapter['title']}")
+            print("-" * 60)
+            print(chapter["content"])
+
+    if not (args.build or args.info or args.read is not None):
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
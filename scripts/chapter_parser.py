@@ -0,0 +1,409 @@
+"""
+Chapter Parser - Bộ parse dùng chung cho định dạng <chapter> của mọi bước
+=========================================================================
+Parse định dạng:
+
+    <chapter number="255" volume="9">
+    <title>...</title>
+    <text>...</text>
+    </chapter>
+
+bằng một scanner viết tay (tìm tag bằng `find` trên bytes), trả về từng
+chapter một cách lazy. Hỗ trợ cả hai biến thể đang có trong pipeline:
+- Có escape XML (`kofi_scraper_fast.format_to_xml`: &amp; &lt; ...)
+- Không escape (`format_for_website.format_chapter_xml`)
+
+Scanner làm việc trên bytes (hoặc mmap), nên có thể chỉ decode những
+chapter thực sự cần. `ChapterIndex` / `read_chapter(id)` memory-map các file
+Chapters/*.vn.txt, lập chỉ mục vị trí byte của từng chapter và chỉ decode
+chapter được yêu cầu.
+
+Usage:
+    python chapter_parser.py ../Chapters/ch255.vn.txt     # Liệt kê chapters trong file
+    python chapter_parser.py --read 255                   # Đọc một chapter qua chỉ mục
+    python chapter_parser.py --benchmark                  # So sánh với regex cũ trên Chapters/
+    python chapter_parser.py --book my-book --read 12     # Thư mục Chapters của sách khác
+"""
+
+import argparse
+import mmap
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from xml.sax.saxutils import unescape
+
+from book_registry import add_book_argument
+
+SCRIPT_DIR = Path(__file__).parent
+CHAPTERS_DIR = SCRIPT_DIR.parent / "Chapters"
+
+OPEN_TAG = b"<chapter"
+CLOSE_TAG = b"</chapter>"
+TITLE_OPEN, TITLE_CLOSE = b"<title>", b"</title>"
+TEXT_OPEN, TEXT_CLOSE = b"<text>", b"</text>"
+
+ATTRIBUTE_PATTERN = re.compile(rb'(\w+)\s*=\s*"([^"]*)"')
+XML_ENTITIES = {"&quot;": '"', "&apos;": "'"}
+
+
+class ChapterSpan(NamedTuple):
+    """Vị trí (byte offset) của một chapter trong buffer, chưa decode."""
+    number: int
+    volume: int
+    start: int          # Offset của "<chapter"
+    end: int            # Offset ngay sau "</chapter>"
+    title_start: int
+    title_end: int
+    text_start: int
+    text_end: int
+
+
+def iter_chapter_spans(buffer: Union[bytes, mmap.mmap], start: int = 0) -> Iterator[ChapterSpan]:
+    """
+    Quét buffer và trả về vị trí từng chapter (không decode nội dung).
+
+    Args:
+        buffer: bytes hoặc mmap chứa file chapter
+        start: Offset bắt đầu quét
+
+    Yields:
+        ChapterSpan cho mỗi chapter hợp lệ
+    """
+    pos = start
+    while True:
+        tag_start = buffer.find(OPEN_TAG, pos)
+        if tag_start == -1:
+            return
+
+        # Bỏ qua các tag khác có cùng tiền tố, VD: <chapters>
+        next_byte = buffer[tag_start + len(OPEN_TAG):tag_start + len(OPEN_TAG) + 1]
+        if next_byte not in (b" ", b"\t", b"\n", b"\r", b">"):
+            pos = tag_start + len(OPEN_TAG)
+            continue
+
+        tag_end = buffer.find(b">", tag_start)
+        close = buffer.find(CLOSE_TAG, tag_end)
+        if tag_end == -1 or close == -1:
+            return
+
+        attributes = dict(ATTRIBUTE_PATTERN.findall(buffer[tag_start:tag_end]))
+        title_open = buffer.find(TITLE_OPEN, tag_end, close)
+        title_close = buffer.find(TITLE_CLOSE, title_open, close) if title_open != -1 else -1
+        text_open = buffer.find(TEXT_OPEN, tag_end, close)
+        text_close = buffer.rfind(TEXT_CLOSE, text_open, close) if text_open != -1 else -1
+
+        pos = close + len(CLOSE_TAG)
+        if b"number" not in attributes or title_close == -1 or text_close == -1:
+            continue
+
+        yield ChapterSpan(
+            number=int(attributes[b"number"]),
+            volume=int(attributes.get(b"volume", b"1")),
+            start=tag_start,
+            end=pos,
+            title_start=title_open + len(TITLE_OPEN),
+            title_end=title_close,
+            text_start=text_open + len(TEXT_OPEN),
+            text_end=text_close,
+        )
+
+
+def unescape_xml(text: str) -> str:
+    """Bỏ escape các entity XML cơ bản (chỉ khi có '&' để giữ nhanh cho bản không escape)."""
+    if "&" not in text:
+        return text
+    return unescape(text, XML_ENTITIES)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Chuẩn hóa nội dung chapter giống nhau cho mọi bước:
+    CRLF -> LF, gộp 3+ dòng trống liên tiếp thành một dòng trống, bỏ khoảng trắng đầu/cuối.
+    """
+    text = text.replace("\r\n", "\n")
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def decode_chapter(buffer: Union[bytes, mmap.mmap], span: ChapterSpan) -> dict:
+    """Decode và chuẩn hóa một chapter từ vị trí đã quét."""
+    title = buffer[span.title_start:span.title_end].decode("utf-8")
+    text = buffer[span.text_start:span.text_end].decode("utf-8")
+    return {
+        "id": span.number,
+        "volume": span.volume,
+        "title": unescape_xml(title).strip(),
+        "content": normalize_text(unescape_xml(text)),
+    }
+
+
+def iter_chapters(source: Union[Path, str, bytes]) -> Iterator[dict]:
+    """
+    Parse lazily các chapter trong một file (hoặc nội dung đã đọc).
+
+    Args:
+        source: Đường dẫn file, hoặc nội dung dạng str/bytes
+
+    Yields:
+        Dict {"id", "volume", "title", "content"} cho mỗi chapter
+    """
+    if isinstance(source, Path):
+        buffer = source.read_bytes()
+    elif isinstance(source, str):
+        buffer = source.encode("utf-8")
+    else:
+        buffer = source
+
+    for span in iter_chapter_spans(buffer):
+        yield decode_chapter(buffer, span)
+
+
+def parse_chapter_file(file_path: Path) -> List[dict]:
+    """Parse tất cả chapter trong một file."""
+    return list(iter_chapters(Path(file_path)))
+
+
+# ============================================================================
+# Memory-mapped reader
+# ============================================================================
+@contextmanager
+def map_file(path: Path) -> Iterator[Union[bytes, mmap.mmap]]:
+    """Memory-map một file để đọc (file rỗng trả về b"" vì mmap không hỗ trợ)."""
+    with open(path, "rb") as f:
+        if Path(path).stat().st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def index_file(path: Path) -> List[ChapterSpan]:
+    """Quét vị trí các chapter trong một file mà không decode nội dung."""
+    with map_file(path) as buffer:
+        return list(iter_chapter_spans(buffer))
+
+
+class ChapterIndex:
+    """
+    Chỉ mục chapter id -> (file, vị trí byte) cho một thư mục chapter.
+
+    Chỉ những file có mtime/size thay đổi mới được quét lại khi refresh().
+    Nếu một chapter xuất hiện ở nhiều file, file đứng sau (theo tên) được dùng.
+    Trước mỗi lần đọc, file chứa chapter được stat lại: file đã đổi thì chỉ mục
+    được refresh, nên offsets cũ không bao giờ được dùng trên nội dung mới.
+    """
+
+    def __init__(self, chapters_dir: Path = CHAPTERS_DIR, pattern: str = "*.vn.txt"):
+        self.chapters_dir = Path(chapters_dir)
+        self.pattern = pattern
+        self._files: Dict[Path, Tuple[Tuple[int, int], List[ChapterSpan]]] = {}
+        self._locations: Dict[int, Tuple[Path, ChapterSpan]] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Buộc lần refresh_if_older() tiếp theo quét lại thư mục."""
+        self._refreshed_at = None
+
+    def refresh_if_older(self, max_age: float) -> "ChapterIndex":
+        """Quét lại thư mục nếu lần quét trước đã cũ hơn `max_age` giây."""
+        refreshed_at = self._refreshed_at
+        if refreshed_at is None or time.monotonic() - refreshed_at >= max_age:
+            self.refresh()
+        return self
+
+    def refresh(self) -> "ChapterIndex":
+        """Cập nhật chỉ mục theo các file hiện có trên đĩa."""
+        with self._lock:
+            self._refreshed_at = time.monotonic()
+            files = {}
+            for path in sorted(self.chapters_dir.glob(self.pattern)):
+                stat = path.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+                cached = self._files.get(path)
+                if cached is not None and cached[0] == signature:
+                    files[path] = cached
+                else:
+                    files[path] = (signature, index_file(path))
+
+            self._files = files
+            self._locations = {
+                span.number: (path, span)
+                for path, (_, spans) in files.items()
+                for span in spans
+            }
+        return self
+
+    def ids(self) -> List[int]:
+        """Danh sách chapter id đã lập chỉ mục."""
+        return sorted(self._locations)
+
+    def locate(self, chapter_id: int) -> Optional[Tuple[Path, ChapterSpan]]:
+        """Vị trí (file, span) của một chapter, None nếu không có."""
+        return self._locations.get(chapter_id)
+
+    def read_chapters(self, chapter_ids: Iterable[int]) -> Dict[int, dict]:
+        """
+        Đọc nhiều chapter, mỗi file chỉ được map một lần.
+
+        Returns:
+            Dict chapter id -> chapter (bỏ qua id không tồn tại)
+        """
+        chapter_ids = list(chapter_ids)
+        by_file = self._spans_by_file(chapter_ids)
+        if self._changed_since_refresh(by_file):
+            self.refresh()
+            by_file = self._spans_by_file(chapter_ids)
+
+        chapters = {}
+        for path, spans in by_file.items():
+            with map_file(path) as buffer:
+                for span in spans:
+                    chapters[span.number] = decode_chapter(buffer, span)
+        return chapters
+
+    def read_chapter(self, chapter_id: int) -> Optional[dict]:
+        """Đọc một chapter (None nếu không có)."""
+        return self.read_chapters([chapter_id]).get(chapter_id)
+
+    def _spans_by_file(self, chapter_ids: Iterable[int]) -> Dict[Path, List[ChapterSpan]]:
+        by_file: Dict[Path, List[ChapterSpan]] = {}
+        for chapter_id in chapter_ids:
+            location = self.locate(chapter_id)
+            if location is not None:
+                by_file.setdefault(location[0], []).append(location[1])
+        return by_file
+
+    def _changed_since_refresh(self, paths: Iterable[Path]) -> bool:
+        """Một trong các file đã đổi (hoặc bị xoá) kể từ lần lập chỉ mục."""
+        for path in paths:
+            cached = self._files.get(path)
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return True
+            if cached is None or cached[0] != (stat.st_mtime_ns, stat.st_size):
+                return True
+        return False
+
+
+# Thư mục được quét lại nhiều nhất một lần trong khoảng này (giây) khi đọc qua
+# get_index()/read_chapter(): API đọc chapter không glob cả thư mục mỗi request.
+# Chapter mới xuất hiện sau tối đa chừng đó, hoặc ngay khi ChapterWatcher gọi invalidate_index().
+INDEX_REFRESH_INTERVAL = 2.0
+
+_indexes: Dict[Path, ChapterIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(chapters_dir: Path = CHAPTERS_DIR, max_age: float = INDEX_REFRESH_INTERVAL) -> ChapterIndex:
+    """Chỉ mục dùng chung cho một thư mục (quét lại nếu lần quét trước cũ hơn `max_age` giây)."""
+    chapters_dir = Path(chapters_dir).resolve()
+    with _indexes_lock:
+        index = _indexes.setdefault(chapters_dir, ChapterIndex(chapters_dir))
+    return index.refresh_if_older(max_age)
+
+
+def invalidate_index(chapters_dir: Path = CHAPTERS_DIR) -> None:
+    """Buộc lần đọc tiếp theo quét lại thư mục (VD: ChapterWatcher thấy file thay đổi)."""
+    index = _indexes.get(Path(chapters_dir).resolve())
+    if index is not None:
+        index.invalidate()
+
+
+def read_chapter(chapter_id: int, chapters_dir: Path = CHAPTERS_DIR) -> Optional[dict]:
+    """
+    Đọc một chapter theo id từ thư mục Chapters mà không load cả file.
+
+    Returns:
+        Dict {"id", "volume", "title", "content"}, None nếu không tìm thấy
+    """
+    return get_index(chapters_dir).read_chapter(chapter_id)
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+LEGACY_PATTERN = re.compile(
+    r'<chapter\s+number="(\d+)"\s+volume="(\d+)">\s*'
+    r'<title>(.*?)</title>\s*'
+    r'<text>(.*?)</text>\s*'
+    r'</chapter>',
+    re.DOTALL
+)
+
+
+def parse_legacy(file_path: Path) -> List[dict]:
+    """Cách parse cũ (regex DOTALL + findall), chỉ dùng để benchmark."""
+    content = file_path.read_text(encoding="utf-8")
+    return [
+        {
+            "id": int(number),
+            "volume": int(volume),
+            "title": title.strip(),
+            "content": normalize_text(text.strip()),
+        }
+        for number, volume, title, text in LEGACY_PATTERN.findall(content)
+    ]
+
+
+def benchmark(files: List[Path], repeat: int = 20) -> dict:
+    """
+    So sánh tốc độ scanner với regex cũ trên cùng một tập file.
+
+    Returns:
+        Dict thời gian (giây) cho mỗi cách và số chapter parse được
+    """
+    results = {}
+    for name, parse in (("regex", parse_legacy), ("scanner", parse_chapter_file)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            chapters = [chapter for path in files for chapter in parse(path)]
+        results[name] = {
+            "seconds": (time.perf_counter() - started) / repeat,
+            "chapters": len(chapters),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse file chapter theo định dạng <chapter>")
+    parser.add_argument("files", nargs="*", type=Path, help="Các file cần parse")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="So sánh tốc độ với regex cũ trên thư mục Chapters/")
+    parser.add_argument("--repeat", type=int, default=20, help="Số lần lặp khi benchmark")
+    parser.add_argument("--read", type=int, metavar="ID", help="Đọc một chapter theo id từ Chapters/")
+    add_book_argument(parser)
+    args = parser.parse_args()
+    chapters_dir = args.book.chapters_dir
+
+    if args.read is not None:
+        chapter = read_chapter(args.read, chapters_dir)
+        if chapter is None:
+            print(f"❌ Không tìm thấy chương {args.read}")
+            return 1
+        print(f"📖 Chương {chapter['id']} (Vol {chapter['volume']}) - {chapter['title']}")
+        print("-" * 60)
+        print(chapter["content"])
+        return 0
+
+    if args.benchmark:
+        files = args.files or sorted(chapters_dir.glob("*.vn.txt"))
+        print(f"⏱️ Benchmark {len(files)} files, {args.repeat} lần...")
+        results = benchmark(files, args.repeat)
+        for name, result in results.items():
+            print(f"   • {name:<8} {result['seconds'] * 1000:8.2f} ms  ({result['chapters']} chapters)")
+        return 0
+
+    for path in args.files:
+        for chapter in iter_chapters(path):
+            print(f"{path.name}: Chương {chapter['id']} (Vol {chapter['volume']}) - "
+                  f"{chapter['title']} [{len(chapter['content'])} ký tự]")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,469 @@
+"""
+Chapter State Store - Trạng thái từng chapter qua các bước của pipeline
+=======================================================================
+Lưu trạng thái mỗi chapter ở từng bước (scraped → translated → formatted →
+published) trong một file SQLite nhỏ, kèm hash nội dung và thời điểm cập nhật.
+Mỗi script ghi lại kết quả của mình sau khi xử lý xong, nên việc kiểm tra
+trạng thái không cần glob thư mục hay gọi `exists()` cho từng file.
+
+Mỗi bản ghi lưu `source_hash` = hash của output bước trước tại thời điểm tạo ra
+bản ghi này. Nếu output bước trước đã thay đổi thì bản ghi được coi là cũ (stale).
+Bản ghi cũng lưu mtime/size của file output, nên file sửa bằng tay được phát hiện
+(và hash lại) chỉ với một lần stat, xem `sync_files`.
+
+Mỗi sách có state store riêng (xem book_registry.py).
+
+Usage:
+    python chapter_state.py              # Xem tổng hợp trạng thái
+    python chapter_state.py --rebuild    # Đồng bộ lại từ các file trên đĩa
+    python chapter_state.py --book my-book
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pipeline_metrics
+from book_registry import add_book_argument
+
+# Đường dẫn mặc định (của sách mặc định)
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_DIR = SCRIPT_DIR.parent
+STATE_DB = SCRIPT_DIR / "chapter_state.db"
+UNTRANSLATED_DIR = SCRIPT_DIR / "Chapters_Untranslated"
+TRANSLATED_DIR = SCRIPT_DIR / "Chapters_Translated"
+CHAPTERS_DIR = PROJECT_DIR / "Chapters"
+CHAPTERS_JSON = PROJECT_DIR / "website" / "data" / "chapters.json"
+
+# Các bước theo thứ tự, bước sau lấy output của bước trước làm input
+STAGE_SCRAPED = "scraped"
+STAGE_TRANSLATED = "translated"
+STAGE_FORMATTED = "formatted"
+STAGE_PUBLISHED = "published"
+STAGES = [STAGE_SCRAPED, STAGE_TRANSLATED, STAGE_FORMATTED, STAGE_PUBLISHED]
+
+CHAPTER_FILE_PATTERN = re.compile(r'ch(\d+)(?:_(\d+))?')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chapter_state (
+    chapter_id   INTEGER NOT NULL,
+    stage        TEXT NOT NULL,
+    path         TEXT,
+    content_hash TEXT NOT NULL,
+    source_hash  TEXT,
+    updated_at   TEXT NOT NULL,
+    mtime_ns     INTEGER,
+    size         INTEGER,
+    PRIMARY KEY (chapter_id, stage)
+)
+"""
+
+# Cột thêm sau khi state store đã được tạo (ALTER TABLE cho file .db cũ)
+ADDED_COLUMNS = {"mtime_ns": "INTEGER", "size": "INTEGER"}
+
+
+def hash_text(text: str) -> str:
+    """Hash nội dung (sha256, rút gọn 16 ký tự hex)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def hash_file(path: Path) -> str:
+    """Hash nội dung một file."""
+    return hash_text(Path(path).read_text(encoding="utf-8"))
+
+
+def file_signature(path: Optional[Path]) -> tuple:
+    """(mtime_ns, size) của file, (None, None) nếu không có file."""
+    try:
+        stat = Path(path).stat() if path else None
+    except FileNotFoundError:
+        stat = None
+    return (stat.st_mtime_ns, stat.st_size) if stat else (None, None)
+
+
+def chapter_ids_from_name(name: str) -> List[int]:
+    """
+    Lấy danh sách chapter id từ tên file.
+
+    VD: "ch255.txt" -> [255], "ch157_159.vn.txt" -> [157, 158, 159]
+    """
+    match = CHAPTER_FILE_PATTERN.search(name)
+    if not match:
+        return []
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else start
+    return list(range(start, end + 1))
+
+
+def parse_chapter_ids(spec: str) -> List[int]:
+    """
+    Đọc danh sách chapter từ tham số dòng lệnh `--chapters`.
+
+    VD: "278" -> [278], "278,280-282" -> [278, 280, 281, 282]
+    """
+    chapter_ids = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        first, last = int(start), int(end or start)
+        if last < first:
+            raise ValueError(f"Khoảng chapter không hợp lệ: {part}")
+        chapter_ids.update(range(first, last + 1))
+    if not chapter_ids:
+        raise ValueError("Danh sách chapter trống")
+    return sorted(chapter_ids)
+
+
+def files_for_chapters(files: Iterable[Path], chapter_ids: Iterable[int]) -> List[Path]:
+    """Các file chứa ít nhất một chapter trong `chapter_ids` (theo tên file)."""
+    wanted = set(chapter_ids)
+    return [path for path in files if wanted.intersection(chapter_ids_from_name(Path(path).name))]
+
+
+def id_ranges(ids: Iterable[int]) -> List[List[int]]:
+    """Gộp các id liên tiếp thành khoảng [đầu, cuối] (VD: 1,2,3,5 → [[1, 3], [5, 5]])."""
+    ranges: List[List[int]] = []
+    for chapter_id in sorted(set(ids)):
+        if ranges and chapter_id == ranges[-1][1] + 1:
+            ranges[-1][1] = chapter_id
+        else:
+            ranges.append([chapter_id, chapter_id])
+    return ranges
+
+
+def previous_stage(stage: str) -> Optional[str]:
+    """Bước ngay trước `stage` (None nếu là bước đầu tiên)."""
+    index = STAGES.index(stage)
+    return STAGES[index - 1] if index > 0 else None
+
+
+class ChapterState:
+    """Truy vấn và cập nhật trạng thái chapter trong SQLite."""
+
+    def __init__(self, db_path: Path = STATE_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.count_metrics = True  # tắt khi rebuild: không phải chapter vừa được xử lý
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(chapter_state)")}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE chapter_state ADD COLUMN {column} {column_type}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Mỗi thao tác mở connection riêng: an toàn khi nhiều script/thread cùng ghi
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record(
+        self,
+        chapter_ids: Iterable[int],
+        stage: str,
+        content_hash: str,
+        source_hash: Optional[str] = None,
+        path: Optional[Path] = None,
+    ) -> None:
+        """
+        Ghi nhận một (hoặc nhiều) chapter đã hoàn thành một bước.
+
+        Args:
+            chapter_ids: Các chapter id (file gộp nhiều chapter dùng chung hash)
+            stage: Tên bước (xem STAGES)
+            content_hash: Hash output của bước này
+            source_hash: Hash input (output bước trước) đã dùng để tạo ra output
+            path: File output (mtime/size được lưu kèm)
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        mtime_ns, size = file_signature(path)
+        rows = [
+            (chapter_id, stage, str(path) if path else None, content_hash, source_hash, now, mtime_ns, size)
+            for chapter_id in chapter_ids
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chapter_state "
+                "(chapter_id, stage, path, content_hash, source_hash, updated_at, mtime_ns, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        if self.count_metrics:
+            pipeline_metrics.record("chapters_processed", len(rows), stage=stage)
+
+    def get(self, chapter_id: int, stage: str) -> Optional[dict]:
+        """Lấy bản ghi của một chapter ở một bước (None nếu chưa có)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM chapter_state WHERE chapter_id = ? AND stage = ?",
+                (chapter_id, stage),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def is_current(self, chapter_id: int, stage: str, source_hash: str) -> bool:
+        """
+        Kiểm tra output của một bước đã được tạo từ đúng input hiện tại và
+        file output vẫn còn (xoá file output là cách buộc chạy lại bước đó).
+        """
+        entry = self.get(chapter_id, stage)
+        return (
+            entry is not None and entry["source_hash"] == source_hash
+            and entry["path"] is not None and Path(entry["path"]).exists()
+        )
+
+    def chapters(self, stage: str) -> Dict[int, dict]:
+        """Tất cả bản ghi của một bước, theo chapter id."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM chapter_state WHERE stage = ? ORDER BY chapter_id", (stage,)
+            ).fetchall()
+        return {row["chapter_id"]: dict(row) for row in rows}
+
+    def sync_files(self, stage: str, files: Iterable[Path]) -> List[Path]:
+        """
+        Đồng bộ bản ghi của `stage` với các file output trên đĩa (theo tên file).
+
+        Chỉ file chưa được ghi nhận hoặc có mtime/size khác lần ghi trước mới
+        được hash lại. File sửa bằng tay mà nội dung đổi được ghi hash mới, nên
+        bước sau trở thành stale; nội dung không đổi thì chỉ cập nhật mtime/size.
+
+        Returns:
+            Các file mới hoặc có nội dung thay đổi
+        """
+        entries = {Path(entry["path"]).name: entry for entry in self.chapters(stage).values() if entry["path"]}
+        changed = []
+        self.count_metrics = False  # file thêm/sửa bằng tay, không phải chapter pipeline vừa xử lý
+        try:
+            for path in files:
+                entry = entries.get(path.name)
+                signature = file_signature(path)
+                if entry is not None and (entry["mtime_ns"], entry["size"]) == signature:
+                    continue
+                content_hash = hash_file(path)
+                ids = chapter_ids_from_name(path.name)
+                if entry is not None and entry["content_hash"] == content_hash:
+                    with self._connect() as conn:
+                        conn.executemany(
+                            "UPDATE chapter_state SET mtime_ns = ?, size = ? WHERE chapter_id = ? AND stage = ?",
+                            [(*signature, chapter_id, stage) for chapter_id in ids],
+                        )
+                    continue
+                self.record(ids, stage, content_hash, entry["source_hash"] if entry else None, path)
+                changed.append(path)
+        finally:
+            self.count_metrics = True
+        return changed
+
+    def pending(self, stage: str) -> List[dict]:
+        """
+        Các chapter cần xử lý ở bước `stage`: đã có output bước trước nhưng
+        chưa có output bước này (chưa ghi nhận, hoặc file output đã bị xoá),
+        hoặc output bước này đã cũ (stale).
+
+        Returns:
+            Bản ghi của bước trước, thêm key "stale" (True nếu đã có output nhưng cũ)
+        """
+        previous = previous_stage(stage)
+        if previous is None:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT prev.*, cur.path AS output_path, cur.chapter_id IS NOT NULL AS recorded, "
+                "  cur.source_hash IS NOT prev.content_hash AS changed "
+                "FROM chapter_state prev "
+                "LEFT JOIN chapter_state cur "
+                "  ON cur.chapter_id = prev.chapter_id AND cur.stage = ? "
+                "WHERE prev.stage = ? "
+                "ORDER BY prev.chapter_id",
+                (stage, previous),
+            ).fetchall()
+
+        exists: Dict[str, bool] = {}  # file gộp nhiều chapter (và chapters.json) chỉ stat một lần
+        pending = []
+        for row in rows:
+            entry = dict(row)
+            output_path, recorded, changed = entry.pop("output_path"), entry.pop("recorded"), entry.pop("changed")
+            if recorded and output_path is not None and output_path not in exists:
+                exists[output_path] = Path(output_path).exists()
+            has_output = bool(recorded) and output_path is not None and exists[output_path]
+            if not has_output or changed:
+                entry["stale"] = has_output
+                pending.append(entry)
+        return pending
+
+    def summary(self) -> dict:
+        """Số chapter ở mỗi bước và số chapter bị stale."""
+        with self._connect() as conn:
+            counts = dict(conn.execute(
+                "SELECT stage, COUNT(*) FROM chapter_state GROUP BY stage"
+            ).fetchall())
+        return {
+            stage: {
+                "count": counts.get(stage, 0),
+                "stale": sum(1 for entry in self.pending(stage) if entry["stale"]),
+            }
+            for stage in STAGES
+        }
+
+    def report(self) -> dict:
+        """
+        Chi tiết từng bước: số chapter, khoảng id đã có, các khoảng bị thiếu
+        (gaps) giữa id nhỏ nhất và lớn nhất, chapter stale và chapter đang chờ
+        (bước trước đã có nhưng bước này chưa).
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT chapter_id, stage FROM chapter_state").fetchall()
+        ids_by_stage: Dict[str, List[int]] = {stage: [] for stage in STAGES}
+        for row in rows:
+            ids_by_stage.setdefault(row["stage"], []).append(row["chapter_id"])
+
+        report = {}
+        for stage in STAGES:
+            ranges = id_ranges(ids_by_stage[stage])
+            gaps = [[end + 1, start - 1] for (_, end), (start, _) in zip(ranges, ranges[1:])]
+            pending = self.pending(stage)
+            stale_ids = [entry["chapter_id"] for entry in pending if entry["stale"]]
+            report[stage] = {
+                "count": len(ids_by_stage[stage]),
+                "first": ranges[0][0] if ranges else None,
+                "last": ranges[-1][1] if ranges else None,
+                "ranges": ranges,
+                "gaps": gaps,
+                "missing": sum(end - start + 1 for start, end in gaps),
+                "stale": len(stale_ids),
+                "staleRanges": id_ranges(stale_ids),
+                "pending": len(pending) - len(stale_ids),
+            }
+        return report
+
+    def count_updated(self, stage: str, since: datetime, until: datetime) -> int:
+        """Số chapter được ghi nhận ở bước `stage` trong khoảng [since, until]."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM chapter_state WHERE stage = ? AND updated_at BETWEEN ? AND ?",
+                (stage, since.isoformat(timespec="seconds"), until.isoformat(timespec="seconds")),
+            ).fetchone()[0]
+
+    def is_empty(self) -> bool:
+        """Chưa có bản ghi nào (cần rebuild từ đĩa)."""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM chapter_state LIMIT 1").fetchone() is None
+
+    def rebuild_from_disk(
+        self,
+        untranslated_dir: Path = UNTRANSLATED_DIR,
+        translated_dir: Path = TRANSLATED_DIR,
+        chapters_dir: Path = CHAPTERS_DIR,
+        chapters_json: Path = CHAPTERS_JSON,
+    ) -> dict:
+        """
+        Đồng bộ lại toàn bộ trạng thái từ các file hiện có.
+
+        Dùng khi khởi tạo lần đầu hoặc khi file được thêm/sửa bằng tay.
+        Output đang có được coi là tạo từ input hiện tại (không stale).
+
+        Returns:
+            Tổng hợp trạng thái sau khi rebuild
+        """
+        self.count_metrics = False
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM chapter_state")
+
+            scraped_hashes = {}
+            for path in sorted(untranslated_dir.glob("ch*.txt")):
+                content_hash = hash_file(path)
+                scraped_hashes[path.stem] = content_hash
+                self.record(chapter_ids_from_name(path.name), STAGE_SCRAPED, content_hash, path=path)
+
+            translated_hashes = {}
+            for path in sorted(translated_dir.glob("*.vn.txt")):
+                stem = path.name[:-len(".vn.txt")]
+                content_hash = hash_file(path)
+                translated_hashes[stem] = content_hash
+                self.record(
+                    chapter_ids_from_name(path.name), STAGE_TRANSLATED, content_hash,
+                    source_hash=scraped_hashes.get(stem), path=path,
+                )
+
+            formatted_hashes = {}
+            for path in sorted(chapters_dir.glob("*.vn.txt")):
+                stem = path.name[:-len(".vn.txt")]
+                content_hash = hash_file(path)
+                ids = chapter_ids_from_name(path.name)
+                formatted_hashes.update({chapter_id: content_hash for chapter_id in ids})
+                self.record(
+                    ids, STAGE_FORMATTED, content_hash,
+                    source_hash=translated_hashes.get(stem), path=path,
+                )
+
+            if chapters_json.exists():
+                with open(chapters_json, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for chapter in data.get("chapters", []):
+                    self.record(
+                        [chapter["id"]], STAGE_PUBLISHED, hash_text(chapter["content"]),
+                        source_hash=formatted_hashes.get(chapter["id"]), path=chapters_json,
+                    )
+        finally:
+            self.count_metrics = True
+
+        return self.summary()
+
+
+def open_state(db_path: Path = STATE_DB, sources: Optional[Dict[str, Path]] = None) -> ChapterState:
+    """
+    Mở state store, tự rebuild từ đĩa nếu đây là lần đầu sử dụng.
+
+    Args:
+        db_path: File SQLite của state store
+        sources: Thư mục/file để rebuild (tham số của `rebuild_from_disk`, xem `Book.state_sources`)
+    """
+    state = ChapterState(db_path)
+    if state.is_empty():
+        print("🗂️ State store trống, đang đồng bộ từ các file hiện có...")
+        state.rebuild_from_disk(**(sources or {}))
+    return state
+
+
+def print_summary(summary: dict):
+    """In tổng hợp trạng thái."""
+    print("=" * 60)
+    print("  🗂️ TRẠNG THÁI PIPELINE")
+    print("=" * 60)
+    for stage in STAGES:
+        info = summary[stage]
+        stale = f" (⚠️ {info['stale']} stale)" if info["stale"] else ""
+        print(f"   • {stage:<11} {info['count']:>5} chapters{stale}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Xem và đồng bộ trạng thái chapter của pipeline")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Đồng bộ lại toàn bộ trạng thái từ các file trên đĩa")
+    add_book_argument(parser)
+    args = parser.parse_args()
+    book = args.book
+
+    if args.rebuild:
+        state = ChapterState(book.state_db)
+        print(f"🔄 Đang rebuild state store của {book.slug} từ đĩa...")
+        summary = state.rebuild_from_disk(**book.state_sources())
+    else:
+        summary = book.open_state().summary()
+
+    print_summary(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,85 @@
+"""
+File Utilities - Ghi file an toàn cho các script trong pipeline
+================================================================
+Ghi file theo kiểu atomic (ghi ra file tạm rồi rename) để các bước sau
+không bao giờ đọc phải file ghi dở, kể cả khi script bị dừng giữa chừng.
+"""
+
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+
+def _current_umask() -> int:
+    """Umask của process (đọc /proc khi có, để khỏi phải đổi umask tạm thời)."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# File mới được tạo với quyền như open() thường: 0666 trừ umask
+DEFAULT_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    Ghi dữ liệu nhị phân vào file một cách atomic.
+
+    File tạm được tạo trong cùng thư mục (cùng filesystem) rồi `os.replace`
+    sang tên đích, nên file đích hoặc là bản cũ, hoặc là bản mới hoàn chỉnh.
+    File đích giữ quyền của bản cũ (file mới: 0666 trừ umask); `mkstemp` tạo
+    file 0600 nên nếu không đổi, nginx (user khác) sẽ không đọc được.
+
+    Args:
+        path: File đích
+        data: Dữ liệu cần ghi
+    """
+    path = Path(path)
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = DEFAULT_FILE_MODE
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = "utf-8") -> None:
+    """
+    Ghi nội dung text vào file một cách atomic (xem atomic_write_bytes).
+
+    Args:
+        path: File đích
+        text: Nội dung cần ghi
+        encoding: Encoding (mặc định utf-8)
+    """
+    atomic_write_bytes(path, text.encode(encoding))
+
+
+async def read_text_async(path: Path, encoding: str = "utf-8") -> str:
+    """Đọc file trong thread pool để không chặn event loop."""
+    return await asyncio.to_thread(Path(path).read_text, encoding=encoding)
+
+
+async def atomic_write_text_async(path: Path, text: str, encoding: str = "utf-8") -> None:
+    """Ghi file atomic trong thread pool để không chặn event loop."""
+    await asyncio.to_thread(atomic_write_text, path, text, encoding)
@@ -4,58 +4,67 @@ Format Translated Chapters for Website
 Chuyển đổi các chapter đã dịch sang định dạng XML cho website.
 
 Usage:
-    python format_for_website.py
+    python format_for_website.py            # Chỉ format các chapter có thay đổi
+    python format_for_website.py --force    # Format lại tất cả
+    python format_for_website.py --chapters 278-280  # Chỉ format các chapter này
+    python format_for_website.py --book my-book      # Format cho sách khác
     
 Input:
-    Chapters_Translated/*.vn.txt
+    Chapters_Translated/*.vn.txt (thư mục của sách, xem book_registry.py)
     
 Output:
-    ../Chapters/chXXX.vn.txt (định dạng XML)
+    Chapters/chXXX.vn.txt (định dạng XML)
 """
 
+import argparse
 import re
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Tuple, Optional
-
-# Thư mục làm việc
-SCRIPT_DIR = Path(__file__).parent
-INPUT_DIR = SCRIPT_DIR / "Chapters_Translated"
-OUTPUT_DIR = SCRIPT_DIR.parent / "Chapters"
-
-# Mapping chapter number to volume (điều chỉnh theo truyện của bạn)
-# Format: (start_chapter, end_chapter, volume_number)
-VOLUME_MAPPING = [
-    (1, 30, 1),
-    (31, 60, 2),
-    (61, 90, 3),
-    (91, 120, 4),
-    (121, 150, 5),
-    (151, 180, 6),
-    (181, 210, 7),
-    (211, 240, 8),
-    (241, 270, 9),
-    (271, 300, 10),
-    (301, 330, 11),
-    (331, 360, 12),
-]
-
-
-def get_volume(chapter_num: int) -> int:
+from typing import Iterable, List, Tuple, Optional
+
+from book_registry import Book, add_book_argument, load_book
+from chapter_state import (
+    STAGE_FORMATTED,
+    ChapterState,
+    files_for_chapters,
+    hash_text,
+    parse_chapter_ids,
+)
+from file_utils import atomic_write_text
+from volumes import VolumeMap, load_volume_map
+
+
+def get_volume(chapter_num: int, volumes: VolumeMap) -> Optional[int]:
     """
     Lấy volume number từ chapter number.
     
     Args:
         chapter_num: Số chapter
+        volumes: Ranh giới volume của sách (books/<slug>.json, xem volumes.py)
         
     Returns:
-        Volume number
+        Volume number, None nếu chapter nằm ngoài các volume đã cấu hình
+    """
+    return volumes.volume_for(chapter_num)
+
+
+def volume_in_files(chapter_num: int, files: Iterable[Path]) -> Optional[int]:
+    """
+    Volume ghi trong file của chapter (bản format trước đó, bản scrape từ Ko-fi).
+    
+    Returns:
+        Volume của file đầu tiên có ghi, None nếu không file nào có
     """
-    for start, end, volume in VOLUME_MAPPING:
-        if start <= chapter_num <= end:
-            return volume
-    # Mặc định nếu không tìm thấy
-    return (chapter_num - 1) // 30 + 1
+    pattern = re.compile(rf'<chapter\s+number="{chapter_num}"\s+volume="(\d+)"')
+    for path in files:
+        if path is None or not path.exists():
+            continue
+        match = pattern.search(path.read_text(encoding="utf-8"))
+        if match:
+            return int(match.group(1))
+    return None
 
 
 def parse_chapter_content(content: str, chapter_num: int) -> Tuple[str, str]:
@@ -148,26 +157,40 @@ def format_chapter_xml(chapter_num: int, volume: int, title: str, text: str, sou
     return xml_content
 
 
-def format_chapter(input_file: Path, output_file: Path) -> bool:
+def format_chapter(input_file: Path, output_file: Path, volumes: VolumeMap,
+                   scraped_file: Optional[Path] = None) -> dict:
     """
-    Format một chapter.
+    Format một chapter, chỉ ghi file khi nội dung thay đổi.
+    
+    Hàm không in log và không truy cập state store, để có thể chạy trong process pool.
     
     Args:
         input_file: File input (đã dịch)
         output_file: File output (XML)
+        volumes: Ranh giới volume của sách
+        scraped_file: File scrape gốc, dùng volume ghi trong đó nếu cấu hình chưa có
         
     Returns:
-        True nếu thành công
+        Dict kết quả: chapter_num, title, status ("written" / "unchanged" / "error"),
+        content_hash, source_hash, error, warning
     """
+    result = {"input": input_file.name, "status": "error"}
     try:
         # Lấy chapter number từ tên file
         match = re.search(r'ch(\d+)', input_file.stem)
         if not match:
-            print(f"  ⚠️ Không thể parse chapter number từ: {input_file.name}")
-            return False
+            result["error"] = "Không thể parse chapter number"
+            return result
         
         chapter_num = int(match.group(1))
-        volume = get_volume(chapter_num)
+        volume = get_volume(chapter_num, volumes)
+        if volume is None:
+            # Sách mới chưa cấu hình đủ volume: dùng volume ghi trong file thay vì bỏ chapter
+            file_volume = volume_in_files(chapter_num, [output_file, scraped_file])
+            volume = file_volume or 1
+            source = "ghi trong file" if file_volume else "mặc định"
+            result["warning"] = (f"Chưa cấu hình volume cho chương {chapter_num} "
+                                 f"({volumes.path.name}) → dùng Vol. {volume} ({source})")
         
         # Đọc nội dung
         with open(input_file, "r", encoding="utf-8") as f:
@@ -185,66 +208,155 @@ def format_chapter(input_file: Path, output_file: Path) -> bool:
             source_file=f"ch{chapter_num}.txt"
         )
         
-        # Lưu file
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(xml_content)
+        # Chỉ ghi khi nội dung khác bản hiện có (giữ nguyên mtime cho cache phía sau)
+        existing = output_file.read_text(encoding="utf-8") if output_file.exists() else None
+        if existing != xml_content:
+            atomic_write_text(output_file, xml_content)
+            result["status"] = "written"
+        else:
+            result["status"] = "unchanged"
         
-        print(f"  ✅ ch{chapter_num} - {title[:30]}{'...' if len(title) > 30 else ''}")
-        return True
+        result.update({
+            "chapter_num": chapter_num,
+            "title": title,
+            "content_hash": hash_text(xml_content),
+            "source_hash": hash_text(content),
+        })
+        return result
         
     except Exception as e:
-        print(f"  ❌ {input_file.name} - Lỗi: {e}")
+        result["error"] = str(e)
+        return result
+
+
+def output_path_for(input_file: Path, output_dir: Path) -> Path:
+    """Tạo tên file output (giữ format .vn.txt)."""
+    return output_dir / (input_file.stem.replace('.vn', '') + ".vn.txt")
+
+
+def is_up_to_date(state: ChapterState, input_file: Path, output_file: Path) -> bool:
+    """Kiểm tra output đã được format từ đúng bản dịch hiện tại."""
+    match = re.search(r'ch(\d+)', input_file.stem)
+    if not match or not output_file.exists():
         return False
+    source_hash = hash_text(input_file.read_text(encoding="utf-8"))
+    return state.is_current(int(match.group(1)), STAGE_FORMATTED, source_hash)
 
 
-def format_all_chapters():
+def format_all_chapters(force: bool = False, workers: Optional[int] = None,
+                        chapter_ids: Optional[List[int]] = None, book: Optional[Book] = None) -> Tuple[int, int]:
     """
-    Format tất cả chapters đã dịch.
+    Format các chapters đã dịch có thay đổi, song song trên nhiều process.
+    
+    Args:
+        force: Format lại tất cả, kể cả chapter không đổi
+        workers: Số process (mặc định: số CPU)
+        chapter_ids: Chỉ format các chapter này (mặc định: tất cả)
+        book: Sách cần format (mặc định: sách mặc định)
+        
+    Returns:
+        (success, total): Số file format thành công / tổng số file
     """
+    book = book or load_book()
+    input_dir, output_dir = book.translated_dir, book.chapters_dir
+    # Đọc lại map volume mỗi lần chạy (module có thể được giữ trong backend giữa các job)
+    volumes = load_volume_map(book.slug)
+    
     # Tạo thư mục output nếu chưa có
-    OUTPUT_DIR.mkdir(exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
     
     # Lấy danh sách files
-    input_files = sorted(INPUT_DIR.glob("*.vn.txt"))
+    input_files = sorted(input_dir.glob("*.vn.txt"))
+    if chapter_ids:
+        input_files = files_for_chapters(input_files, chapter_ids)
     
     if not input_files:
-        print("❌ Không tìm thấy file nào trong Chapters_Translated/")
+        print(f"❌ Không tìm thấy file nào trong {input_dir}")
         print("   Hãy chạy translate_chapters.py trước!")
-        return
+        return 0, 0
     
     print(f"📄 Format {len(input_files)} chapters sang XML...")
-    print(f"📁 Input: {INPUT_DIR}")
-    print(f"📁 Output: {OUTPUT_DIR}")
+    print(f"📁 Input: {input_dir}")
+    print(f"📁 Output: {output_dir}")
     print("-" * 60)
     
-    success = 0
-    for input_file in input_files:
-        # Tạo tên file output (giữ format .vn.txt)
-        output_name = input_file.stem.replace('.vn', '') + ".vn.txt"
-        output_file = OUTPUT_DIR / output_name
+    # Bỏ qua các chapter mà bản dịch không đổi kể từ lần format trước
+    state = book.open_state()
+    todo = [
+        input_file for input_file in input_files
+        if force or not is_up_to_date(state, input_file, output_path_for(input_file, output_dir))
+    ]
+    skipped = len(input_files) - len(todo)
+    
+    if not todo:
+        print(f"✨ Không có thay đổi! {skipped} chapters đã được format trước đó.")
+        return len(input_files), len(input_files)
+    
+    outputs = [output_path_for(input_file, output_dir) for input_file in todo]
+    scraped = [book.untranslated_dir / input_file.name.replace(".vn.txt", ".txt") for input_file in todo]
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(format_chapter, todo, outputs, repeat(volumes), scraped))
+    else:
+        results = [format_chapter(input_file, output_file, volumes, scraped_file)
+                   for input_file, output_file, scraped_file in zip(todo, outputs, scraped)]
+    
+    success = skipped
+    written = 0
+    for result, output_file in zip(results, outputs):
+        if result["status"] == "error":
+            print(f"  ❌ {result['input']} - Lỗi: {result['error']}")
+            continue
+        if result.get("warning"):
+            print(f"  ⚠️ {result['warning']}")
         
-        if format_chapter(input_file, output_file):
-            success += 1
+        success += 1
+        state.record(
+            [result["chapter_num"]], STAGE_FORMATTED,
+            result["content_hash"], result["source_hash"], output_file
+        )
+        title = result["title"]
+        if result["status"] == "written":
+            written += 1
+            print(f"  ✅ ch{result['chapter_num']} - {title[:30]}{'...' if len(title) > 30 else ''}")
+        else:
+            print(f"  ⏸️ ch{result['chapter_num']} - Không đổi")
     
     print("-" * 60)
-    print(f"✨ Hoàn thành! {success}/{len(input_files)} files")
+    print(f"✨ Hoàn thành! {success}/{len(input_files)} files "
+          f"(ghi mới: {written}, bỏ qua: {skipped}, {workers} process)")
+    return success, len(input_files)
 
 
-def main():
-    """Entry point."""
+def main(argv: Optional[List[str]] = None):
+    """Entry point (argv: tham số dòng lệnh, mặc định sys.argv)."""
+    parser = argparse.ArgumentParser(description="Format các chapter đã dịch sang XML cho website")
+    parser.add_argument("--force", "-f", action="store_true",
+                        help="Format lại tất cả chapters, kể cả chapter không đổi")
+    parser.add_argument("--workers", "-w", type=int,
+                        help="Số process chạy song song (mặc định: số CPU; backend chạy in-process dùng 1)")
+    parser.add_argument("--chapters", "-c", type=parse_chapter_ids,
+                        help="Chỉ format các chapter này (VD: 278 hoặc 278,280-282)")
+    add_book_argument(parser)
+    args = parser.parse_args(argv)
+    book = args.book
+    
     print("=" * 60)
     print("  📄 Format Chapters for Website")
     print("=" * 60)
     print()
     
     # Kiểm tra thư mục input
-    if not INPUT_DIR.exists():
-        print(f"❌ Không tìm thấy thư mục: {INPUT_DIR}")
+    if not book.translated_dir.exists():
+        print(f"❌ Không tìm thấy thư mục: {book.translated_dir}")
         print("   Hãy chạy translate_chapters.py trước để dịch chapters!")
-        return
+        return 1
     
-    format_all_chapters()
+    success, total = format_all_chapters(force=args.force, workers=args.workers, chapter_ids=args.chapters,
+                                         book=book)
+    return 0 if total and success == total else 1
 
 
 if __name__ == "__main__":
-    main()
+    exit(main())
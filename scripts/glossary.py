@@ -0,0 +1,225 @@
+"""
+Glossary Engine - Chỉ đưa vào prompt những thuật ngữ xuất hiện trong văn bản
+===========================================================================
+Glossary được lưu dạng dữ liệu có cấu trúc (glossary.json). Mỗi đoạn văn bản
+gốc được quét một lần bằng automaton Aho-Corasick để tìm tất cả tên/thuật ngữ
+xuất hiện trong đó, rồi chỉ các mục liên quan mới được đưa vào system prompt.
+Prompt vì vậy không phình ra khi glossary lớn dần.
+
+Sau khi dịch, `verify()` kiểm tra bản dịch có dùng đúng cách dịch bắt buộc
+và không dùng các cách dịch bị cấm.
+
+Cấu trúc glossary.json:
+    names / terms: danh sách mục, mỗi mục gồm
+        source          Các cách viết trong bản gốc (bỏ trống = luôn đưa vào prompt)
+        target          Cách dịch bắt buộc
+        avoid           Các cách dịch không được dùng (kiểm tra trong bản dịch)
+        note            Ghi chú thêm trong prompt
+        case_sensitive  Phân biệt hoa thường khi tìm (mặc định: true)
+        verify          Kiểm tra bản dịch phải chứa `target` (mặc định: false)
+    notes: ghi chú luôn đưa vào prompt
+    character_rules: quy tắc xưng hô/tính cách, đưa vào khi có `triggers` xuất hiện
+
+Usage:
+    python glossary.py Chapters_Untranslated/ch255.txt   # Xem các mục được đưa vào prompt
+"""
+
+import json
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+SCRIPT_DIR = Path(__file__).parent
+GLOSSARY_FILE = SCRIPT_DIR / "glossary.json"
+
+
+class AhoCorasick:
+    """Automaton Aho-Corasick: tìm nhiều pattern trong một lần duyệt văn bản."""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[str]] = [[]]
+
+    def add(self, pattern: str):
+        """Thêm một pattern (phải gọi build() sau khi thêm xong)."""
+        node = 0
+        for char in pattern:
+            if char not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[node][char] = len(self.goto) - 1
+            node = self.goto[node][char]
+        self.output[node].append(pattern)
+
+    def build(self):
+        """Tính các liên kết fail theo BFS."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Duyệt văn bản, trả về (vị trí bắt đầu, pattern) cho mỗi lần khớp."""
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for pattern in self.output[node]:
+                yield index - len(pattern) + 1, pattern
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    """Pattern khớp trọn từ (không nằm trong từ khác, VD: "Light" trong "Lightman")."""
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+class Glossary:
+    """Glossary có cấu trúc kèm bộ tìm thuật ngữ đa pattern."""
+
+    def __init__(self, data: dict):
+        self.names: List[dict] = data.get("names", [])
+        self.terms: List[dict] = data.get("terms", [])
+        self.notes: List[str] = data.get("notes", [])
+        self.character_rules: List[dict] = data.get("character_rules", [])
+
+        # Hai automaton: phân biệt hoa thường và không phân biệt (so khớp trên chữ thường)
+        self._exact = AhoCorasick()
+        self._folded = AhoCorasick()
+        for entry in self.names + self.terms:
+            for source in entry.get("source", []):
+                if entry.get("case_sensitive", True):
+                    self._exact.add(source)
+                else:
+                    self._folded.add(source.lower())
+        for rule in self.character_rules:
+            for trigger in rule.get("triggers", []):
+                self._exact.add(trigger)
+        self._exact.build()
+        self._folded.build()
+
+    @classmethod
+    def load(cls, path: Path = GLOSSARY_FILE) -> "Glossary":
+        """Đọc glossary từ file JSON."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def find_terms(self, text: str) -> Set[str]:
+        """
+        Tìm tất cả tên/thuật ngữ xuất hiện (trọn từ) trong văn bản.
+
+        Returns:
+            Tập các pattern tìm thấy (pattern không phân biệt hoa thường ở dạng chữ thường)
+        """
+        found = set()
+        for automaton, haystack in ((self._exact, text), (self._folded, text.lower())):
+            for start, pattern in automaton.iter_matches(haystack):
+                if _is_word_boundary(haystack, start, start + len(pattern)):
+                    found.add(pattern)
+        return found
+
+    @staticmethod
+    def _entry_matches(entry: dict, found: Set[str]) -> bool:
+        sources = entry.get("source", [])
+        if not sources:
+            return True
+        case_sensitive = entry.get("case_sensitive", True)
+        return any((source if case_sensitive else source.lower()) in found for source in sources)
+
+    def relevant(self, text: str) -> dict:
+        """
+        Chọn các mục glossary liên quan tới văn bản.
+
+        Returns:
+            Dict gồm names, terms, forms_of_address, profile
+        """
+        found = self.find_terms(text)
+        rules = [
+            rule for rule in self.character_rules
+            if any(trigger in found for trigger in rule.get("triggers", []))
+        ]
+        return {
+            "names": [entry for entry in self.names if self._entry_matches(entry, found)],
+            "terms": [entry for entry in self.terms if self._entry_matches(entry, found)],
+            "forms_of_address": [line for rule in rules for line in rule.get("forms_of_address", [])],
+            "profile": [line for rule in rules for line in rule.get("profile", [])],
+        }
+
+    def render_rules(self, relevant: dict) -> str:
+        """Render phần quy tắc tên & thuật ngữ cho system prompt từ kết quả của relevant()."""
+        lines = []
+
+        if relevant["names"]:
+            lines.append("**A. Tên nhân vật:**")
+            lines.append("")
+            for i, entry in enumerate(relevant["names"], 1):
+                source = entry["source"][0] if entry.get("source") else entry["avoid"][0]
+                lines.append(f"{i}.  **{source}** → Dịch thành **{entry['target']}**.")
+                if entry.get("note"):
+                    lines.append(f"    * {entry['note']}")
+                lines.append("")
+
+        lines.append("**B. Thuật ngữ cố định (Glossary):**")
+        for entry in relevant["terms"]:
+            source = entry["source"][0] if entry.get("source") else entry["avoid"][0]
+            lines.append(f"* {source} → **{entry['target']}**")
+        for note in self.notes:
+            lines.append(f"* {note}")
+
+        return "\n".join(lines)
+
+    def verify(self, source: str, translated: str) -> List[str]:
+        """
+        Kiểm tra bản dịch theo glossary.
+
+        - Mục có `verify` và xuất hiện trong bản gốc: bản dịch phải chứa `target`
+        - Mục có `avoid`: bản dịch không được chứa các cách dịch bị cấm
+
+        Returns:
+            Danh sách mô tả lỗi, rỗng nếu hợp lệ
+        """
+        found = self.find_terms(source)
+        problems = []
+        for entry in self.names + self.terms:
+            if entry.get("verify") and entry.get("source") and self._entry_matches(entry, found):
+                if entry["target"] not in translated:
+                    problems.append(f"{entry['source'][0]} → {entry['target']}")
+            for avoided in entry.get("avoid", []):
+                if avoided in translated:
+                    problems.append(f"dùng '{avoided}' thay vì '{entry['target']}'")
+        return problems
+
+
+def load_glossary(path: Optional[Path] = None) -> Glossary:
+    """Đọc glossary mặc định (hoặc từ đường dẫn chỉ định)."""
+    return Glossary.load(path or GLOSSARY_FILE)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python glossary.py <file>")
+        return 1
+
+    glossary = load_glossary()
+    text = Path(sys.argv[1]).read_text(encoding="utf-8")
+
+    print(f"🔎 Thuật ngữ tìm thấy: {', '.join(sorted(glossary.find_terms(text))) or '(không có)'}")
+    print("-" * 60)
+    print(glossary.render_rules(glossary.relevant(text)))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,164 @@
+"""
+HTTP Client Layer - Connection pool dùng chung cho translator và scraper
+=========================================================================
+Gom toàn bộ cấu hình HTTP vào một chỗ để các script không phải tự tạo
+`aiohttp.ClientSession()` mặc định cho từng lần gọi.
+
+- Connection pool giới hạn theo số tiến trình song song (keep-alive, tái sử dụng kết nối)
+- DNS cache để không phải resolve lại host API cho mỗi request
+- Timeout tách riêng: connect / đọc socket / tổng
+- Backend HTTP/2 tùy chọn qua `httpx` (nếu đã cài `httpx[http2]`)
+
+Usage:
+    async with HttpClient(concurrency=5) as client:
+        status, data = await client.request_json("POST", url, json=payload)
+"""
+
+import asyncio
+import os
+from typing import Any, Optional, Tuple
+
+import aiohttp
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# HTTP/2 cần cả extra `h2`: thiếu thì httpx.AsyncClient(http2=True) báo ImportError khi khởi tạo
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# ============================================================================
+# CONFIGURATION - Có thể ghi đè bằng biến môi trường
+# ============================================================================
+HTTP_BACKEND = os.getenv("HTTP_BACKEND", "aiohttp")              # "aiohttp" hoặc "httpx" (HTTP/2)
+KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))  # Giữ kết nối rảnh (giây)
+DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))           # Thời gian cache DNS (giây)
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))      # Timeout kết nối
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "300"))           # Timeout đọc (model trả lời chậm)
+TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "0")) or None   # 0 = không giới hạn tổng
+# ============================================================================
+
+
+class HttpClient:
+    """Client HTTP dùng chung một connection pool trong suốt vòng đời của nó."""
+
+    def __init__(
+        self,
+        concurrency: int = 5,
+        backend: str = HTTP_BACKEND,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        total_timeout: Optional[float] = TOTAL_TIMEOUT,
+    ):
+        if backend == "httpx" and not HTTP2_AVAILABLE:
+            print("⚠️ Chưa cài httpx[http2], dùng aiohttp thay thế.")
+            backend = "aiohttp"
+
+        self.concurrency = max(1, concurrency)
+        self.backend = backend
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self._session = None
+
+    async def __aenter__(self) -> "HttpClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """Tạo connection pool (gọi một lần, các request sau dùng lại)."""
+        if self._session is not None:
+            return
+
+        if self.backend == "httpx":
+            self._session = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=self.concurrency,
+                    keepalive_expiry=KEEPALIVE_TIMEOUT,
+                ),
+                timeout=httpx.Timeout(
+                    self.total_timeout,
+                    connect=self.connect_timeout,
+                    read=self.read_timeout,
+                ),
+            )
+        else:
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.concurrency,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=self.total_timeout,
+                    connect=self.connect_timeout,
+                    sock_read=self.read_timeout,
+                ),
+            )
+
+    async def close(self):
+        """Đóng toàn bộ kết nối trong pool."""
+        if self._session is None:
+            return
+        if self.backend == "httpx":
+            await self._session.aclose()
+        else:
+            await self._session.close()
+        self._session = None
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict] = None,
+        json: Any = None,
+    ) -> Tuple[int, Any]:
+        """
+        Gửi request và đọc body.
+
+        Returns:
+            (status, body): body là JSON đã parse nếu status 2xx, ngược lại là text lỗi
+        """
+        await self.open()
+
+        if self.backend == "httpx":
+            response = await self._session.request(method, url, headers=headers, json=json)
+            if 200 <= response.status_code < 300:
+                return response.status_code, response.json()
+            return response.status_code, response.text
+
+        async with self._session.request(method, url, headers=headers, json=json) as response:
+            if 200 <= response.status < 300:
+                return response.status, await response.json(content_type=None)
+            return response.status, await response.text()
+
+    async def request_text(self, method: str, url: str, headers: Optional[dict] = None) -> Tuple[int, str]:
+        """Gửi request và trả về (status, body dạng text)."""
+        await self.open()
+
+        if self.backend == "httpx":
+            response = await self._session.request(method, url, headers=headers)
+            return response.status_code, response.text
+
+        async with self._session.request(method, url, headers=headers) as response:
+            return response.status, await response.text()
+
+
+def is_timeout_error(error: Exception) -> bool:
+    """Kiểm tra lỗi timeout cho cả hai backend."""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    return httpx is not None and isinstance(error, httpx.TimeoutException)
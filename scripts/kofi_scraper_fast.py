@@ -21,6 +21,7 @@ Cách sử dụng:
 Tùy chọn:
    --parallel 3    Số tab chạy song song (mặc định: 3)
    --delay 500     Delay giữa các request (ms, mặc định: 500)
+   --book my-book  Sách (thư mục lưu, bảng volume, state store - xem book_registry.py)
 """
 
 import asyncio
@@ -29,15 +30,33 @@ import json
 import re
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 
 try:
     import websockets
-    import aiohttp
+    from http_client import HttpClient
 except ImportError:
     print("Cần cài đặt: pip install websockets aiohttp")
     exit(1)
 
+from book_registry import Book, add_book_argument, load_book
+from chapter_state import STAGE_SCRAPED, ChapterState, hash_text
+import pipeline_metrics
+from volumes import load_volume_map
+
+# Sách đang scrape (mặc định: sách mặc định). Scraper luôn chạy trong process riêng
+# nên sách được chọn một lần cho cả process bằng `use_book`.
+BOOK = load_book()
+# Ranh giới volume của sách (books/<slug>.json), tự mở rộng khi gặp "Vol." mới
+VOLUMES = load_volume_map(BOOK.slug)
+
+
+def use_book(book: Book):
+    """Chọn sách cho process này: thư mục lưu, state store và bảng volume."""
+    global BOOK, VOLUMES
+    BOOK = book
+    VOLUMES = load_volume_map(book.slug)
+
 
 class FastKofiScraper:
     """Scraper tối ưu với parallel processing"""
@@ -48,25 +67,28 @@ class FastKofiScraper:
         self.delay_ms = delay_ms
         self.sessions: Dict[str, dict] = {}
         self.message_counters: Dict[str, int] = {}
+        # Connection pool dùng chung cho các lệnh HTTP tới Chrome DevTools
+        self.http = HttpClient(concurrency=parallel_tabs, connect_timeout=5, read_timeout=30)
+    
+    async def close(self):
+        """Đóng connection pool HTTP"""
+        await self.http.close()
         
     async def get_tabs(self) -> List[dict]:
         """Lấy danh sách tabs từ Chrome"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'http://localhost:{self.debug_port}/json') as resp:
-                return await resp.json()
+        _, tabs = await self.http.request_json('GET', f'http://localhost:{self.debug_port}/json')
+        return tabs
     
     async def create_new_tab(self, url: str = 'about:blank') -> dict:
         """Tạo tab mới trong Chrome"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f'http://localhost:{self.debug_port}/json/new?{url}'
-            ) as resp:
-                return await resp.json()
+        _, tab = await self.http.request_json(
+            'GET', f'http://localhost:{self.debug_port}/json/new?{url}'
+        )
+        return tab
     
     async def close_tab(self, tab_id: str):
         """Đóng tab"""
-        async with aiohttp.ClientSession() as session:
-            await session.get(f'http://localhost:{self.debug_port}/json/close/{tab_id}')
+        await self.http.request_text('GET', f'http://localhost:{self.debug_port}/json/close/{tab_id}')
     
     async def connect_to_tab(self, tab: dict) -> websockets.WebSocketClientProtocol:
         """Kết nối WebSocket đến tab"""
@@ -126,8 +148,12 @@ class FastKofiScraper:
     
     async def navigate_and_wait(self, tab_id: str, url: str) -> bool:
         """Navigate đến URL và đợi load xong"""
+        start_time = asyncio.get_event_loop().time()
         await self.send_command(tab_id, 'Page.navigate', {'url': url})
-        return await self.wait_for_page_load(tab_id)
+        loaded = await self.wait_for_page_load(tab_id)
+        pipeline_metrics.record("scraper_page_load_seconds", asyncio.get_event_loop().time() - start_time,
+                                loaded=loaded)
+        return loaded
     
     async def execute_js(self, tab_id: str, expression: str):
         """Thực thi JavaScript"""
@@ -251,8 +277,16 @@ class FastKofiScraper:
         
         return all_chapters
     
-    async def scrape_sequential_with_next(self, start_url: str, count: int) -> List[dict]:
-        """Scrape tuần tự theo link Next Chapter - nhưng tối ưu hơn"""
+    async def scrape_sequential_with_next(
+        self, start_url: str, count: int,
+        on_chapters: Optional[Callable[[List[dict]], None]] = None
+    ) -> List[dict]:
+        """
+        Scrape tuần tự theo link Next Chapter - nhưng tối ưu hơn.
+        
+        on_chapters (nếu có) được gọi ngay sau mỗi bài với các chapter vừa lấy,
+        để lưu từng chapter mà không đợi scrape xong tất cả.
+        """
         all_chapters = []
         current_url = start_url
         
@@ -288,6 +322,8 @@ class FastKofiScraper:
                 
                 for ch in chapters:
                     print(f"   ✅ Chapter {ch['id']}: {ch['title'][:40]}...")
+                if on_chapters and chapters:
+                    on_chapters(chapters)
                 
                 # Next URL
                 if data.get('nextChapterUrl') and i < count - 1:
@@ -351,7 +387,12 @@ def clean_text(text: str) -> str:
 def parse_chapters_from_content(content: str, title: str) -> List[dict]:
     """Parse chapters từ content"""
     vol_match = re.search(r'Vol\.?\s*(\d+)', title, re.IGNORECASE)
-    volume = int(vol_match.group(1)) if vol_match else 1
+    title_volume = int(vol_match.group(1)) if vol_match else None
+    
+    def volume_for(chapter_num: int) -> int:
+        # Đối chiếu "Vol." trong tiêu đề với cấu hình volume của sách
+        volume = VOLUMES.reconcile(chapter_num, title_volume)
+        return volume if volume is not None else 1
     
     pattern = r'\[Vol\.\s*\d+\]\s*Chapter\s*(\d+):\s*([^\n]+)'
     matches = list(re.finditer(pattern, content, re.IGNORECASE))
@@ -369,7 +410,7 @@ def parse_chapters_from_content(content: str, title: str) -> List[dict]:
             
             chapters.append({
                 'id': chapter_num,
-                'volume': volume,
+                'volume': volume_for(chapter_num),
                 'title': chapter_title,
                 'content': chapter_content
             })
@@ -379,7 +420,7 @@ def parse_chapters_from_content(content: str, title: str) -> List[dict]:
         
         chapters.append({
             'id': chapter_num,
-            'volume': volume,
+            'volume': volume_for(chapter_num),
             'title': title,
             'content': clean_text(content)
         })
@@ -422,12 +463,13 @@ def save_chapters(chapters: List[dict], output_dir: Path = None) -> Path:
     if output_dir:
         output_path = Path(output_dir) / filename
     else:
-        output_path = Path(__file__).parent / 'Chapters_Untranslated' / filename
+        output_path = BOOK.untranslated_dir / filename
     
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     xml_content = format_to_xml(chapters)
     output_path.write_text(xml_content, encoding='utf-8')
+    ChapterState(BOOK.state_db).record(chapter_ids, STAGE_SCRAPED, hash_text(xml_content), path=output_path)
     
     return output_path
 
@@ -440,14 +482,17 @@ async def main_async(args):
         delay_ms=args.delay
     )
     
-    if args.urls:
-        # Scrape nhiều URLs song song
-        print(f"🚀 Parallel scraping {len(args.urls)} URLs (max {args.parallel} đồng thời)...")
-        chapters = await scraper.scrape_urls_parallel(args.urls)
-    else:
-        # Scrape tuần tự theo Next Chapter
-        print(f"🚀 Sequential scraping từ {args.url}, {args.count} bài viết...")
-        chapters = await scraper.scrape_sequential_with_next(args.url, args.count)
+    try:
+        if args.urls:
+            # Scrape nhiều URLs song song
+            print(f"🚀 Parallel scraping {len(args.urls)} URLs (max {args.parallel} đồng thời)...")
+            chapters = await scraper.scrape_urls_parallel(args.urls)
+        else:
+            # Scrape tuần tự theo Next Chapter
+            print(f"🚀 Sequential scraping từ {args.url}, {args.count} bài viết...")
+            chapters = await scraper.scrape_sequential_with_next(args.url, args.count)
+    finally:
+        await scraper.close()
     
     if chapters:
         output_path = save_chapters(chapters, args.output)
@@ -488,8 +533,10 @@ Ví dụ sử dụng:
                         help='Số tabs chạy song song (mặc định: 3)')
     parser.add_argument('--delay', type=int, default=500,
                         help='Delay giữa các batch (ms, mặc định: 500)')
+    add_book_argument(parser)
     
     args = parser.parse_args()
+    use_book(args.book)
     
     print("""
 ╔════════════════════════════════════════════════════════════╗
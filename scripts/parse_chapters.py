@@ -4,39 +4,14 @@ Handles multi-chapter XML files from the Chapters directory.
 """
 
 import os
-import re
 import json
 from pathlib import Path
 
+import chapter_parser
+
 def parse_chapter_file(filepath):
-    """Parse a single chapter file and extract individual chapters."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    chapters = []
-    
-    # Find all chapter blocks
-    chapter_pattern = r'<chapter number="(\d+)" volume="(\d+)">\s*<title>(.*?)</title>\s*<text>(.*?)</text>\s*</chapter>'
-    matches = re.findall(chapter_pattern, content, re.DOTALL)
-    
-    for match in matches:
-        chapter_num = int(match[0])
-        volume = int(match[1])
-        title = match[2].strip()
-        text = match[3].strip()
-        
-        # Clean up the text - remove extra whitespace but keep paragraph structure
-        paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
-        clean_text = '\n\n'.join(paragraphs)
-        
-        chapters.append({
-            'id': chapter_num,
-            'volume': volume,
-            'title': title,
-            'content': clean_text
-        })
-    
-    return chapters
+    """Parse a single chapter file and extract individual chapters (shared parser)."""
+    return chapter_parser.parse_chapter_file(Path(filepath))
 
 def main():
     # Paths
@@ -0,0 +1,56 @@
+"""
+Pipeline Metrics - Gửi số liệu từ các script về backend
+=======================================================
+Các script gọi `record(...)` tại chỗ có số liệu (token dịch, số lần retry,
+thời gian load trang, số chapter xử lý). Backend gom lại và xuất ở /metrics.
+
+- Chạy trong backend (in-process): backend đăng ký hàm nhận qua `set_recorder`.
+- Chạy như subprocess của backend (PIPELINE_METRICS=1): mỗi số liệu được in
+  thành một dòng `##metric {...}`, backend tách dòng này khỏi log.
+- Chạy tay từ dòng lệnh: không làm gì cả.
+"""
+
+import json
+import os
+from typing import Callable, Optional, Tuple
+
+METRICS_ENV = "PIPELINE_METRICS"
+METRIC_LINE_PREFIX = "##metric "
+
+Recorder = Callable[[str, float, dict], None]
+
+_recorder: Optional[Recorder] = None
+
+
+def set_recorder(recorder: Optional[Recorder]) -> None:
+    """Đăng ký hàm nhận số liệu (backend, khi script chạy in-process)."""
+    global _recorder
+    _recorder = recorder
+
+
+def record(name: str, value: float = 1, **labels) -> None:
+    """
+    Ghi một số liệu.
+
+    Args:
+        name: Tên số liệu (VD: "translation_tokens")
+        value: Giá trị (số lượng cộng thêm, hoặc thời gian tính bằng giây)
+        labels: Nhãn phân loại (VD: type="prompt")
+    """
+    labels = {key: str(label) for key, label in labels.items()}
+    if _recorder is not None:
+        _recorder(name, value, labels)
+    elif os.environ.get(METRICS_ENV) == "1":
+        line = json.dumps({"name": name, "value": value, "labels": labels}, ensure_ascii=False)
+        print(f"{METRIC_LINE_PREFIX}{line}", flush=True)
+
+
+def parse_metric_line(line: str) -> Optional[Tuple[str, float, dict]]:
+    """Tách (name, value, labels) từ một dòng output, None nếu không phải dòng số liệu."""
+    if not line.startswith(METRIC_LINE_PREFIX):
+        return None
+    try:
+        data = json.loads(line[len(METRIC_LINE_PREFIX):])
+        return data["name"], float(data["value"]), dict(data.get("labels") or {})
+    except (ValueError, KeyError, TypeError):
+        return None
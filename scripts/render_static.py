@@ -0,0 +1,162 @@
+"""
+Render Static - Tạo trang HTML tĩnh cho từng chapter
+====================================================
+Dùng chính template `reader.html` của sách (do create_book.py tạo) để render
+sẵn mỗi chapter (từ chapters.json của sách, xem book_registry.py) thành
+`website/books/<slug>/chapters/<id>.html`: đúng <title>,
+nội dung đã escape, link chương trước/sau. nginx phục vụ trực tiếp, người đọc
+thấy nội dung ngay sau một request HTML nhỏ và đọc được cả khi không có JS.
+reader.js nhận ra trang đã render sẵn (`data-prerendered`) và không render lại.
+
+Chỉ ghi các trang có nội dung thay đổi, xóa trang của chapter không còn tồn tại.
+
+Usage:
+    python render_static.py                  # Render tất cả chapter
+    python render_static.py --book my-book   # Render cho sách khác
+"""
+
+import argparse
+import html
+import json
+import re
+from pathlib import Path
+from typing import List, Optional
+
+import chapter_archive
+from book_registry import Book, add_book_argument, load_book
+from file_utils import atomic_write_text
+
+OUTPUT_SUBDIR = "chapters"
+
+
+def replace_once(pattern: str, replacement, template: str, flags: int = 0) -> str:
+    """Thay thế đúng một vị trí trong template, báo lỗi nếu template thiếu phần tử cần thiết."""
+    result, count = re.subn(pattern, replacement, template, count=1, flags=flags)
+    if count != 1:
+        raise ValueError(f"Template reader.html không có phần tử cần thiết: {pattern}")
+    return result
+
+
+def page_name(chapter_id: int) -> str:
+    """Đường dẫn trang của một chapter, tương đối với thư mục sách."""
+    return f"{OUTPUT_SUBDIR}/{chapter_id}.html"
+
+
+def nav_button(direction: str, element_id: str, label_html: str, target: Optional[int]) -> str:
+    """Nút chương trước/sau: link thật nếu có chương, nút disabled nếu không."""
+    if target is None:
+        return f'<button class="chapter-nav-btn {direction}" id="{element_id}" disabled>{label_html}</button>'
+    return f'<a class="chapter-nav-btn {direction}" id="{element_id}" href="{page_name(target)}">{label_html}</a>'
+
+
+def render_chapter(template: str, chapter: dict, book_title: str,
+                   prev_id: Optional[int], next_id: Optional[int]) -> str:
+    """
+    Render một chapter từ template reader.html.
+
+    Args:
+        template: Nội dung reader.html của sách
+        chapter: Chapter {"id", "volume", "title", "content", ...}
+        book_title: Tên sách (cho <title>)
+        prev_id / next_id: Chapter trước/sau (None nếu không có)
+
+    Returns:
+        HTML hoàn chỉnh của trang
+    """
+    title = html.escape(chapter["title"], quote=False)
+    heading = f"Chương {chapter['id']}: {title}"
+    paragraphs = "\n".join(
+        f"                <p>{html.escape(line.strip(), quote=False)}</p>"
+        for line in chapter["content"].split("\n") if line.strip()
+    )
+
+    page = template
+    # Trang nằm trong chapters/, <base> giữ nguyên các đường dẫn tương đối của template
+    page = replace_once(r'(<meta charset="UTF-8">)', r'\1\n    <base href="../">', page)
+    page = replace_once(r'<title>.*?</title>',
+                        lambda m: f"<title>{heading} - {html.escape(book_title, quote=False)}</title>", page)
+    page = replace_once(r'<body class="reader-page">',
+                        f'<body class="reader-page" data-prerendered="{chapter["id"]}">', page)
+    page = replace_once(r'(id="chapterTitle">)[^<]*', lambda m: m.group(1) + title, page)
+    page = replace_once(r'(id="chapterNumber">)[^<]*', lambda m: f"{m.group(1)}Chương {chapter['id']}", page)
+    page = replace_once(r'(id="volumeTag">)[^<]*', lambda m: f"{m.group(1)}Volume {chapter['volume']}", page)
+    page = replace_once(r'(id="chapterHeading">)[^<]*', lambda m: m.group(1) + heading, page)
+    page = replace_once(r'(<div class="chapter-text" id="chapterText">).*?(</div>\s*</article>)',
+                        lambda m: f"{m.group(1)}\n{paragraphs}\n            {m.group(2)}", page, re.DOTALL)
+    page = replace_once(r'<button class="chapter-nav-btn prev" id="prevChapter"[^>]*>(.*?)</button>',
+                        lambda m: nav_button("prev", "prevChapter", m.group(1), prev_id), page, re.DOTALL)
+    page = replace_once(r'<button class="chapter-nav-btn next" id="nextChapter"[^>]*>(.*?)</button>',
+                        lambda m: nav_button("next", "nextChapter", m.group(1), next_id), page, re.DOTALL)
+    # Script không chặn việc hiển thị nội dung đã render sẵn
+    page = page.replace('<script src="', '<script defer src="')
+    return page
+
+
+def load_chapters(json_path: Path) -> dict:
+    """Dữ liệu sách: từ archive nếu mới nhất, nếu không thì từ chapters.json."""
+    data = chapter_archive.read_book_data(json_path)
+    if data is None:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    return data
+
+
+def render_all(book: Optional[Book] = None) -> dict:
+    """
+    Render trang tĩnh cho tất cả chapter của một sách (mặc định: sách mặc định).
+
+    Returns:
+        Dict thống kê: written, unchanged, removed
+    """
+    book = book or load_book()
+    book_dir = book.website_dir
+    template = (book_dir / "reader.html").read_text(encoding="utf-8")
+    data = load_chapters(book.chapters_json)
+    chapters: List[dict] = sorted(data.get("chapters", []), key=lambda c: c["id"])
+    book_title = data.get("bookTitle", book.title)
+
+    output_dir = book_dir / OUTPUT_SUBDIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    stats = {"written": 0, "unchanged": 0, "removed": 0}
+    for index, chapter in enumerate(chapters):
+        prev_id = chapters[index - 1]["id"] if index > 0 else None
+        next_id = chapters[index + 1]["id"] if index + 1 < len(chapters) else None
+        page = render_chapter(template, chapter, book_title, prev_id, next_id)
+
+        path = book_dir / page_name(chapter["id"])
+        if path.exists() and path.read_text(encoding="utf-8") == page:
+            stats["unchanged"] += 1
+            continue
+        atomic_write_text(path, page)
+        stats["written"] += 1
+
+    # Xóa trang của các chapter không còn trong dữ liệu
+    expected = {f"{chapter['id']}.html" for chapter in chapters}
+    for path in output_dir.glob("*.html"):
+        if path.name not in expected:
+            path.unlink()
+            stats["removed"] += 1
+
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Render trang HTML tĩnh cho từng chapter")
+    add_book_argument(parser)
+    args = parser.parse_args(argv)
+
+    book_dir = args.book.website_dir
+    if not (book_dir / "reader.html").exists():
+        print(f"❌ Không tìm thấy template: {book_dir / 'reader.html'}")
+        return 1
+
+    print(f"🖨️ Render trang tĩnh cho {args.book.slug} → {book_dir / OUTPUT_SUBDIR}")
+    stats = render_all(args.book)
+    print(f"✅ Đã ghi {stats['written']} trang, {stats['unchanged']} trang không đổi"
+          + (f", xóa {stats['removed']} trang cũ" if stats["removed"] else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
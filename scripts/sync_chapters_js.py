@@ -2,85 +2,117 @@
 """
 Script to sync chapters.json to chapters.js
 
-This script reads website/data/chapters.json and updates website/js/chapters.js
+This script reads a book's chapters.json and updates its js/chapters.js
 to match, wrapping the JSON data in a JavaScript variable declaration.
+When the chapter archive (chapters.pack/.idx) is up to date it is read instead.
+Both paths come from the book registry (--book, see book_registry.py).
+
+The paragraph offsets precomputed by update_chapters_json.py go to their own
+file next to chapters.js (js/paragraph-offsets.js): the reader loads it in the
+background to save and restore reading positions, so the chapters.js that every
+page view downloads stays small.
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
+from typing import List, Optional
+
+import chapter_archive
+from book_registry import Book, add_book_argument, load_book
+
+# Paragraph offsets are shipped in this file (next to chapters.js) instead of chapters.js
+OFFSETS_JS_NAME = "paragraph-offsets.js"
 
 
-def get_project_root():
-    """Get project root directory"""
-    script_dir = Path(__file__).parent
-    return script_dir.parent
+def write_js(path: Path, variable: str, data) -> Optional[int]:
+    """Write `const <variable> = <data>;` to a JS file; returns the size, None on error."""
+    js_content = f"""// Auto-generated chapter data
+const {variable} = {data};
+"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(js_content)
+    except Exception as e:
+        print(f"❌ Error: Failed to write {path.name} - {e}")
+        return None
+    return len(js_content)
 
 
-def sync_chapters_js():
-    """Sync chapters.json to chapters.js"""
-    project_root = get_project_root()
+def sync_chapters_js(book: Optional[Book] = None):
+    """Sync a book's chapters.json to its chapters.js (default book if not given)"""
+    book = book or load_book()
     
     # Paths
-    json_path = project_root / "website" / "data" / "chapters.json"
-    js_path = project_root / "website" / "books" / "max-level-priest" / "js" / "chapters.js"
+    json_path = book.chapters_json
+    js_path = book.chapters_js
+    offsets_path = js_path.with_name(OFFSETS_JS_NAME)
     
-    print(f"🔄 Syncing chapters.json to chapters.js...")
+    print(f"🔄 Syncing chapters.json to chapters.js ({book.slug})...")
     print(f"   Source: {json_path}")
     print(f"   Target: {js_path}")
     
-    # Read chapters.json
-    if not json_path.exists():
+    # Read from the archive when it is up to date, otherwise from chapters.json
+    chapters_data = chapter_archive.read_book_data(json_path)
+    if chapters_data is not None:
+        print(f"   📦 Reading from archive: {chapter_archive.archive_paths(json_path)[0].name}")
+    elif not json_path.exists():
         print(f"❌ Error: chapters.json not found at {json_path}")
         return False
-    
-    try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            chapters_data = json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"❌ Error: Failed to parse chapters.json - {e}")
-        return False
-    except Exception as e:
-        print(f"❌ Error: Failed to read chapters.json - {e}")
-        return False
+    else:
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                chapters_data = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"❌ Error: Failed to parse chapters.json - {e}")
+            return False
+        except Exception as e:
+            print(f"❌ Error: Failed to read chapters.json - {e}")
+            return False
     
     # Update totalChapters count
+    offsets = {}
     if "chapters" in chapters_data:
         chapters_data["totalChapters"] = len(chapters_data["chapters"])
         print(f"   📊 Total chapters: {chapters_data['totalChapters']}")
+        # Move the per-paragraph offsets out of chapters.js into their own file
+        for chapter in chapters_data["chapters"]:
+            chapter_offsets = chapter.pop("paragraphOffsets", None)
+            if chapter_offsets is not None:
+                offsets[chapter["id"]] = chapter_offsets
     
     # Format JSON with proper indentation
     json_content = json.dumps(chapters_data, ensure_ascii=False, indent=2)
     
-    # Create JavaScript content
-    js_content = f"""// Auto-generated chapter data
-const chaptersData = {json_content};
-"""
-    
-    # Ensure directory exists
-    js_path.parent.mkdir(parents=True, exist_ok=True)
-    
     # Write to chapters.js
-    try:
-        with open(js_path, 'w', encoding='utf-8') as f:
-            f.write(js_content)
-    except Exception as e:
-        print(f"❌ Error: Failed to write chapters.js - {e}")
+    js_size = write_js(js_path, "chaptersData", json_content)
+    if js_size is None:
+        return False
+    
+    offsets_size = write_js(offsets_path, "paragraphOffsetsData", json.dumps(offsets, separators=(",", ":")))
+    if offsets_size is None:
         return False
     
     print(f"✅ Successfully synced chapters.js!")
-    print(f"   📝 File size: {len(js_content):,} bytes")
+    print(f"   📝 File size: {js_size:,} bytes")
+    print(f"   📝 {offsets_path.name}: {offsets_size:,} bytes ({len(offsets)} chapters)")
     
     return True
 
 
-def main():
-    """Main entry point"""
+def main(argv: Optional[List[str]] = None):
+    """Main entry point (argv: tham số dòng lệnh, mặc định sys.argv)"""
+    parser = argparse.ArgumentParser(description="Sync chapters.json to chapters.js")
+    add_book_argument(parser)
+    args = parser.parse_args(argv)
+    
     print("=" * 50)
     print("📦 Sync Chapters.json to Chapters.js")
     print("=" * 50)
     
-    success = sync_chapters_js()
+    success = sync_chapters_js(args.book)
     
     if success:
         print("\n✅ Sync completed successfully!")
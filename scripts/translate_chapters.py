@@ -5,18 +5,43 @@ Dịch các chương từ tiếng Anh sang tiếng Việt sử dụng OpenAI API
 Chạy 5 tiến trình song song để tăng tốc độ.
 
 Usage:
-    python translate_chapters.py
+    python translate_chapters.py                     # Dịch các chapter chưa dịch / bản dịch cũ
+    python translate_chapters.py --chapters 278-280  # Chỉ dịch các chapter này
+    python translate_chapters.py --force             # Dịch lại kể cả chapter đã dịch
+    python translate_chapters.py --status            # Chỉ xem trạng thái
+    python translate_chapters.py --book my-book      # Dịch cho sách khác (thư mục + glossary riêng)
     
 Configuration:
     Điều chỉnh API_BASE_URL, API_KEY, và MODEL_NAME bên dưới trước khi chạy.
 """
 
+import argparse
 import asyncio
-import os
-import re
 from pathlib import Path
 from typing import Optional
-import aiohttp
+
+from book_registry import Book, add_book_argument, load_book
+from chapter_state import (
+    STAGE_SCRAPED,
+    STAGE_TRANSLATED,
+    ChapterState,
+    chapter_ids_from_name,
+    files_for_chapters,
+    hash_text,
+    parse_chapter_ids,
+)
+from glossary import Glossary, load_glossary
+from file_utils import atomic_write_text_async, read_text_async
+from http_client import HttpClient, is_timeout_error
+import pipeline_metrics
+from translation_validator import (
+    HARD_ISSUES,
+    issue_type,
+    paragraph_separator,
+    split_in_half,
+    split_segments,
+    validate_segment,
+)
 
 # ============================================================================
 # CONFIGURATION - Điều chỉnh các giá trị này theo API của bạn
@@ -26,64 +51,60 @@ API_KEY = "dat4512"                    # API key (để trống nếu không c
 MODEL_NAME = "gemini-3-flash-preview"                        # Tên model sử dụng
 MAX_CONCURRENT = 5                          # Số tiến trình song song
 MAX_RETRIES = 3                             # Số lần retry khi lỗi
+MAX_SEGMENT_RETRIES = 2                     # Số lần dịch lại một segment không đạt kiểm tra
+READ_AHEAD = 5                              # Số chapter đọc sẵn chờ tới lượt gọi API
 # ============================================================================
 
-# Thư mục làm việc
-SCRIPT_DIR = Path(__file__).parent
-INPUT_DIR = SCRIPT_DIR / "Chapters_Untranslated"
-OUTPUT_DIR = SCRIPT_DIR / "Chapters_Translated"
+# Thư mục làm việc và glossary (tên nhân vật, thuật ngữ, quy tắc nhân vật) lấy theo sách
+# được chọn (`--book`, xem book_registry.py). Glossary được truyền xuống từng hàm thay vì
+# để trong biến global: backend có thể dịch nhiều sách cùng lúc trong cùng process.
 
-# System prompt với đầy đủ quy tắc dịch thuật
-SYSTEM_PROMPT = """Bạn là một biên dịch viên tiểu thuyết Fantasy chuyên nghiệp. Nhiệm vụ của bạn là dịch văn bản sang tiếng Việt, tuân thủ nghiêm ngặt các thiết lập thế giới và nhân vật dưới đây.
+# System prompt - phần glossary và quy tắc nhân vật được điền theo từng đoạn văn bản
+SYSTEM_PROMPT_TEMPLATE = """Bạn là một biên dịch viên tiểu thuyết Fantasy chuyên nghiệp. Nhiệm vụ của bạn là dịch văn bản sang tiếng Việt, tuân thủ nghiêm ngặt các thiết lập thế giới và nhân vật dưới đây.
 
 ### 1. QUY TẮC DỊCH TÊN & THUẬT NGỮ (BẮT BUỘC)
 
-**A. Tên nhân vật:**
-
-1.  **Violet** → Dịch thành **Willis**.
-
-2.  **Light** → Dịch thành **Bé Quang**.
-
-    * *Ngoại lệ:* Nếu "Light" nằm trong Họ tên (Surname) người khác → Giữ nguyên (VD: Mr. Lightman).
-
-3.  **Xiao Guang** → Dịch thành **Tiểu Quang**.
-**B. Thuật ngữ cố định (Glossary):**
-* Tư tế → **Mục sư**
-* Great Era → **Đại Thế**
-* Thần vực → **Thần quốc**
-* Nữ thần đất → **Đại Địa Mẫu Thần**
-* Spirit Veil → **Linh Ẩn**
-* Bình Minh → **Hy**
-* Nguyên giới → **Khởi Nguyên chi địa**
-* Thần tính → **Thần cách**
-* Hen → **Ngấn**
-* Tử vong linh hồn → **Vong Hồn**
-* **Lưu ý:** Tên trang bị, vật phẩm, kỹ năng phải dịch theo âm **Hán Việt** (trang trọng).
+{glossary_rules}
 ### 2. MA TRẬN XƯNG HÔ (QUAN TRỌNG)
-Narrator sẽ gọi Willis là cô/ tiểu thư mực sư nào đó theo ngữ cảnh.
-Willis và Tiểu Quang và Quang là ba nhân vật rất thân thiết
-*Các nhân vật phụ khác:* Dịch linh hoạt theo bối cảnh (Tôi/Cậu, Ta/Ngươi, Ngài...).
-### 3. VĂN PHONG & TÍNH CÁCH Willis
+{forms_of_address}*Các nhân vật phụ khác:* Dịch linh hoạt theo bối cảnh (Tôi/Cậu, Ta/Ngươi, Ngài...).
+### 3. VĂN PHONG
 * **Phong cách:** Tiểu thuyết phương Tây (Western Fantasy). Câu văn mượt mà, hạn chế từ ngữ quá đậm chất kiếm hiệp trong hội thoại đời thường.
-* **Tâm lý Willis:**
-    * Thể chất Thần tộc: "Ngoài nóng trong lạnh".
-    * **Phản ứng cơ thể:** Có thể sốc, run rẩy, sợ hãi, ngây người
-    * **Nội tâm:** Tuyệt đối bình tĩnh, logic và lạnh lùng. Cảm xúc thể xác không ảnh hưởng đến tư duy.
-    * *Yêu cầu:* Tách biệt rõ hai trạng thái này khi dịch đoạn nội tâm và miêu tả ngoại hình.
-### 4. YÊU CẦU ĐẦU RA
+{character_profile}### 4. YÊU CẦU ĐẦU RA
 * Chỉ xuất ra bản dịch tiếng Việt.
 * Không thêm bình luận hay giải thích.
 * Giữ nguyên format paragraph của văn bản gốc."""
-async def translate_with_api(session: aiohttp.ClientSession, text: str) -> Optional[str]:
+
+
+def build_system_prompt(text: str, glossary: Glossary) -> str:
+    """
+    Tạo system prompt chỉ chứa các mục glossary và quy tắc nhân vật xuất hiện trong văn bản.
+    
+    Args:
+        text: Đoạn văn bản gốc sẽ được dịch
+        glossary: Glossary của sách
+        
+    Returns:
+        System prompt hoàn chỉnh
+    """
+    relevant = glossary.relevant(text)
+    return SYSTEM_PROMPT_TEMPLATE.format(
+        glossary_rules=glossary.render_rules(relevant),
+        forms_of_address="".join(f"{line}\n" for line in relevant["forms_of_address"]),
+        character_profile="".join(f"{line}\n" for line in relevant["profile"]),
+    )
+
+
+async def translate_with_api(client: HttpClient, text: str, glossary: Glossary) -> Optional[dict]:
     """
     Gọi OpenAI API để dịch văn bản.
     
     Args:
-        session: aiohttp session
+        client: HTTP client dùng chung connection pool
         text: Văn bản cần dịch
+        glossary: Glossary của sách
         
     Returns:
-        Văn bản đã dịch hoặc None nếu lỗi
+        Dict {"content", "finish_reason"} hoặc None nếu lỗi
     """
     headers = {
         "Content-Type": "application/json",
@@ -94,7 +115,7 @@ async def translate_with_api(session: aiohttp.ClientSession, text: str) -> Optio
     payload = {
         "model": MODEL_NAME,
         "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": build_system_prompt(text, glossary)},
             {"role": "user", "content": f"Dịch đoạn văn sau sang tiếng Việt:\n\n{text}"}
         ],
         "temperature": 0.3,  # Độ sáng tạo thấp để dịch chính xác hơn
@@ -103,23 +124,33 @@ async def translate_with_api(session: aiohttp.ClientSession, text: str) -> Optio
     
     for attempt in range(MAX_RETRIES):
         try:
-            async with session.post(
+            status, result = await client.request_json(
+                "POST",
                 f"{API_BASE_URL}chat/completions",
                 headers=headers,
                 json=payload,
-                timeout=aiohttp.ClientTimeout(total=300)  # 5 phút timeout
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result["choices"][0]["message"]["content"]
-                else:
-                    error_text = await response.text()
-                    print(f"  ⚠️ API error (attempt {attempt + 1}/{MAX_RETRIES}): {response.status} - {error_text[:200]}")
+            )
+            if status == 200:
+                choice = result["choices"][0]
+                usage = result.get("usage") or {}
+                for kind in ("prompt", "completion"):
+                    if usage.get(f"{kind}_tokens"):
+                        pipeline_metrics.record("translation_tokens", usage[f"{kind}_tokens"], type=kind)
+                return {
+                    "content": choice["message"]["content"],
+                    "finish_reason": choice.get("finish_reason"),
+                }
+            else:
+                print(f"  ⚠️ API error (attempt {attempt + 1}/{MAX_RETRIES}): {status} - {str(result)[:200]}")
+                pipeline_metrics.record("translation_retries", reason="api_error")
                     
-        except asyncio.TimeoutError:
-            print(f"  ⚠️ Timeout (attempt {attempt + 1}/{MAX_RETRIES})")
         except Exception as e:
-            print(f"  ⚠️ Error (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+            if is_timeout_error(e):
+                print(f"  ⚠️ Timeout (attempt {attempt + 1}/{MAX_RETRIES})")
+                pipeline_metrics.record("translation_retries", reason="timeout")
+            else:
+                print(f"  ⚠️ Error (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+                pipeline_metrics.record("translation_retries", reason="error")
         
         if attempt < MAX_RETRIES - 1:
             await asyncio.sleep(2 ** attempt)  # Exponential backoff
@@ -127,41 +158,127 @@ async def translate_with_api(session: aiohttp.ClientSession, text: str) -> Optio
     return None
 
 
-def get_translation_status() -> tuple[list[Path], list[Path]]:
+async def translate_segment(client: HttpClient, segment: str, label: str,
+                            glossary: Glossary) -> tuple[Optional[str], list[str]]:
+    """
+    Dịch một segment và kiểm tra kết quả, chỉ dịch lại chính segment đó nếu lỗi.
+    
+    Nếu output bị cắt (chạm max_tokens), segment được chia đôi và dịch từng nửa.
+    
+    Args:
+        client: HTTP client dùng chung
+        segment: Segment gốc
+        label: Nhãn hiển thị trong log (VD: "ch255 [2/3]")
+        glossary: Glossary của sách
+        
+    Returns:
+        (translated, issues): Bản dịch tốt nhất (None nếu không dùng được) và các lỗi còn lại
+    """
+    best = None
+    best_issues = ["empty: chưa dịch"]
+    
+    for attempt in range(MAX_SEGMENT_RETRIES + 1):
+        result = await translate_with_api(client, segment, glossary)
+        if result is None:
+            return None, ["empty: API lỗi sau khi retry"]
+        
+        issues = validate_segment(segment, result["content"], result["finish_reason"], glossary)
+        if not issues:
+            return result["content"], []
+        
+        print(f"  ⚠️ {label} - Segment không đạt ({attempt + 1}/{MAX_SEGMENT_RETRIES + 1}): {'; '.join(issues)}")
+        pipeline_metrics.record("translation_retries", reason="validation")
+        
+        # Output bị cắt: dịch lại nửa nhỏ hơn thay vì gửi lại nguyên segment
+        halves = split_in_half(segment)
+        if any(issue_type(issue) == "truncated" for issue in issues) and len(halves) > 1:
+            print(f"  ✂️ {label} - Chia đôi segment và dịch lại từng phần...")
+            texts, remaining = [], []
+            for i, half in enumerate(halves, 1):
+                text, half_issues = await translate_segment(client, half, f"{label}.{i}", glossary)
+                if text is None:
+                    return None, half_issues
+                texts.append(text.strip())
+                remaining.extend(half_issues)
+            return paragraph_separator(segment).join(texts), remaining
+        
+        if best is None or len(issues) < len(best_issues):
+            best, best_issues = result["content"], issues
+    
+    if any(issue_type(issue) in HARD_ISSUES for issue in best_issues):
+        return None, best_issues
+    return best, best_issues
+
+
+async def translate_text(client: HttpClient, content: str, label: str, glossary: Glossary) -> Optional[str]:
+    """
+    Dịch cả chapter theo từng segment, mỗi segment được kiểm tra và dịch lại riêng.
+    
+    Args:
+        client: HTTP client dùng chung
+        content: Nội dung chapter gốc
+        label: Tên chapter để hiển thị trong log
+        glossary: Glossary của sách
+        
+    Returns:
+        Bản dịch đầy đủ hoặc None nếu có segment không dịch được
+    """
+    segments = split_segments(content)
+    translated_segments = []
+    
+    for i, segment in enumerate(segments, 1):
+        segment_label = f"{label} [{i}/{len(segments)}]" if len(segments) > 1 else label
+        translated, issues = await translate_segment(client, segment, segment_label, glossary)
+        if translated is None:
+            print(f"  ❌ {segment_label} - Segment lỗi: {'; '.join(issues)}")
+            return None
+        if issues:
+            print(f"  ⚠️ {segment_label} - Chấp nhận bản dịch tốt nhất, còn lỗi: {'; '.join(issues)}")
+        translated_segments.append(translated.strip())
+    
+    return paragraph_separator(content).join(translated_segments)
+
+
+def get_translation_status(book: Book) -> tuple[list[Path], list[Path]]:
     """
     Kiểm tra trạng thái dịch của các chapters.
     
+    File chưa dịch, có bản dịch cũ (bản gốc đã thay đổi sau khi dịch) hoặc bản dịch
+    đã bị xoá đều là pending. Danh sách file lấy từ thư mục input: file thêm hoặc
+    sửa bằng tay (không qua scraper) được ghi vào state store trước khi so sánh
+    (chỉ file có mtime/size khác lần ghi trước mới được hash lại).
+    
+    Args:
+        book: Sách cần kiểm tra
+    
     Returns:
         (pending_files, completed_files): Tuple chứa danh sách file chưa dịch và đã dịch
     """
-    OUTPUT_DIR.mkdir(exist_ok=True)
+    book.translated_dir.mkdir(parents=True, exist_ok=True)
     
-    all_files = sorted(INPUT_DIR.glob("ch*.txt"))
-    pending = []
-    completed = []
+    state = book.open_state()
+    files = {path.name: path for path in book.untranslated_dir.glob("ch*.txt")}
+    state.sync_files(STAGE_SCRAPED, [files[name] for name in sorted(files)])
     
-    for input_file in all_files:
-        output_file = OUTPUT_DIR / f"{input_file.stem}.vn.txt"
-        if output_file.exists():
-            completed.append(input_file)
-        else:
-            pending.append(input_file)
+    pending_names = {Path(entry["path"]).name for entry in state.pending(STAGE_TRANSLATED)}
+    pending = {path for name, path in files.items() if name in pending_names}
+    completed = set(files.values()) - pending
     
-    return pending, completed
+    return sorted(pending), sorted(completed)
 
 
-def show_translation_status():
+def show_translation_status(book: Book):
     """
     Hiển thị trạng thái dịch của các chapters.
     """
-    pending, completed = get_translation_status()
+    pending, completed = get_translation_status(book)
     total = len(pending) + len(completed)
     
     print("=" * 60)
-    print("  📊 TRẠNG THÁI DỊCH CHAPTERS")
+    print(f"  📊 TRẠNG THÁI DỊCH CHAPTERS - {book.title}")
     print("=" * 60)
-    print(f"📁 Input: {INPUT_DIR}")
-    print(f"📁 Output: {OUTPUT_DIR}")
+    print(f"📁 Input: {book.untranslated_dir}")
+    print(f"📁 Output: {book.translated_dir}")
     print("-" * 60)
     print(f"✅ Đã dịch: {len(completed)}/{total}")
     print(f"⏳ Chưa dịch: {len(pending)}/{total}")
@@ -179,93 +296,132 @@ def show_translation_status():
 
 async def translate_chapter(
     semaphore: asyncio.Semaphore,
-    session: aiohttp.ClientSession,
+    read_ahead: asyncio.Semaphore,
+    client: HttpClient,
+    state: ChapterState,
     input_file: Path,
     output_file: Path,
     index: int,
-    total: int
+    total: int,
+    glossary: Glossary,
+    force: bool = False
 ) -> bool:
     """
     Dịch một chapter.
     
+    File input được đọc trước (trong thread pool) khi còn slot read-ahead,
+    semaphore chỉ giữ trong lúc gọi API, và kết quả được ghi atomic
+    (file tạm + rename) sau khi đã trả slot.
+    
     Args:
-        semaphore: Semaphore để giới hạn concurrent
-        session: aiohttp session
+        semaphore: Semaphore để giới hạn số request API đồng thời
+        read_ahead: Semaphore giới hạn số chapter đã đọc vào bộ nhớ
+        client: HTTP client dùng chung
+        state: State store để kiểm tra/ghi nhận trạng thái dịch
         input_file: File input
         output_file: File output
         index: Số thứ tự chapter đang dịch
         total: Tổng số chapters cần dịch
+        glossary: Glossary của sách
+        force: Dịch lại kể cả khi đã có bản dịch từ đúng bản gốc này
         
     Returns:
         True nếu thành công, False nếu lỗi
     """
     chapter_name = input_file.stem
+    chapter_ids = chapter_ids_from_name(input_file.name)
     
-    # Kiểm tra nếu file đã dịch rồi (trước khi acquire semaphore)
-    if output_file.exists():
-        print(f"  ⏭️ [{index}/{total}] {chapter_name} - Đã dịch trước đó, bỏ qua.")
-        return True
-    
-    async with semaphore:
-        print(f"📖 [{index}/{total}] Đang dịch {chapter_name}...")
-        
-        try:
-            # Đọc file input
-            with open(input_file, "r", encoding="utf-8") as f:
-                content = f.read()
-            
-            # Gọi API dịch
-            translated = await translate_with_api(session, content)
+    try:
+        async with read_ahead:
+            # Đọc file input trước khi tới lượt gọi API
+            content = await read_text_async(input_file)
+            source_hash = hash_text(content)
             
-            if translated:
-                # Lưu kết quả
-                with open(output_file, "w", encoding="utf-8") as f:
-                    f.write(translated)
-                print(f"  ✅ [{index}/{total}] {chapter_name} - Hoàn thành!")
+            # Kiểm tra nếu đã dịch từ đúng bản gốc này (trước khi acquire semaphore)
+            if not force and chapter_ids and await asyncio.to_thread(state.is_current, chapter_ids[0], STAGE_TRANSLATED, source_hash):
+                print(f"  ⏭️ [{index}/{total}] {chapter_name} - Đã dịch trước đó, bỏ qua.")
                 return True
-            else:
-                print(f"  ❌ [{index}/{total}] {chapter_name} - Lỗi dịch!")
-                return False
-                
-        except Exception as e:
-            print(f"  ❌ [{index}/{total}] {chapter_name} - Lỗi: {e}")
+            
+            async with semaphore:
+                print(f"📖 [{index}/{total}] Đang dịch {chapter_name}...")
+                translated = await translate_text(client, content, chapter_name, glossary)
+        
+        if translated:
+            # Lưu kết quả (ghi atomic, không giữ slot API)
+            await atomic_write_text_async(output_file, translated)
+            await asyncio.to_thread(
+                state.record, chapter_ids, STAGE_TRANSLATED, hash_text(translated), source_hash, output_file
+            )
+            print(f"  ✅ [{index}/{total}] {chapter_name} - Hoàn thành!")
+            return True
+        else:
+            print(f"  ❌ [{index}/{total}] {chapter_name} - Lỗi dịch!")
             return False
+            
+    except Exception as e:
+        print(f"  ❌ [{index}/{total}] {chapter_name} - Lỗi: {e}")
+        return False
 
 
-async def translate_all_chapters():
+async def translate_all_chapters(chapter_ids: Optional[list[int]] = None, force: bool = False,
+                                 book: Optional[Book] = None) -> bool:
     """
-    Dịch tất cả chapters với 5 tiến trình song song.
+    Dịch các chapters với 5 tiến trình song song.
+    
+    Args:
+        chapter_ids: Chỉ dịch các chapter này (mặc định: tất cả chapter cần dịch)
+        force: Dịch lại kể cả chapter đã dịch
+        book: Sách cần dịch (mặc định: sách mặc định)
+        
+    Returns:
+        True nếu không có chapter nào lỗi
     """
+    book = book or load_book()
+    # Đọc lại glossary mỗi lần chạy (module có thể được giữ trong backend giữa các job)
+    glossary = load_glossary(book.glossary_file)
+    
     # Kiểm tra trạng thái trước
-    pending_files, completed_files = get_translation_status()
+    pending_files, completed_files = get_translation_status(book)
     
     if not pending_files and not completed_files:
-        print("❌ Không tìm thấy file nào trong Chapters_Untranslated/")
-        return
+        print(f"❌ Không tìm thấy file nào trong {book.untranslated_dir}")
+        return False
     
     total_all = len(pending_files) + len(completed_files)
     
     print(f"📊 Trạng thái: {len(completed_files)}/{total_all} đã dịch")
     
+    if force:
+        pending_files = sorted(pending_files + completed_files)
+    if chapter_ids:
+        pending_files = files_for_chapters(pending_files, chapter_ids)
+        print(f"🎯 Chỉ xử lý chapter: {', '.join(map(str, chapter_ids))}")
+    
     if not pending_files:
         print("✨ Tất cả chapters đã được dịch!")
-        return
+        return True
     
     print(f"🚀 Bắt đầu dịch {len(pending_files)} chapters còn lại với {MAX_CONCURRENT} tiến trình song song...")
-    print(f"📁 Input: {INPUT_DIR}")
-    print(f"📁 Output: {OUTPUT_DIR}")
+    print(f"📚 Sách: {book.title}")
+    print(f"📁 Input: {book.untranslated_dir}")
+    print(f"📁 Output: {book.translated_dir}")
     print(f"🔗 API: {API_BASE_URL}")
     print("-" * 60)
     
-    # Tạo semaphore để giới hạn concurrent
+    # Tạo semaphore để giới hạn concurrent, và giới hạn số chapter đọc trước vào bộ nhớ
     semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+    read_ahead = asyncio.Semaphore(MAX_CONCURRENT + READ_AHEAD)
     
-    # Tạo session và dịch - CHỈ dịch các file chưa hoàn thành
-    async with aiohttp.ClientSession() as session:
+    # Tạo connection pool (kích thước = số tiến trình song song) và dịch - CHỈ dịch các file chưa hoàn thành
+    state = book.open_state()
+    async with HttpClient(concurrency=MAX_CONCURRENT) as client:
         tasks = []
         for i, input_file in enumerate(pending_files, 1):
-            output_file = OUTPUT_DIR / f"{input_file.stem}.vn.txt"
-            task = translate_chapter(semaphore, session, input_file, output_file, i, len(pending_files))
+            output_file = book.translated_dir / f"{input_file.stem}.vn.txt"
+            task = translate_chapter(
+                semaphore, read_ahead, client, state, input_file, output_file, i, len(pending_files),
+                glossary, force
+            )
             tasks.append(task)
         
         # Chạy tất cả tasks
@@ -280,23 +436,42 @@ async def translate_all_chapters():
     print(f"   ✅ Thành công: {success}/{len(results)}")
     if failed > 0:
         print(f"   ❌ Lỗi: {failed}/{len(results)}")
+    return failed == 0
 
 
-def main():
-    """Entry point."""
+def main(argv: Optional[list[str]] = None):
+    """Entry point (argv: tham số dòng lệnh, mặc định sys.argv)."""
+    parser = argparse.ArgumentParser(description="Dịch các chapter sang tiếng Việt")
+    parser.add_argument("--chapters", "-c", type=parse_chapter_ids,
+                        help="Chỉ dịch các chapter này (VD: 278 hoặc 278,280-282)")
+    parser.add_argument("--force", "-f", action="store_true",
+                        help="Dịch lại kể cả chapter đã dịch")
+    parser.add_argument("--status", "-s", action="store_true",
+                        help="Chỉ hiển thị trạng thái dịch")
+    # Giữ tương thích với lệnh cũ (`--translate` là hành động mặc định)
+    parser.add_argument("--translate", action="store_true", help=argparse.SUPPRESS)
+    add_book_argument(parser)
+    args = parser.parse_args(argv)
+    book = args.book
+    
     print("=" * 60)
     print("  🌐 Novel Chapter Translation Script")
     print("=" * 60)
     print()
     
     # Kiểm tra thư mục input
-    if not INPUT_DIR.exists():
-        print(f"❌ Không tìm thấy thư mục: {INPUT_DIR}")
-        return
+    if not book.untranslated_dir.exists():
+        print(f"❌ Không tìm thấy thư mục: {book.untranslated_dir}")
+        return 1
+    
+    if args.status:
+        show_translation_status(book)
+        return 0
     
     # Chạy async
-    asyncio.run(translate_all_chapters())
+    success = asyncio.run(translate_all_chapters(args.chapters, args.force, book))
+    return 0 if success else 1
 
 
 if __name__ == "__main__":
-    main()
+    exit(main())
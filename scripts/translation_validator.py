@@ -0,0 +1,161 @@
+"""
+Translation Validator - Kiểm tra chất lượng bản dịch theo từng đoạn
+===================================================================
+Chia chapter thành các segment (nhóm paragraph) để dịch, và kiểm tra
+từng segment sau khi dịch. Segment lỗi sẽ được dịch lại riêng thay vì
+dịch lại cả chapter.
+
+Các tiêu chí kiểm tra:
+- `finish_reason == "length"`: output bị cắt do chạm `max_tokens`
+- Tỉ lệ số paragraph dịch / gốc nằm ngoài khoảng cho phép (thiếu đoạn)
+- Còn sót paragraph tiếng Anh chưa dịch
+- Thuật ngữ trong glossary không được dịch đúng (xem glossary.py)
+"""
+
+import re
+from typing import List, Optional
+
+from glossary import Glossary
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+SEGMENT_MAX_CHARS = 12000               # Độ dài tối đa một segment gửi lên API
+PARAGRAPH_RATIO_RANGE = (0.7, 1.4)      # Tỉ lệ paragraph dịch/gốc chấp nhận được
+MIN_PARAGRAPHS_FOR_RATIO = 5            # Segment ngắn hơn thì bỏ qua kiểm tra tỉ lệ
+ENGLISH_RESIDUE_MIN_WORDS = 8           # Paragraph ngắn hơn thì bỏ qua kiểm tra tiếng Anh
+ENGLISH_STOPWORD_RATIO = 0.2            # Tỉ lệ stopword tiếng Anh để coi là chưa dịch
+# ============================================================================
+
+# Các từ tiếng Anh phổ biến, gần như không xuất hiện trong văn bản tiếng Việt
+ENGLISH_STOPWORDS = frozenset("""
+the a an and or but of to in on at for with from by as is are was were be been
+it its he she his her they them their you your we our i me my this that these
+those not no had has have do did does will would could should there here what
+""".split())
+
+WORD_PATTERN = re.compile(r"[A-Za-zÀ-ỹ']+")
+
+# Các loại lỗi
+ISSUE_TRUNCATED = "truncated"
+ISSUE_EMPTY = "empty"
+ISSUE_PARAGRAPHS = "paragraph_ratio"
+ISSUE_ENGLISH = "english_residue"
+ISSUE_GLOSSARY = "glossary"
+
+# Lỗi nghiêm trọng: không thể chấp nhận bản dịch dù đã hết số lần thử
+HARD_ISSUES = frozenset({ISSUE_TRUNCATED, ISSUE_EMPTY})
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Tách văn bản thành danh sách paragraph (bỏ dòng trống)."""
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+
+def paragraph_separator(text: str) -> str:
+    """Chuỗi ngăn cách paragraph của văn bản: dòng trống, hoặc chỉ xuống dòng nếu văn bản không có dòng trống."""
+    return '\n\n' if re.search(r'\n[ \t]*\n', text.strip()) else '\n'
+
+
+def split_segments(text: str, max_chars: int = SEGMENT_MAX_CHARS) -> List[str]:
+    """
+    Chia văn bản thành các segment, mỗi segment gồm nhiều paragraph liền nhau
+    và không vượt quá max_chars (trừ khi một paragraph đơn lẻ đã dài hơn).
+
+    Args:
+        text: Văn bản gốc
+        max_chars: Độ dài tối đa của một segment
+
+    Returns:
+        Danh sách segment, paragraph nối bằng đúng chuỗi ngăn cách của văn bản gốc
+    """
+    separator = paragraph_separator(text)
+    segments = []
+    current: List[str] = []
+    current_len = 0
+
+    for paragraph in split_paragraphs(text):
+        if current and current_len + len(paragraph) > max_chars:
+            segments.append(separator.join(current))
+            current = []
+            current_len = 0
+        current.append(paragraph)
+        current_len += len(paragraph) + len(separator)
+
+    if current:
+        segments.append(separator.join(current))
+
+    return segments
+
+
+def split_in_half(segment: str) -> List[str]:
+    """Chia đôi một segment theo paragraph (dùng khi output bị cắt)."""
+    paragraphs = split_paragraphs(segment)
+    if len(paragraphs) < 2:
+        return [segment]
+    middle = len(paragraphs) // 2
+    separator = paragraph_separator(segment)
+    return [separator.join(paragraphs[:middle]), separator.join(paragraphs[middle:])]
+
+
+def is_english_paragraph(paragraph: str) -> bool:
+    """Kiểm tra một paragraph có vẻ vẫn còn là tiếng Anh."""
+    words = WORD_PATTERN.findall(paragraph.lower())
+    if len(words) < ENGLISH_RESIDUE_MIN_WORDS:
+        return False
+    stopwords = sum(1 for word in words if word in ENGLISH_STOPWORDS)
+    return stopwords / len(words) >= ENGLISH_STOPWORD_RATIO
+
+
+def validate_segment(
+    source: str,
+    translated: Optional[str],
+    finish_reason: Optional[str] = None,
+    glossary: Optional[Glossary] = None,
+) -> List[str]:
+    """
+    Kiểm tra bản dịch của một segment.
+
+    Args:
+        source: Segment gốc
+        translated: Bản dịch trả về từ API
+        finish_reason: Giá trị `finish_reason` của API
+        glossary: Glossary để kiểm tra cách dịch bắt buộc (tùy chọn)
+
+    Returns:
+        Danh sách lỗi dạng "<loại>: <chi tiết>", rỗng nếu hợp lệ
+    """
+    if not translated or not translated.strip():
+        return [f"{ISSUE_EMPTY}: API không trả về nội dung"]
+
+    issues = []
+
+    if finish_reason == "length":
+        issues.append(f"{ISSUE_TRUNCATED}: output chạm giới hạn max_tokens")
+
+    source_paragraphs = split_paragraphs(source)
+    translated_paragraphs = split_paragraphs(translated)
+
+    if len(source_paragraphs) >= MIN_PARAGRAPHS_FOR_RATIO:
+        ratio = len(translated_paragraphs) / len(source_paragraphs)
+        low, high = PARAGRAPH_RATIO_RANGE
+        if not low <= ratio <= high:
+            issues.append(
+                f"{ISSUE_PARAGRAPHS}: {len(translated_paragraphs)}/{len(source_paragraphs)} paragraph"
+            )
+
+    english = [p for p in translated_paragraphs if is_english_paragraph(p)]
+    if english:
+        issues.append(f"{ISSUE_ENGLISH}: {len(english)} paragraph chưa dịch (VD: {english[0][:60]!r})")
+
+    if glossary is not None:
+        problems = glossary.verify(source, translated)
+        if problems:
+            issues.append(f"{ISSUE_GLOSSARY}: {', '.join(problems)}")
+
+    return issues
+
+
+def issue_type(issue: str) -> str:
+    """Lấy loại lỗi từ chuỗi mô tả lỗi."""
+    return issue.split(':', 1)[0]
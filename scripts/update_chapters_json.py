@@ -2,78 +2,78 @@
 Script cập nhật website - thêm các chương từ thư mục Chapters vào website/data/chapters.json
 
 Cách sử dụng:
-    python scripts/update_chapters_json.py [--force]
+    python scripts/update_chapters_json.py [--force] [--chapters 278-280] [--book my-book]
     
     --force: Ghi đè các chapter đã tồn tại thay vì bỏ qua
+    --chapters: Chỉ đọc các file chứa những chapter này và ghi đè đúng các chapter đó
+    --book: Sách cần cập nhật (thư mục Chapters và chapters.json của sách, xem book_registry.py)
 """
 
 import os
-import re
 import json
 import argparse
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import chapter_archive
+import chapter_parser
+from book_registry import Book, add_book_argument, load_book
+from file_utils import atomic_write_text
+from chapter_state import (
+    STAGE_PUBLISHED,
+    files_for_chapters,
+    hash_file,
+    hash_text,
+    parse_chapter_ids,
+)
+from volumes import load_volume_map
 
-# Đường dẫn mặc định
-SCRIPT_DIR = Path(__file__).parent
-PROJECT_DIR = SCRIPT_DIR.parent
-CHAPTERS_DIR = PROJECT_DIR / "Chapters"
-CHAPTERS_JSON = PROJECT_DIR / "website" / "data" / "chapters.json"
+# Tốc độ đọc trung bình (từ/phút) để ước tính thời gian đọc
+WORDS_PER_MINUTE = 200
 
 
 def parse_chapter_file(file_path: Path) -> List[Dict]:
     """
     Parse một file chapter và trả về danh sách các chapter trong file.
     
-    File có thể chứa một hoặc nhiều chapter (ví dụ: ch157_159.vn.txt chứa 3 chapter)
+    File có thể chứa một hoặc nhiều chapter (ví dụ: ch157_159.vn.txt chứa 3 chapter).
+    Dùng bộ parse chung trong chapter_parser.py.
     """
-    chapters = []
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Tìm tất cả các chapter trong file bằng regex
-    chapter_pattern = re.compile(
-        r'<chapter\s+number="(\d+)"\s+volume="(\d+)">\s*'
-        r'<title>(.*?)</title>\s*'
-        r'<text>(.*?)</text>\s*'
-        r'</chapter>',
-        re.DOTALL
-    )
-    
-    matches = chapter_pattern.findall(content)
-    
-    for match in matches:
-        chapter_num = int(match[0])
-        volume = int(match[1])
-        title = match[2].strip()
-        text = match[3].strip()
-        
-        # Chuyển đổi text: thay <br/> hoặc nhiều dòng trống bằng \n\n
-        # Và loại bỏ khoảng trắng thừa
-        text = re.sub(r'\r\n', '\n', text)
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        text = text.strip()
-        
-        chapters.append({
-            "id": chapter_num,
-            "volume": volume,
-            "title": title,
-            "content": text
-        })
+    return chapter_parser.parse_chapter_file(file_path)
+
+
+def chapter_metadata(content: str) -> Dict:
+    """
+    Tính trước metadata của một chapter để website không phải xử lý nội dung:
+    wordCount, readingMinutes, paragraphCount, paragraphOffsets.
     
-    return chapters
+    paragraphOffsets là vị trí bắt đầu của mỗi paragraph tính theo đơn vị UTF-16
+    (chính là chỉ số chuỗi trong JavaScript), dùng trực tiếp với `content.slice()`.
+    """
+    offsets = []
+    position = 0
+    for line in content.split("\n"):
+        if line.strip():
+            offsets.append(position)
+        position += len(line.encode("utf-16-le")) // 2 + 1
+    
+    word_count = len(content.split())
+    return {
+        "wordCount": word_count,
+        "readingMinutes": max(1, round(word_count / WORDS_PER_MINUTE)),
+        "paragraphCount": len(offsets),
+        "paragraphOffsets": offsets,
+    }
 
 
-def get_existing_chapters(json_path: Path) -> Dict:
+def get_existing_chapters(json_path: Path, book: Book) -> Dict:
     """
     Đọc file chapters.json hiện tại và trả về dữ liệu.
     """
     if not json_path.exists():
         return {
-            "bookTitle": "Max Level Priest",
-            "bookTitleVi": "Linh Mục Cấp Tối Đa",
+            "bookTitle": book.title,
+            "bookTitleVi": book.title_vi,
             "totalChapters": 0,
             "chapters": []
         }
@@ -82,72 +82,136 @@ def get_existing_chapters(json_path: Path) -> Dict:
         return json.load(f)
 
 
-def update_chapters_json(force: bool = False) -> Tuple[int, int, int]:
+def update_chapters_json(force: bool = False, chapter_ids: Optional[Iterable[int]] = None,
+                         book: Optional[Book] = None) -> Tuple[int, int, int]:
     """
     Cập nhật file chapters.json với các chapter từ thư mục Chapters.
     
+    Args:
+        force: Ghi đè các chapter đã tồn tại (chapter không đổi vẫn được bỏ qua nhờ hash trong archive)
+        chapter_ids: Chỉ xử lý các chapter này - chúng luôn được ghi đè, các file khác không được mở
+        book: Sách cần cập nhật (mặc định: sách mặc định)
+    
     Returns:
         Tuple[int, int, int]: (số chapter mới thêm, số chapter đã cập nhật, số chapter bỏ qua)
     """
+    book = book or load_book()
+    chapters_json = book.chapters_json
+    pack_path, index_path = chapter_archive.archive_paths(chapters_json)
+    
     # Đọc dữ liệu hiện tại
-    data = get_existing_chapters(CHAPTERS_JSON)
+    data = get_existing_chapters(chapters_json, book)
     existing_chapters = {ch["id"]: ch for ch in data["chapters"]}
     
     # Tìm tất cả các file chapter
-    chapter_files = sorted(CHAPTERS_DIR.glob("*.vn.txt"))
+    chapter_files = sorted(book.chapters_dir.glob("*.vn.txt"))
+    selected = set(chapter_ids or ())
+    if selected:
+        chapter_files = files_for_chapters(chapter_files, selected)
     
     added = 0
     updated = 0
     skipped = 0
+    published = []  # (chapter, hash file nguồn) để ghi vào state store sau khi lưu JSON
+    volume_map = load_volume_map(book.slug)
+    
+    # Khi force / --chapters: dùng hash trong archive để bỏ qua các chapter không thay đổi
+    archive = None
+    if (force or selected) and chapter_archive.is_archive_current(chapters_json, index_path):
+        try:
+            archive = chapter_archive.open_archive(pack_path, index_path)
+        except chapter_archive.ArchiveError as e:
+            print(f"⚠️ Không đọc được archive, ghi đè toàn bộ: {e}")
     
     for file_path in chapter_files:
         print(f"Đang xử lý: {file_path.name}")
         
         try:
-            chapters = parse_chapter_file(file_path)
+            source_hash = None
             
-            for chapter in chapters:
-                chapter_id = chapter["id"]
-                
-                if chapter_id in existing_chapters:
-                    if force:
-                        existing_chapters[chapter_id] = chapter
+            # Quét vị trí các chapter trên mmap, chỉ decode những chapter cần ghi
+            with chapter_parser.map_file(file_path) as buffer:
+                for span in chapter_parser.iter_chapter_spans(buffer):
+                    chapter_id = span.number
+                    
+                    if selected and chapter_id not in selected:
+                        continue
+                    if chapter_id in existing_chapters and not force and not selected:
+                        skipped += 1
+                        print(f"  Bỏ qua chapter {chapter_id} (đã tồn tại)")
+                        continue
+                    
+                    chapter = chapter_parser.decode_chapter(buffer, span)
+                    volume = volume_map.volume_for(chapter_id)
+                    if volume is not None and volume != chapter["volume"]:
+                        print(f"  ⚠️ Chương {chapter_id}: file ghi Vol. {chapter['volume']}, "
+                              f"cấu hình là Vol. {volume} → dùng cấu hình")
+                        chapter["volume"] = volume
+                    chapter.update(chapter_metadata(chapter["content"]))
+                    if source_hash is None:
+                        source_hash = hash_file(file_path)
+                    
+                    if chapter_id in existing_chapters:
+                        entry = archive.entry(chapter_id) if archive else None
+                        if entry is not None and entry.payload_hash == chapter_archive.chapter_hash(chapter):
+                            skipped += 1
+                            print(f"  Bỏ qua chapter {chapter_id} (không thay đổi)")
+                            continue
                         updated += 1
                         print(f"  Đã cập nhật chapter {chapter_id}: {chapter['title']}")
                     else:
-                        skipped += 1
-                        print(f"  Bỏ qua chapter {chapter_id} (đã tồn tại)")
-                else:
+                        added += 1
+                        print(f"  Đã thêm chapter {chapter_id}: {chapter['title']}")
                     existing_chapters[chapter_id] = chapter
-                    added += 1
-                    print(f"  Đã thêm chapter {chapter_id}: {chapter['title']}")
+                    published.append((chapter, source_hash))
                     
         except Exception as e:
             print(f"  Lỗi khi xử lý file {file_path.name}: {e}")
     
-    # Sắp xếp chapters theo id
+    # Sắp xếp chapters theo id; metadata chỉ tính cho chapter cũ chưa có (chapter mới đã có ở trên)
     sorted_chapters = sorted(existing_chapters.values(), key=lambda x: x["id"])
+    backfilled = 0
+    for chapter in sorted_chapters:
+        if "paragraphOffsets" not in chapter:
+            chapter.update(chapter_metadata(chapter["content"]))
+            backfilled += 1
     
     # Cập nhật data
     data["chapters"] = sorted_chapters
     data["totalChapters"] = len(sorted_chapters)
     
-    # Ghi ra file
-    CHAPTERS_JSON.parent.mkdir(parents=True, exist_ok=True)
-    with open(CHAPTERS_JSON, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Chỉ ghi khi có thay đổi: ghi lại file không đổi vẫn đổi mtime và làm
+    # ChapterStore/ChapterWatcher của backend bỏ cache
+    changed = bool(added or updated or backfilled) or not chapters_json.exists()
+    if changed:
+        # Ghi atomic: backend có thể đang đọc chapters.json cùng lúc
+        chapters_json.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(chapters_json, json.dumps(data, ensure_ascii=False, indent=2))
+    
+    # Đóng gói archive (chapters.pack + chapters.idx, cạnh chapters.json) để tra cứu theo id
+    stats = None
+    if changed or not chapter_archive.is_archive_current(chapters_json, index_path):
+        meta = {key: value for key, value in data.items() if key != "chapters"}
+        stats = chapter_archive.build_archive(sorted_chapters, meta, pack_path, index_path)
+    
+    # Ghi nhận các chapter đã publish
+    state = book.open_state()
+    for chapter, source_hash in published:
+        state.record([chapter["id"]], STAGE_PUBLISHED, hash_text(chapter["content"]), source_hash, chapters_json)
     
     print(f"\n=== Kết quả ===")
     print(f"Đã thêm mới: {added} chapter")
     print(f"Đã cập nhật: {updated} chapter")
     print(f"Đã bỏ qua: {skipped} chapter")
     print(f"Tổng số chapter: {len(sorted_chapters)}")
-    print(f"File đã lưu: {CHAPTERS_JSON}")
+    print(f"File đã lưu: {chapters_json}" if changed else f"Không có thay đổi, giữ nguyên: {chapters_json}")
+    if stats is not None:
+        print(f"Archive: {pack_path.name} ({stats['pack_bytes']:,} bytes)")
     
     return added, updated, skipped
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(
         description="Cập nhật website - thêm các chương từ thư mục Chapters vào chapters.json"
     )
@@ -156,19 +220,27 @@ def main():
         action="store_true",
         help="Ghi đè các chapter đã tồn tại thay vì bỏ qua"
     )
+    parser.add_argument(
+        "--chapters", "-c",
+        type=parse_chapter_ids,
+        help="Chỉ cập nhật các chapter này (VD: 278 hoặc 278,280-282)"
+    )
+    add_book_argument(parser)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    book = args.book
     
-    print(f"Thư mục Chapters: {CHAPTERS_DIR}")
-    print(f"File chapters.json: {CHAPTERS_JSON}")
+    print(f"Sách: {book.title} ({book.slug})")
+    print(f"Thư mục Chapters: {book.chapters_dir}")
+    print(f"File chapters.json: {book.chapters_json}")
     print(f"Chế độ force: {args.force}")
     print()
     
-    if not CHAPTERS_DIR.exists():
-        print(f"Lỗi: Thư mục Chapters không tồn tại: {CHAPTERS_DIR}")
+    if not book.chapters_dir.exists():
+        print(f"Lỗi: Thư mục Chapters không tồn tại: {book.chapters_dir}")
         return 1
     
-    update_chapters_json(force=args.force)
+    update_chapters_json(force=args.force, chapter_ids=args.chapters, book=book)
     return 0
 
 
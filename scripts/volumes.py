@@ -0,0 +1,299 @@
+"""
+Volume Map - Xác định volume của chapter từ cấu hình của sách
+=============================================================
+Ranh giới volume được lưu trong `books/<slug>.json`:
+
+    "volumes": [
+        {"volume": 9, "start": 157},
+        {"volume": 10, "start": 271}
+    ]
+
+Mỗi volume bắt đầu từ chapter `start` và kéo dài tới trước volume kế tiếp.
+Tra cứu dùng `bisect` trên danh sách `start` đã sắp xếp. Formatter, scraper
+và bước tạo chapters.json đều dùng chung bảng này nên volume luôn nhất quán.
+Chapter nằm trước volume đầu tiên được cấu hình thì không có volume (None),
+thay vì đoán bằng công thức.
+
+Usage:
+    python volumes.py               # Xem ranh giới volume
+    python volumes.py --check       # Liệt kê các chapter có volume sai
+    python volumes.py --revolume    # Sửa volume chỉ cho các chapter bị sai
+    python volumes.py --book my-book --check
+"""
+
+import argparse
+import json
+import re
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from book_registry import DEFAULT_BOOK, Book, add_book_argument, book_config_path, load_book
+from file_utils import atomic_write_text
+
+# Đường dẫn mặc định (của sách mặc định, xem book_registry.py)
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_DIR = SCRIPT_DIR.parent
+CHAPTERS_DIR = PROJECT_DIR / "Chapters"
+CHAPTERS_JSON = PROJECT_DIR / "website" / "data" / "chapters.json"
+
+CHAPTER_TAG_PATTERN = re.compile(r'(<chapter\s+number="(\d+)"\s+volume=")(\d+)(")')
+METADATA_VOLUME_PATTERN = re.compile(r'<volume>\d+</volume>')
+
+
+class VolumeMap:
+    """Bảng ranh giới volume: chapter -> volume bằng bisect."""
+
+    def __init__(self, boundaries: Iterable[dict], path: Optional[Path] = None):
+        self.path = path
+        self._set(boundaries)
+
+    def _set(self, boundaries: Iterable[dict]):
+        ordered = sorted(boundaries, key=lambda b: b["start"])
+        self.starts: List[int] = [b["start"] for b in ordered]
+        self.volumes: List[int] = [b["volume"] for b in ordered]
+
+    @property
+    def boundaries(self) -> List[dict]:
+        return [{"volume": v, "start": s} for v, s in zip(self.volumes, self.starts)]
+
+    def volume_for(self, chapter_id: int) -> Optional[int]:
+        """Volume của một chapter (None nếu nằm trước volume đầu tiên được cấu hình)."""
+        index = bisect_right(self.starts, chapter_id) - 1
+        return self.volumes[index] if index >= 0 else None
+
+    def volumes_for(self, chapter_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+        """
+        Volume cho nhiều chapter cùng lúc.
+
+        Duyệt song song danh sách chapter đã sắp xếp và danh sách ranh giới,
+        nên chi phí là O(n + m) thay vì một lần bisect cho mỗi chapter.
+        """
+        result = {}
+        index = -1
+        for chapter_id in sorted(set(chapter_ids)):
+            while index + 1 < len(self.starts) and self.starts[index + 1] <= chapter_id:
+                index += 1
+            result[chapter_id] = self.volumes[index] if index >= 0 else None
+        return result
+
+    def reconcile(self, chapter_id: int, observed: Optional[int]) -> Optional[int]:
+        """
+        Đối chiếu volume đọc được từ nguồn (VD: "Vol. 10" trong tiêu đề bài viết)
+        với cấu hình, và mở rộng bảng volume khi gặp volume mới.
+
+        - Volume lớn hơn mọi volume đã biết: thêm ranh giới mới bắt đầu từ chapter này
+        - Volume đã biết nhưng bắt đầu muộn hơn chapter này (scrape không theo thứ tự):
+          dời ranh giới về chapter này
+        - Các trường hợp khác lệch cấu hình: cảnh báo và dùng giá trị cấu hình
+
+        Thay đổi chỉ áp dụng trong bộ nhớ (cho lần chạy này) và được in ra; file
+        cấu hình của sách (có trong git) không bị sửa ngầm.
+
+        Returns:
+            Volume dùng cho chapter
+        """
+        configured = self.volume_for(chapter_id)
+        if observed is None or observed == configured:
+            return configured
+
+        if not self.volumes or observed > max(self.volumes):
+            self._set(self.boundaries + [{"volume": observed, "start": chapter_id}])
+            self._report_change(f"Volume mới: Vol. {observed} bắt đầu từ chương {chapter_id}")
+            return observed
+
+        if observed in self.volumes:
+            index = self.volumes.index(observed)
+            previous_start = self.starts[index - 1] if index > 0 else None
+            if chapter_id < self.starts[index] and (previous_start is None or chapter_id > previous_start):
+                boundaries = self.boundaries
+                boundaries[index]["start"] = chapter_id
+                self._set(boundaries)
+                self._report_change(f"Vol. {observed} bắt đầu sớm hơn: từ chương {chapter_id}")
+                return observed
+
+        print(f"⚠️ Chương {chapter_id}: nguồn ghi Vol. {observed}, cấu hình là Vol. {configured} → dùng cấu hình")
+        return configured
+
+    def _report_change(self, message: str):
+        """In thay đổi ranh giới và cấu hình cần ghi vào file của sách."""
+        config = self.path.name if self.path else "file cấu hình của sách"
+        print(f"📚 {message}")
+        print(f"   ⚠️ Chưa ghi vào {config}: cập nhật \"volumes\" thành {json.dumps(self.boundaries)} "
+              f"rồi chạy `python volumes.py --check`")
+
+
+def load_volume_map(book: str = DEFAULT_BOOK) -> VolumeMap:
+    """Đọc bảng volume từ `books/<book>.json`."""
+    path = book_config_path(book)
+    with open(path, "r", encoding="utf-8") as f:
+        return VolumeMap(json.load(f).get("volumes", []), path)
+
+
+# ============================================================================
+# Kiểm tra và sửa volume
+# ============================================================================
+def find_file_mismatches(volume_map: VolumeMap, chapters_dir: Path = CHAPTERS_DIR) -> Dict[Path, Dict[int, tuple]]:
+    """
+    Tìm các chapter trong Chapters/*.vn.txt có volume khác cấu hình.
+
+    Returns:
+        Dict file -> {chapter id: (volume hiện tại, volume đúng)}
+    """
+    mismatches = {}
+    for path in sorted(chapters_dir.glob("*.vn.txt")):
+        found = {
+            int(match.group(2)): int(match.group(3))
+            for match in CHAPTER_TAG_PATTERN.finditer(path.read_text(encoding="utf-8"))
+        }
+        expected = volume_map.volumes_for(found)
+        wrong = {
+            chapter_id: (current, expected[chapter_id])
+            for chapter_id, current in found.items()
+            if expected[chapter_id] is not None and expected[chapter_id] != current
+        }
+        if wrong:
+            mismatches[path] = wrong
+    return mismatches
+
+
+def find_json_mismatches(volume_map: VolumeMap, json_path: Path = CHAPTERS_JSON) -> Dict[int, tuple]:
+    """
+    Tìm các chapter trong chapters.json có volume khác cấu hình.
+
+    Returns:
+        Dict chapter id -> (volume hiện tại, volume đúng)
+    """
+    if not json_path.exists():
+        return {}
+    with open(json_path, "r", encoding="utf-8") as f:
+        chapters = json.load(f).get("chapters", [])
+    expected = volume_map.volumes_for(chapter["id"] for chapter in chapters)
+    return {
+        chapter["id"]: (chapter["volume"], expected[chapter["id"]])
+        for chapter in chapters
+        if expected[chapter["id"]] is not None and expected[chapter["id"]] != chapter["volume"]
+    }
+
+
+def rewrite_file_volumes(path: Path, volume_map: VolumeMap) -> str:
+    """Sửa volume trong tag <chapter> và <metadata> của một file, trả về nội dung mới."""
+    content = path.read_text(encoding="utf-8")
+    first_volume = []
+
+    def replace(match):
+        volume = volume_map.volume_for(int(match.group(2)))
+        volume = volume if volume is not None else int(match.group(3))
+        first_volume.append(volume)
+        return f"{match.group(1)}{volume}{match.group(4)}"
+
+    content = CHAPTER_TAG_PATTERN.sub(replace, content)
+    if first_volume:
+        content = METADATA_VOLUME_PATTERN.sub(f"<volume>{first_volume[0]}</volume>", content, count=1)
+    return content
+
+
+def revolume(volume_map: VolumeMap, book: Optional[Book] = None) -> dict:
+    """
+    Sửa volume cho các chapter bị sai: chỉ ghi lại các file/chapter bị ảnh hưởng,
+    cập nhật chapters.json + archive và state store mà không publish lại toàn bộ.
+
+    Args:
+        volume_map: Bảng volume đúng
+        book: Sách cần sửa (mặc định: sách mặc định)
+
+    Returns:
+        Dict thống kê: files, chapters (đã sửa trong Chapters/), published (đã sửa trong JSON)
+    """
+    # Import tại đây để `volumes` nhẹ khi chỉ dùng VolumeMap (formatter, scraper)
+    import chapter_archive
+    from chapter_state import STAGE_FORMATTED, STAGE_PUBLISHED, chapter_ids_from_name, hash_text
+
+    book = book or load_book()
+    chapters_dir, json_path = book.chapters_dir, book.chapters_json
+    state = book.open_state()
+    file_mismatches = find_file_mismatches(volume_map, chapters_dir)
+    formatted_hashes = {}
+    for path, wrong in file_mismatches.items():
+        content = rewrite_file_volumes(path, volume_map)
+        atomic_write_text(path, content)
+        content_hash = hash_text(content)
+        for chapter_id in chapter_ids_from_name(path.name):
+            formatted_hashes[chapter_id] = content_hash
+            entry = state.get(chapter_id, STAGE_FORMATTED)
+            state.record([chapter_id], STAGE_FORMATTED, content_hash,
+                         entry["source_hash"] if entry else None, path)
+        for chapter_id, (current, expected) in sorted(wrong.items()):
+            print(f"  ✏️ {path.name}: chương {chapter_id} Vol. {current} → Vol. {expected}")
+
+    json_mismatches = find_json_mismatches(volume_map, json_path)
+    if json_mismatches:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for chapter in data["chapters"]:
+            if chapter["id"] in json_mismatches:
+                chapter["volume"] = json_mismatches[chapter["id"]][1]
+                print(f"  ✏️ chapters.json: chương {chapter['id']} Vol. "
+                      f"{json_mismatches[chapter['id']][0]} → Vol. {chapter['volume']}")
+        atomic_write_text(json_path, json.dumps(data, ensure_ascii=False, indent=2))
+        meta = {key: value for key, value in data.items() if key != "chapters"}
+        chapter_archive.build_archive(data["chapters"], meta, *chapter_archive.archive_paths(json_path))
+
+    # Bản publish vẫn được tạo từ file format hiện tại (đã sửa volume), không bị stale
+    for chapter_id, content_hash in formatted_hashes.items():
+        entry = state.get(chapter_id, STAGE_PUBLISHED)
+        if entry is not None:
+            state.record([chapter_id], STAGE_PUBLISHED, entry["content_hash"], content_hash, entry["path"])
+
+    return {
+        "files": len(file_mismatches),
+        "chapters": sum(len(wrong) for wrong in file_mismatches.values()),
+        "published": len(json_mismatches),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Xem, kiểm tra và sửa volume của các chapter")
+    add_book_argument(parser)
+    parser.add_argument("--check", action="store_true", help="Liệt kê các chapter có volume sai")
+    parser.add_argument("--revolume", action="store_true", help="Sửa volume cho các chapter bị sai")
+    args = parser.parse_args()
+
+    book = args.book
+    volume_map = load_volume_map(book.slug)
+
+    if args.revolume:
+        print(f"🔧 Sửa volume theo {volume_map.path.name}...")
+        stats = revolume(volume_map, book)
+        if not (stats["files"] or stats["published"]):
+            print("✅ Tất cả chapter đã đúng volume")
+        else:
+            print(f"✅ Đã sửa {stats['chapters']} chapter trong {stats['files']} file, "
+                  f"{stats['published']} chapter trong chapters.json")
+            if stats["published"]:
+                print("   Chạy sync_chapters_js.py để cập nhật website")
+        return 0
+
+    if args.check:
+        file_mismatches = find_file_mismatches(volume_map, book.chapters_dir)
+        json_mismatches = find_json_mismatches(volume_map, book.chapters_json)
+        for path, wrong in file_mismatches.items():
+            for chapter_id, (current, expected) in sorted(wrong.items()):
+                print(f"  ❌ {path.name}: chương {chapter_id} Vol. {current} (đúng: Vol. {expected})")
+        for chapter_id, (current, expected) in sorted(json_mismatches.items()):
+            print(f"  ❌ chapters.json: chương {chapter_id} Vol. {current} (đúng: Vol. {expected})")
+        if not (file_mismatches or json_mismatches):
+            print("✅ Tất cả chapter đã đúng volume")
+            return 0
+        print(f"   Chạy: python volumes.py --book {book.slug} --revolume")
+        return 1
+
+    print(f"📚 Volume của {book.slug}:")
+    for index, boundary in enumerate(volume_map.boundaries):
+        end = volume_map.starts[index + 1] - 1 if index + 1 < len(volume_map.starts) else None
+        print(f"   • Vol. {boundary['volume']:<3} chương {boundary['start']}–{end if end else '...'}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -87,6 +87,7 @@ const ChapterListManager = {
                    data-chapter-id="${chapter.id}">
                     <div class="chapter-card-number">Chương ${chapter.id}</div>
                     <div class="chapter-card-title">${chapter.title}</div>
+                    ${this.formatMeta(chapter)}
                 </a>
             `;
         });
@@ -94,6 +95,12 @@ const ChapterListManager = {
         container.innerHTML = html;
     },
 
+    formatMeta(chapter) {
+        // wordCount/readingMinutes are precomputed by update_chapters_json.py
+        if (!chapter.wordCount) return '';
+        return `<div class="chapter-card-meta">${chapter.wordCount.toLocaleString('vi-VN')} từ · ${chapter.readingMinutes} phút đọc</div>`;
+    },
+
     filterChapters(query) {
         const cards = document.querySelectorAll('.chapter-card');
         const normalizedQuery = query.toLowerCase().trim();
@@ -165,6 +165,7 @@ const TOCPanel = {
                    class="toc-item ${isActive ? 'active' : ''}">
                     <div class="toc-item-number">Chương ${chapter.id}</div>
                     <div class="toc-item-title">${chapter.title}</div>
+                    ${this.formatMeta(chapter)}
                 </a>
             `;
         });
@@ -177,6 +178,12 @@ const TOCPanel = {
         }, 100);
     },
 
+    formatMeta(chapter) {
+        // wordCount/readingMinutes are precomputed by update_chapters_json.py
+        if (!chapter.wordCount) return '';
+        return `<div class="toc-item-meta">${chapter.wordCount.toLocaleString('vi-VN')} từ · ${chapter.readingMinutes} phút đọc</div>`;
+    },
+
     filterTOC(query) {
         const items = document.querySelectorAll('.toc-item');
         const normalizedQuery = query.toLowerCase().trim();
@@ -239,15 +246,18 @@ const ChapterReader = {
 
     init() {
         const chapterId = this.getCurrentChapterId();
+        this.prerendered = parseInt(document.body.dataset.prerendered) || null;
         if (chapterId) {
-            this.loadChapter(chapterId);
+            this.loadChapter(chapterId, true);
         }
+        this.loadParagraphOffsets();
         this.bindEvents();
     },
 
     getCurrentChapterId() {
         const params = new URLSearchParams(window.location.search);
-        return parseInt(params.get('chapter')) || null;
+        // Pre-rendered pages (chapters/<id>.html) carry the id on <body>
+        return parseInt(params.get('chapter')) || parseInt(document.body.dataset.prerendered) || null;
     },
 
     getChapterById(id) {
@@ -260,7 +270,98 @@ const ChapterReader = {
         return chaptersData.chapters.findIndex(ch => ch.id === id);
     },
 
-    loadChapter(chapterId) {
+    loadParagraphOffsets() {
+        // Paragraph offsets are precomputed by update_chapters_json.py but not shipped in
+        // chapters.js: sync_chapters_js.py writes them to their own file, loaded once in the background
+        if (!this.offsetsLoaded) {
+            this.offsetsLoaded = new Promise(resolve => {
+                const script = document.createElement('script');
+                script.src = 'js/paragraph-offsets.js';
+                script.onload = () => {
+                    if (typeof paragraphOffsetsData !== 'undefined') {
+                        chaptersData.chapters.forEach(ch => {
+                            ch.paragraphOffsets = paragraphOffsetsData[ch.id];
+                        });
+                    }
+                    resolve();
+                };
+                script.onerror = () => resolve();
+                document.head.appendChild(script);
+            });
+        }
+        return this.offsetsLoaded;
+    },
+
+    getParagraphs(chapter) {
+        // Slice by the paragraph offsets once loaded, otherwise split the lines
+        const offsets = chapter.paragraphOffsets;
+        if (!offsets) {
+            return chapter.content.split('\n').filter(p => p.trim());
+        }
+        return offsets.map((start, i) => {
+            const end = i + 1 < offsets.length ? offsets[i + 1] : chapter.content.length;
+            return chapter.content.slice(start, end).trim();
+        });
+    },
+
+    paragraphAtOffset(offset) {
+        // Last paragraph starting at or before `offset` (binary search over the offsets)
+        const offsets = this.currentChapter?.paragraphOffsets || [];
+        let low = 0, high = offsets.length - 1, found = 0;
+        while (low <= high) {
+            const mid = (low + high) >> 1;
+            if (offsets[mid] <= offset) {
+                found = mid;
+                low = mid + 1;
+            } else {
+                high = mid - 1;
+            }
+        }
+        return found;
+    },
+
+    getVisibleParagraph() {
+        // First paragraph whose bottom edge is below the top of the viewport
+        const paragraphs = document.getElementById('chapterText').children;
+        let low = 0, high = paragraphs.length - 1, found = 0;
+        while (low <= high) {
+            const mid = (low + high) >> 1;
+            if (paragraphs[mid].getBoundingClientRect().bottom > 0) {
+                found = mid;
+                high = mid - 1;
+            } else {
+                low = mid + 1;
+            }
+        }
+        return found;
+    },
+
+    getSavedParagraph(chapterId) {
+        try {
+            const saved = JSON.parse(localStorage.getItem(`${BOOK_ID}_progress`)) || {};
+            if (saved.lastChapter !== chapterId) return null;
+            // Prefer the text offset: it still points at the same passage if paragraphs change
+            if (saved.paragraphOffset !== undefined && this.currentChapter.paragraphOffsets) {
+                return this.paragraphAtOffset(saved.paragraphOffset);
+            }
+            return saved.paragraph || null;
+        } catch {
+            return null;
+        }
+    },
+
+    restoreParagraph(chapterId) {
+        if (this.currentChapter?.id !== chapterId) return;  // another chapter was opened meanwhile
+        const paragraph = this.getSavedParagraph(chapterId);
+        this.saveProgress(chapterId, paragraph || 0);
+        if (paragraph) {
+            document.getElementById('chapterText').children[paragraph]?.scrollIntoView();
+        } else {
+            window.scrollTo(0, 0);
+        }
+    },
+
+    loadChapter(chapterId, restorePosition = false) {
         const chapter = this.getChapterById(chapterId);
         if (!chapter) {
             document.getElementById('chapterText').innerHTML = `
@@ -282,23 +383,28 @@ const ChapterReader = {
         document.getElementById('volumeTag').textContent = `Volume ${chapter.volume}`;
         document.getElementById('chapterHeading').textContent = `Chương ${chapter.id}: ${chapter.title}`;
 
-        // Render content
-        const contentHtml = chapter.content
-            .split('\n')
-            .filter(p => p.trim())
-            .map(p => `<p>${p}</p>`)
-            .join('');
+        // Render content (pre-rendered pages already contain it)
+        if (chapterId === this.prerendered) {
+            this.prerendered = null;
+        } else {
+            const contentHtml = this.getParagraphs(chapter)
+                .map(p => `<p>${p}</p>`)
+                .join('');
 
-        document.getElementById('chapterText').innerHTML = contentHtml;
+            document.getElementById('chapterText').innerHTML = contentHtml;
+        }
 
         // Update navigation
         this.updateNavigation(chapterId);
 
-        // Save progress
-        this.saveProgress(chapterId);
-
-        // Scroll to top
-        window.scrollTo(0, 0);
+        // Restore the saved paragraph when reopening the last chapter (once the paragraph
+        // offsets are loaded, the text is already shown meanwhile), otherwise start at the top
+        if (restorePosition) {
+            this.loadParagraphOffsets().then(() => this.restoreParagraph(chapterId));
+        } else {
+            this.saveProgress(chapterId, 0);
+            window.scrollTo(0, 0);
+        }
 
         // Update TOC active state
         TOCPanel.renderTOC();
@@ -309,9 +415,13 @@ const ChapterReader = {
         const prevBtn = document.getElementById('prevChapter');
         const nextBtn = document.getElementById('nextChapter');
 
+        // On pre-rendered pages these are real links; stay in the single-page reader instead
         if (index > 0) {
             prevBtn.disabled = false;
-            prevBtn.onclick = () => this.navigateToChapter(chaptersData.chapters[index - 1].id);
+            prevBtn.onclick = (e) => {
+                e.preventDefault();
+                this.navigateToChapter(chaptersData.chapters[index - 1].id);
+            };
         } else {
             prevBtn.disabled = true;
             prevBtn.onclick = null;
@@ -319,7 +429,10 @@ const ChapterReader = {
 
         if (index < chaptersData.chapters.length - 1) {
             nextBtn.disabled = false;
-            nextBtn.onclick = () => this.navigateToChapter(chaptersData.chapters[index + 1].id);
+            nextBtn.onclick = (e) => {
+                e.preventDefault();
+                this.navigateToChapter(chaptersData.chapters[index + 1].id);
+            };
         } else {
             nextBtn.disabled = true;
             nextBtn.onclick = null;
@@ -331,12 +444,14 @@ const ChapterReader = {
         this.loadChapter(chapterId);
     },
 
-    saveProgress(chapterId) {
+    saveProgress(chapterId, paragraph = 0) {
         try {
             const progress = {
                 lastChapter: chapterId,
                 lastRead: Date.now(),
-                scrollPercent: 0
+                scrollPercent: 0,
+                paragraph: paragraph,
+                paragraphOffset: this.currentChapter?.paragraphOffsets?.[paragraph]
             };
             localStorage.setItem(`${BOOK_ID}_progress`, JSON.stringify(progress));
         } catch (e) {
@@ -377,7 +492,10 @@ const ChapterReader = {
                 if (this.currentChapter) {
                     try {
                         const saved = JSON.parse(localStorage.getItem(`${BOOK_ID}_progress`)) || {};
+                        const paragraph = this.getVisibleParagraph();
                         saved.scrollPercent = progress;
+                        saved.paragraph = paragraph;
+                        saved.paragraphOffset = this.currentChapter.paragraphOffsets?.[paragraph];
                         localStorage.setItem(`${BOOK_ID}_progress`, JSON.stringify(saved));
                     } catch (e) { }
                 }